@@ -1,10 +1,12 @@
 """
 Rotas para gerenciamento de AIRequests
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.models.ai_request import AIRequest, AIRequestCreate, AIRequestUpdate
+from app.models.page import Page
 from app.services.ai_request_service import AIRequestService
-from typing import List
+from app.services.ai_job_service import AIJobService
+from app.api.dependencies import PageParams, pagination_params
 
 router = APIRouter()
 
@@ -12,7 +14,11 @@ router = APIRouter()
 @router.post("/", response_model=AIRequest, status_code=status.HTTP_201_CREATED)
 async def create_ai_request(request: AIRequestCreate):
     """
-    Cria um novo AI request
+    Cria um novo AI request e enfileira o seu processamento
+    
+    A resposta é imediata (status PENDING); um worker gera a resposta com o
+    Gemini, grava-a na note indicada em `noteId` (se houver) e passa o
+    status para COMPLETED ou FAILED.
     
     Args:
         request: Dados do AI request a ser criado (AIRequestCreate)
@@ -24,7 +30,7 @@ async def create_ai_request(request: AIRequestCreate):
         HTTPException: Se falhar ao criar o AI request (500)
     """
     try:
-        return AIRequestService.create_ai_request(request)
+        return await AIJobService.submit(request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -46,7 +52,7 @@ async def get_ai_request(request_id: str):
     Raises:
         HTTPException: Se o AI request não for encontrado (404)
     """
-    ai_request = AIRequestService.get_ai_request(request_id)
+    ai_request = await AIRequestService.get_ai_request(request_id)
     if not ai_request:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,7 +76,7 @@ async def update_ai_request(request_id: str, request: AIRequestUpdate):
     Raises:
         HTTPException: Se o AI request não for encontrado (404)
     """
-    updated_request = AIRequestService.update_ai_request(request_id, request)
+    updated_request = await AIRequestService.update_ai_request(request_id, request)
     if not updated_request:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -93,40 +99,69 @@ async def delete_ai_request(request_id: str):
     Raises:
         HTTPException: Se o AI request não for encontrado (404)
     """
-    ai_request = AIRequestService.get_ai_request(request_id)
+    ai_request = await AIRequestService.get_ai_request(request_id)
     if not ai_request:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="AI request não encontrado"
         )
-    AIRequestService.delete_ai_request(request_id)
+    await AIRequestService.delete_ai_request(request_id)
     return None
 
 
-@router.get("/user/{user_id}", response_model=List[AIRequest])
-async def list_ai_requests_by_user(user_id: str):
+@router.get("/user/{user_id}", response_model=Page[AIRequest])
+async def list_ai_requests_by_user(user_id: str, page: PageParams = Depends(pagination_params)):
     """
-    Lista todos os AI requests de um usuário
+    Lista os AI requests de um usuário (paginado)
     
     Args:
         user_id: ID único do usuário
+        page: Parâmetros de paginação (`limit` e `cursor` na query string)
     
     Returns:
-        List[AIRequest]: Lista de todos os AI requests do usuário
+        Page[AIRequest]: Página de AI requests do usuário e `next_cursor`
     """
-    return AIRequestService.list_ai_requests_by_user(user_id)
+    return await AIRequestService.list_ai_requests_by_user(user_id, page.limit, page.cursor)
 
 
-@router.get("/topic/{topic_id}", response_model=List[AIRequest])
-async def list_ai_requests_by_topic(topic_id: str):
+@router.get("/topic/{topic_id}", response_model=Page[AIRequest])
+async def list_ai_requests_by_topic(topic_id: str, page: PageParams = Depends(pagination_params)):
     """
-    Lista todos os AI requests relacionados a um topic
+    Lista os AI requests relacionados a um topic (paginado)
     
     Args:
         topic_id: ID único do topic
+        page: Parâmetros de paginação (`limit` e `cursor` na query string)
+    
+    Returns:
+        Page[AIRequest]: Página de AI requests do topic e `next_cursor`
+    """
+    return await AIRequestService.list_ai_requests_by_topic(topic_id, page.limit, page.cursor)
+
+
+@router.get("/user/{user_id}/count")
+async def count_ai_requests_by_user(user_id: str):
+    """
+    Conta os AI requests de um usuário (aggregation query, sem listar)
+    
+    Args:
+        user_id: ID único do usuário
     
     Returns:
-        List[AIRequest]: Lista de todos os AI requests do topic
+        dict: {"userId": ..., "count": <total>}
     """
-    return AIRequestService.list_ai_requests_by_topic(topic_id)
+    return {"userId": user_id, "count": await AIRequestService.count_ai_requests_by_user(user_id)}
+
 
+@router.get("/topic/{topic_id}/count")
+async def count_ai_requests_by_topic(topic_id: str):
+    """
+    Conta os AI requests relacionados a um topic (aggregation query, sem listar)
+    
+    Args:
+        topic_id: ID único do topic
+    
+    Returns:
+        dict: {"topicId": ..., "count": <total>}
+    """
+    return {"topicId": topic_id, "count": await AIRequestService.count_ai_requests_by_topic(topic_id)}
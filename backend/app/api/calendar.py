@@ -1,17 +1,105 @@
 """
 Rotas para integração com Google Calendar
 """
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Literal, Optional, List
 from datetime import datetime
+import asyncio
+import logging
 import os
+import uuid
 import httpx
+from app.api.dependencies import PageParams, get_calendar_client, pagination_params
+from app.models.study_session import StudySession
+from app.services.calendar_batch_service import BatchRequest, execute_batch
+from app.services.calendar_events import app_event_properties, session_event_body
+from app.services.calendar_sync_service import CalendarSyncError, CalendarSyncService
+from app.services.retry_policy import calendar_retry, send_with_retry
+from app.services.study_session_service import StudySessionService
+from app.services.token_manager import TokenUnavailableError, token_manager
+from app.services.topic_service import TopicService
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 GOOGLE_CALENDAR_API_URL = "https://www.googleapis.com/calendar/v3"
 
+#Sessões por pedido de /events/batch (limite de escritas de um batch do Firestore)
+CALENDAR_SYNC_MAX_SESSIONS = 500
+
+
+async def _calendar_request(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    access_token: str,
+    idempotent: Optional[bool] = None,
+    **kwargs
+) -> httpx.Response:
+    """
+    Faz um pedido à API do Google Calendar com a política de retry partilhada
+
+    Raises:
+        HTTPException: Se a API não puder ser contactada após os retries (503)
+    """
+    try:
+        return await send_with_retry(
+            client, method, f"{GOOGLE_CALENDAR_API_URL}{path}",
+            policy=calendar_retry,
+            idempotent=idempotent,
+            headers={"Authorization": f"Bearer {access_token}"},
+            **kwargs
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Google Calendar indisponível: {str(e)}"
+        )
+
+
+async def _resolve_token(user_id: Optional[str], access_token: Optional[str]) -> str:
+    """
+    Token OAuth a usar no pedido: o `access_token` enviado pelo cliente ou,
+    com `userId`, o token gerido no servidor (renovado se necessário)
+
+    Raises:
+        HTTPException: Sem userId nem access_token (400) ou token
+            indisponível (ver TokenUnavailableError)
+    """
+    if access_token:
+        return access_token
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indique userId (ou access_token)"
+        )
+    try:
+        return await token_manager.get_access_token(user_id)
+    except TokenUnavailableError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+async def _ensure_mirror(client: httpx.AsyncClient, user_id: str, access_token: str, force: bool = False) -> Optional[dict]:
+    """
+    Sincroniza o espelho do utilizador (se estiver desatualizado ou `force`)
+
+    Raises:
+        HTTPException: Erro da API do Calendar (status do Google) ou rede (503)
+    """
+    try:
+        if force:
+            return await CalendarSyncService.sync(client, user_id, access_token)
+        await CalendarSyncService.ensure_synced(client, user_id, access_token)
+        return None
+    except CalendarSyncError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"Erro ao sincronizar o Google Calendar: {e.detail}")
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Google Calendar indisponível: {str(e)}"
+        )
+
 
 class CalendarEventCreate(BaseModel):
     """
@@ -34,22 +122,33 @@ class CalendarEventCreate(BaseModel):
 @router.post("/events")
 async def create_calendar_event(
     event: CalendarEventCreate,
-    access_token: str  # Query parameter: ?access_token=...
+    userId: Optional[str] = None,
+    access_token: Optional[str] = None,  # Obsoleto: preferir userId
+    client: httpx.AsyncClient = Depends(get_calendar_client)
 ):
     """
     Cria um evento no Google Calendar
     
     Args:
         event: Dados do evento a ser criado (CalendarEventCreate)
-        access_token: Token de acesso do Google OAuth (query parameter)
+        userId: ID do utilizador (o token OAuth é obtido no servidor)
+        access_token: Token de acesso do Google OAuth (obsoleto, alternativa a userId)
+        client: Cliente HTTP partilhado (injetado)
     
     Returns:
         dict: Dados do evento criado retornados pela API do Google Calendar
     
     Raises:
         HTTPException: Se falhar ao criar o evento (status code da API do Google)
+
+    Note:
+        O ID do evento é gerado aqui, o que torna a criação idempotente: se
+        um retry encontrar o evento já criado (409), ele é devolvido.
     """
+    access_token = await _resolve_token(userId, access_token)
+    event_id = uuid.uuid4().hex
     event_data = {
+        "id": event_id,
         "summary": event.summary,
         "description": event.description,
         "start": {
@@ -59,36 +158,238 @@ async def create_calendar_event(
         "end": {
             "dateTime": event.end_time.isoformat(),
             "timeZone": event.timezone
-        }
+        },
+        "extendedProperties": app_event_properties()
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{GOOGLE_CALENDAR_API_URL}/calendars/primary/events",
-            headers={"Authorization": f"Bearer {access_token}"},
-            json=event_data
+    response = await _calendar_request(
+        client, "POST", "/calendars/primary/events", access_token,
+        idempotent=True,
+        json=event_data
+    )
+    if response.status_code == 409:
+        # Criado por uma tentativa anterior cuja resposta se perdeu
+        response = await _calendar_request(
+            client, "GET", f"/calendars/primary/events/{event_id}", access_token
+        )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Erro ao criar evento: {response.text}"
+        )
+    
+    return response.json()
+
+
+class SessionEventOperation(BaseModel):
+    """
+    Operação sobre o evento de uma study session
+
+    Attributes:
+        sessionId: ID da study session
+        action: "upsert" cria o evento (ou atualiza o existente em calendarEvent);
+            "delete" apaga o evento e limpa calendarEvent
+    """
+    sessionId: str
+    action: Literal["upsert", "delete"] = "upsert"
+
+
+class SessionEventsBatch(BaseModel):
+    """
+    Pedido de sincronização em lote dos eventos de study sessions
+
+    Attributes:
+        sessions: Operações a executar (até 500)
+        timezone: Fuso horário (IANA) em que as horas das sessões são
+            interpretadas e gravadas nos eventos (padrão: UTC)
+    """
+    sessions: List[SessionEventOperation] = Field(..., min_length=1, max_length=CALENDAR_SYNC_MAX_SESSIONS)
+    timezone: str = "UTC"
+
+
+def _session_event_body(session: StudySession, title: str, timezone: str) -> Dict[str, Any]:
+    return session_event_body(
+        session.startTime, session.endTime, f"Sessão de estudo: {title}", timezone, session.sessionId
+    )
+
+
+@router.post("/events/batch")
+async def sync_session_events(
+    request: SessionEventsBatch,
+    userId: Optional[str] = None,
+    access_token: Optional[str] = None,  # Obsoleto: preferir userId
+    client: httpx.AsyncClient = Depends(get_calendar_client)
+):
+    """
+    Cria, atualiza ou apaga os eventos de várias study sessions de uma vez
+
+    Os pedidos ao Google Calendar seguem pela API de batch (até 50 por
+    pedido HTTP) e os IDs dos eventos são gravados em `calendarEvent` num
+    batch do Firestore. Um evento vinculado que já não exista no Google
+    (404/410) é recriado; se a sessão for apagada entretanto, o evento
+    acabado de criar é removido e a sessão é devolvida como "failed".
+
+    Args:
+        request: Sessões e ação de cada uma (SessionEventsBatch)
+        userId: ID do utilizador (o token OAuth é obtido no servidor)
+        access_token: Token de acesso do Google OAuth (obsoleto, alternativa a userId)
+        client: Cliente HTTP partilhado (injetado)
+
+    Returns:
+        dict: {"results": [{"sessionId", "action", "status", "calendarEvent", "error"?}],
+            "updated": número de sessões efetivamente atualizadas no Firestore}
+            status: "created", "updated", "deleted", "skipped" ou "failed"
+
+    Raises:
+        HTTPException: Se o Google Calendar não puder ser contactado (503)
+    """
+    access_token = await _resolve_token(userId, access_token)
+    operations = list({op.sessionId: op for op in request.sessions}.values())
+    sessions = await asyncio.gather(*(StudySessionService.get_study_session(op.sessionId) for op in operations))
+    topic_ids = {session.topicId for session in sessions if session is not None}
+    topics = dict(zip(topic_ids, await asyncio.gather(*(TopicService.get_topic(t) for t in topic_ids))))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    calls: List[BatchRequest] = []
+    call_sessions: List[tuple] = []
+
+    def add_create(session: StudySession) -> None:
+        event_id = uuid.uuid4().hex
+        topic = topics.get(session.topicId)
+        body = _session_event_body(session, topic.title if topic else session.topicId, request.timezone)
+        calls.append(BatchRequest("POST", "/calendars/primary/events", {"id": event_id, **body}))
+        call_sessions.append((session, "created", event_id))
+
+    for op, session in zip(operations, sessions):
+        result = {"sessionId": op.sessionId, "action": op.action, "calendarEvent": None}
+        results[op.sessionId] = result
+        if session is None:
+            result.update(status="failed", error="Sessão não encontrada")
+            continue
+        result["calendarEvent"] = session.calendarEvent
+        if op.action == "delete":
+            if not session.calendarEvent:
+                result["status"] = "skipped"
+                continue
+            calls.append(BatchRequest("DELETE", f"/calendars/primary/events/{session.calendarEvent}"))
+            call_sessions.append((session, "deleted", None))
+        elif session.calendarEvent:
+            topic = topics.get(session.topicId)
+            body = _session_event_body(session, topic.title if topic else session.topicId, request.timezone)
+            calls.append(BatchRequest("PATCH", f"/calendars/primary/events/{session.calendarEvent}", body))
+            call_sessions.append((session, "updated", session.calendarEvent))
+        else:
+            add_create(session)
+
+    new_events: Dict[str, Optional[str]] = {}
+    try:
+        while calls:
+            responses = await execute_batch(client, access_token, calls)
+            pending_sessions = call_sessions
+            calls, call_sessions = [], []
+            for (session, outcome, event_id), response in zip(pending_sessions, responses):
+                result = results[session.sessionId]
+                code = response.status_code
+                if outcome == "deleted" and code in (200, 204, 404, 410):
+                    ok = True
+                elif outcome == "created" and code in (200, 409):
+                    # 409: criado por uma tentativa anterior (o ID é nosso)
+                    ok = True
+                elif outcome == "updated" and code in (404, 410):
+                    # Evento apagado no Google: recriar
+                    add_create(session)
+                    continue
+                else:
+                    ok = code == 200
+                if ok:
+                    result.update(status=outcome, calendarEvent=event_id)
+                    if event_id != session.calendarEvent:
+                        new_events[session.sessionId] = event_id
+                else:
+                    result.update(status="failed", error=f"status={code} {response.text[:200]}")
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Google Calendar indisponível: {str(e)}"
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Erro ao criar evento: {response.text}"
-            )
-        
-        return response.json()
+
+    linked = set(await StudySessionService.set_calendar_events(new_events))
+
+    # Sessões apagadas durante a sincronização: os eventos acabados de criar
+    # ficariam sem sessão, pelo que são removidos do Google
+    orphans = [
+        (session_id, event_id) for session_id, event_id in new_events.items()
+        if session_id not in linked and event_id is not None
+    ]
+    for session_id, _ in orphans:
+        results[session_id].update(status="failed", calendarEvent=None, error="Sessão apagada durante a sincronização")
+    if orphans:
+        try:
+            await execute_batch(client, access_token, [
+                BatchRequest("DELETE", f"/calendars/primary/events/{event_id}") for _, event_id in orphans
+            ])
+        except httpx.HTTPError:
+            logger.warning("Não foi possível apagar %d eventos órfãos do Google Calendar", len(orphans), exc_info=True)
+
+    return {"results": list(results.values()), "updated": len(linked)}
+
+
+@router.post("/sync")
+async def sync_calendar(
+    userId: str,
+    access_token: Optional[str] = None,  # Obsoleto: o token é obtido pelo userId
+    client: httpx.AsyncClient = Depends(get_calendar_client)
+):
+    """
+    Sincroniza já o espelho do Google Calendar do utilizador
+
+    Usa o syncToken guardado para trazer apenas as alterações desde a
+    última sincronização (ver CalendarSyncService).
+
+    Returns:
+        dict: {"full", "events_changed", "events_removed", "sessions_updated", "calendars"}
+    """
+    access_token = await _resolve_token(userId, access_token)
+    return await _ensure_mirror(client, userId, access_token, force=True)
+
+
+@router.get("/events")
+async def list_mirrored_events(
+    userId: str,
+    access_token: Optional[str] = None,  # Obsoleto: o token é obtido pelo userId
+    page: PageParams = Depends(pagination_params),
+    client: httpx.AsyncClient = Depends(get_calendar_client)
+):
+    """
+    Lista os eventos da aplicação no Calendar do utilizador, a partir do espelho
+
+    Returns:
+        dict: {"items": [evento, ...], "next_cursor": Optional[str]}
+    """
+    await _ensure_mirror(client, userId, await _resolve_token(userId, access_token))
+    items, next_cursor = await CalendarSyncService.list_events(userId, page.limit, page.cursor)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get("/events/{event_id}")
 async def get_calendar_event(
     event_id: str,
-    access_token: str  # Query parameter: ?access_token=...
+    userId: Optional[str] = None,
+    access_token: Optional[str] = None,  # Obsoleto: preferir userId
+    client: httpx.AsyncClient = Depends(get_calendar_client)
 ):
     """
     Busca um evento específico do Google Calendar
     
+    Com `userId`, o evento é lido do espelho sincronizado do utilizador;
+    só eventos fora do espelho (não criados pela aplicação) vão ao Google.
+    
     Args:
         event_id: ID do evento no Google Calendar
-        access_token: Token de acesso do Google OAuth (query parameter)
+        userId: ID do utilizador dono do espelho (o token OAuth é obtido no servidor)
+        access_token: Token de acesso do Google OAuth (obsoleto, alternativa a userId)
+        client: Cliente HTTP partilhado (injetado)
     
     Returns:
         dict: Dados do evento retornados pela API do Google Calendar
@@ -96,32 +397,41 @@ async def get_calendar_event(
     Raises:
         HTTPException: Se o evento não for encontrado (404)
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{GOOGLE_CALENDAR_API_URL}/calendars/primary/events/{event_id}",
-            headers={"Authorization": f"Bearer {access_token}"}
+    access_token = await _resolve_token(userId, access_token)
+    if userId:
+        await _ensure_mirror(client, userId, access_token)
+        mirrored = await CalendarSyncService.get_event(userId, event_id)
+        if mirrored is not None:
+            return mirrored
+
+    response = await _calendar_request(
+        client, "GET", f"/calendars/primary/events/{event_id}", access_token
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Evento não encontrado"
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail="Evento não encontrado"
-            )
-        
-        return response.json()
+    
+    return response.json()
 
 
 @router.delete("/events/{event_id}")
 async def delete_calendar_event(
     event_id: str,
-    access_token: str  # Query parameter: ?access_token=...
+    userId: Optional[str] = None,
+    access_token: Optional[str] = None,  # Obsoleto: preferir userId
+    client: httpx.AsyncClient = Depends(get_calendar_client)
 ):
     """
     Deleta um evento do Google Calendar
     
     Args:
         event_id: ID do evento no Google Calendar a ser deletado
-        access_token: Token de acesso do Google OAuth (query parameter)
+        userId: ID do utilizador (o token OAuth é obtido no servidor)
+        access_token: Token de acesso do Google OAuth (obsoleto, alternativa a userId)
+        client: Cliente HTTP partilhado (injetado)
     
     Returns:
         dict: Mensagem de sucesso {"message": "Evento deletado com sucesso"}
@@ -129,48 +439,59 @@ async def delete_calendar_event(
     Raises:
         HTTPException: Se falhar ao deletar o evento
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.delete(
-            f"{GOOGLE_CALENDAR_API_URL}/calendars/primary/events/{event_id}",
-            headers={"Authorization": f"Bearer {access_token}"}
+    access_token = await _resolve_token(userId, access_token)
+    response = await _calendar_request(
+        client, "DELETE", f"/calendars/primary/events/{event_id}", access_token
+    )
+    
+    # 410: já apagado (por exemplo, por uma tentativa anterior cuja resposta se perdeu)
+    if response.status_code not in (204, 410):
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Erro ao deletar evento"
         )
-        
-        if response.status_code != 204:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail="Erro ao deletar evento"
-            )
-        
-        return {"message": "Evento deletado com sucesso"}
+    
+    return {"message": "Evento deletado com sucesso"}
 
 
 @router.get("/calendars")
 async def list_calendars(
-    access_token: str  # Query parameter: ?access_token=...
+    userId: Optional[str] = None,
+    access_token: Optional[str] = None,  # Obsoleto: preferir userId
+    client: httpx.AsyncClient = Depends(get_calendar_client)
 ):
     """
     Lista todos os calendários do usuário no Google Calendar
     
+    Com `userId`, a lista vem do espelho sincronizado do utilizador.
+    
     Args:
-        access_token: Token de acesso do Google OAuth (query parameter)
+        userId: ID do utilizador dono do espelho (o token OAuth é obtido no servidor)
+        access_token: Token de acesso do Google OAuth (obsoleto, alternativa a userId)
+        client: Cliente HTTP partilhado (injetado)
     
     Returns:
         dict: Lista de calendários retornada pela API do Google Calendar
+            (com o espelho: {"kind", "items"})
     
     Raises:
         HTTPException: Se falhar ao listar os calendários
     """
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{GOOGLE_CALENDAR_API_URL}/users/me/calendarList",
-            headers={"Authorization": f"Bearer {access_token}"}
+    access_token = await _resolve_token(userId, access_token)
+    if userId:
+        await _ensure_mirror(client, userId, access_token)
+        state = await CalendarSyncService.get_state(userId)
+        return {"kind": "calendar#calendarList", "items": list((state.get("calendars") or {}).values())}
+
+    response = await _calendar_request(
+        client, "GET", "/users/me/calendarList", access_token
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Erro ao listar calendários"
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail="Erro ao listar calendários"
-            )
-        
-        return response.json()
+    
+    return response.json()
 
@@ -0,0 +1,38 @@
+"""
+Rotas para consultar as eliminações em cascata feitas em segundo plano
+
+Os DELETE de subjects e topics respondem 202 com o job quando a
+eliminação é grande demais para correr no pedido; o progresso de ambos
+consulta-se aqui.
+"""
+from fastapi import APIRouter, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models.cascade_delete import CascadeDeleteJob
+from app.services.cascade_delete_service import CascadeDeleteService
+
+router = APIRouter()
+
+#Prefixo com que o router é registado em main.py
+DELETE_JOBS_PATH = "/api/delete-jobs"
+
+
+def accepted_response(job: CascadeDeleteJob) -> JSONResponse:
+    """Resposta 202 com o job e o URL do seu estado no cabeçalho Location"""
+    return JSONResponse(
+        jsonable_encoder(job),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"{DELETE_JOBS_PATH}/{job.jobId}"},
+    )
+
+
+@router.get("/{job_id}", response_model=CascadeDeleteJob)
+async def get_delete_job(job_id: str):
+    """Progresso de uma eliminação em cascata feita em segundo plano"""
+    job = await CascadeDeleteService.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job de eliminação não encontrado"
+        )
+    return job
@@ -0,0 +1,68 @@
+"""
+Dependências partilhadas pelas rotas (injetadas com Depends)
+"""
+from dataclasses import dataclass
+from fastapi import HTTPException, Query, status
+from typing import Optional
+import httpx
+from app.services.http_client_service import http_clients
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    decode_cursor,
+)
+
+
+@dataclass
+class PageParams:
+    """
+    Parâmetros de paginação por cursor
+
+    Attributes:
+        limit: Número máximo de itens por página
+        cursor: Cursor opaco devolvido em `next_cursor` pela página anterior
+    """
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+
+
+def pagination_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` da página anterior"),
+) -> PageParams:
+    """
+    Lê e valida `limit` e `cursor` da query string
+
+    Raises:
+        HTTPException: Se o cursor for inválido (400)
+    """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de paginação inválido"
+            )
+    return PageParams(limit=limit, cursor=cursor)
+
+
+def get_gemini_client() -> httpx.AsyncClient:
+    """Cliente HTTP partilhado para a API do Gemini (generativelanguage.googleapis.com)"""
+    return http_clients.get("gemini")
+
+
+def get_calendar_client() -> httpx.AsyncClient:
+    """Cliente HTTP partilhado para a API do Google Calendar (www.googleapis.com)"""
+    return http_clients.get("calendar")
+
+
+def get_youtube_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP partilhado para a YouTube Data API (www.googleapis.com/youtube/v3)"""
+    return http_clients.get("youtube")
+
+
+def get_oauth_client() -> httpx.AsyncClient:
+    """Cliente HTTP partilhado para o OAuth do Google (troca de código e certificados)"""
+    return http_clients.get("oauth")
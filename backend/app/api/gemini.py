@@ -1,69 +1,78 @@
 """
 Rotas para integração com Gemini API (versão atualizada)
 """
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import os
+import json
+import time
+import asyncio
 import httpx
+from contextlib import asynccontextmanager
 import logging
+from app.api.dependencies import get_gemini_client
+from app.services.gemini_service import (
+    GEMINI_API_URL,
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_MODEL_TIMEOUT,
+    GEMINI_REQUEST_DEADLINE,
+    GEMINI_HEDGE_ENABLED,
+    estimate_tokens,
+    gemini_admission,
+    list_available_models,
+    model_catalog,
+    model_health,
+)
+from app.services.gemini_cache_service import response_cache
+from app.services.retry_policy import gemini_retry, parse_retry_after, send_with_retry
+from app.services.rate_limiter import Priority, use_priority
+from app.services.ai_request_service import AIRequestService
+from app.services.note_service import NoteService
+from app.models.ai_request import AIRequestUpdate, AIStatus
+from app.models.note import NoteUpdate
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# API do Gemini - versão gratuita
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+#Limites do endpoint /summarize/batch
+GEMINI_BATCH_CONCURRENCY = int(os.getenv("GEMINI_BATCH_CONCURRENCY", "4"))
+GEMINI_BATCH_MAX_ITEMS = int(os.getenv("GEMINI_BATCH_MAX_ITEMS", "100"))
 
 class GeminiRequest(BaseModel):
     prompt: str
     topic_id: Optional[str] = None
     slide_id: Optional[str] = None
     context: Optional[str] = None
+    generation_config: Optional[Dict[str, Any]] = None
+    use_cache: bool = True
 
-async def list_available_models(client: httpx.AsyncClient) -> List[str]:
-    """
-    Lista modelos disponíveis via API. Útil para debug / fallback dinâmico.
-    Retorna uma lista de model ids (strings) — se falhar, retorna lista vazia.
-    """
-    try:
-        url = f"{GEMINI_API_URL}/models"
-        r = await client.get(url, params={"key": GEMINI_API_KEY}, timeout=10.0)
-        if r.status_code == 200:
-            data = r.json()
-            models = []
-            for m in data.get("models", []):
-                # cada item tem 'name' ou 'id' dependendo da resposta — adaptamos
-                name = m.get("name") or m.get("id") or m.get("model")
-                if name:
-                    models.append(name)
-            return models
-    except Exception as e:
-        logger.debug("Não foi possível listar modelos: %s", e)
-    return []
 
-@router.post("/generate")
-async def generate_with_gemini(request: GeminiRequest):
-    """Gera explicação usando Gemini API (versão gratuita)"""
-    if not GEMINI_API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="GEMINI_API_KEY não configurado"
-        )
+class GeminiStreamRequest(GeminiRequest):
+    request_id: Optional[str] = None
+    note_id: Optional[str] = None
+
 
-    # Construir prompt com contexto se fornecido
+def _build_payload(request: GeminiRequest) -> Tuple[str, Dict[str, Any]]:
+    """Constrói o prompt completo (com contexto) e o corpo do pedido ao Gemini"""
     full_prompt = request.prompt
     if request.context:
         full_prompt = f"Contexto: {request.context}\n\nExplique: {request.prompt}"
 
-    payload = {
+    payload: Dict[str, Any] = {
         "contents": [{
             "parts": [{"text": full_prompt}]
         }]
     }
+    if request.generation_config:
+        payload["generationConfig"] = request.generation_config
+    return full_prompt, payload
 
-    # Modelos a tentar 
+
+async def _candidate_models(client: httpx.AsyncClient) -> List[str]:
+    """Modelos a tentar, por ordem, filtrados pela lista de modelos disponíveis (em cache)"""
     models_to_try = [
         GEMINI_MODEL,
         "gemini-2.5-flash",
@@ -72,86 +81,609 @@ async def generate_with_gemini(request: GeminiRequest):
         "gemini-2.5-flash-preview-09-2025"
     ]
 
-    async with httpx.AsyncClient() as client:
-        last_error = None
+    # --- opcional: filtrar a lista pelos modelos disponíveis (em cache) ---
+    try:
+        available = await model_catalog.get_models(client)
+        if available:
+            # Keep only models that appear to be available (string contains model id)
+            filtered = [m for m in models_to_try if any(m in a for a in available)]
+            if filtered:
+                models_to_try = filtered
+    except Exception:
+        # não falhar aqui — apenas log
+        logger.debug("Falha ao filtrar modelos via model_catalog", exc_info=True)
+    return [m for m in models_to_try if m]
 
-        # --- opcional: obter modelos disponíveis e filtrar a lista ---
-        try:
-            available = await list_available_models(client)
-            if available:
-                # Keep only models that appear to be available (string contains model id)
-                filtered = [m for m in models_to_try if any(m in a for a in available)]
-                if filtered:
-                    models_to_try = filtered
-        except Exception:
-            # não falhar aqui — apenas log
-            logger.debug("Falha ao filtrar modelos via list_available_models", exc_info=True)
-
-        for model in models_to_try:
-            if not model:
+
+def _extract_text(data: Dict[str, Any], chunk: bool = False) -> str:
+    """
+    Extrai o texto de uma resposta (ou de um fragmento do stream) do Gemini
+
+    Estrutura esperada: data["candidates"][0]["content"]["parts"][i]["text"]
+
+    Args:
+        data: Resposta (JSON) do generateContent ou um evento do streamGenerateContent
+        chunk: Se True, devolve o texto tal como veio (sem separadores nem strip),
+            para que os fragmentos concatenados reproduzam o texto original
+    """
+    candidates = data.get("candidates") or []
+    if not candidates:
+        return ""
+    # concatena todos os parts de texto (se houver mais de um)
+    parts = candidates[0].get("content", {}).get("parts", [])
+    texts = []
+    for p in parts:
+        # p pode ter 'text' ou 'inline_data'; lidamos apenas com text aqui
+        if isinstance(p, dict) and p.get("text"):
+            texts.append(p.get("text"))
+    if chunk:
+        return "".join(texts)
+    return "\n".join(texts).strip()
+
+class GeminiModelError(Exception):
+    """Falha de uma tentativa num modelo (status HTTP não-200 ou resposta vazia)"""
+
+    def __init__(self, model: str, message: str, status_code: Optional[int] = None):
+        super().__init__(f"model={model} {message}")
+        self.model = model
+        self.status_code = status_code
+
+
+class GeminiUnavailableError(Exception):
+    """Nenhum modelo conseguiu gerar a resposta dentro do prazo"""
+
+    def __init__(self, last_error: Optional[str], all_open: bool = False):
+        if all_open:
+            message = "Todos os modelos do Gemini estão temporariamente indisponíveis (circuito aberto)"
+        else:
+            message = f"Erro ao gerar resposta com todos os modelos tentados. Último erro: {last_error}"
+        super().__init__(message)
+        self.all_open = all_open
+
+
+def _payload_tokens(payload: Dict[str, Any]) -> int:
+    """Tokens estimados do prompt de um pedido (para o limite de tokens por minuto)"""
+    return estimate_tokens("".join(
+        part.get("text", "")
+        for content in payload.get("contents", [])
+        for part in content.get("parts", [])
+    ))
+
+
+async def _call_model(
+    client: httpx.AsyncClient,
+    model: str,
+    payload: Dict[str, Any],
+    timeout: float,
+    admitted: Optional[set] = None,
+) -> str:
+    """
+    Faz uma tentativa de geração num modelo e regista o resultado no circuit breaker
+
+    Cada tentativa espera primeiro pela admissão (gemini_admission), com a
+    prioridade do contexto atual. Erros transitórios (429/503 com Retry-After,
+    5xx, falhas de rede) são repetidos no mesmo modelo dentro de `timeout`
+    (ver retry_policy), antes de contarem como falha do modelo.
+
+    Args:
+        admitted: Conjunto onde o modelo é registado depois de admitido (permite
+            ao chamador distinguir tentativas em curso de tentativas ainda na fila)
+
+    Returns:
+        str: Texto gerado
+
+    Raises:
+        GeminiModelError: Se o modelo responder com erro ou sem texto
+        httpx.HTTPError: Erros de rede / timeout
+    """
+    url = f"{GEMINI_API_URL}/models/{model}:generateContent"
+    params = {"key": GEMINI_API_KEY}
+    tokens = _payload_tokens(payload)
+    started = time.monotonic()
+
+    @asynccontextmanager
+    async def admission():
+        # cada tentativa (incluindo retries) passa pelo controlo de admissão
+        nonlocal started
+        async with gemini_admission.slot(tokens=tokens):
+            if admitted is not None:
+                admitted.add(model)
+            started = time.monotonic()
+            yield
+
+    try:
+        response = await send_with_retry(
+            client, "POST", url,
+            policy=gemini_retry,
+            idempotent=True,
+            deadline=timeout,
+            timeout=timeout,
+            attempt_context=admission,
+            params=params,
+            json=payload
+        )
+    except httpx.HTTPError:
+        model_health.record_failure(model)
+        raise
+    except BaseException:
+        # cancelada (cobertura vencida por outro modelo, prazo esgotado): sem resultado
+        model_health.release(model)
+        raise
+
+    # debug
+    logger.debug("Tentativa model=%s status=%s", model, response.status_code)
+
+    if response.status_code != 200:
+        # registrar corpo de erro/razão (ex.: 404 model not found)
+        model_health.record_failure(model, response.status_code, parse_retry_after(response.headers.get("retry-after")))
+        if response.status_code == 404:
+            # lista de modelos em cache desatualizada: atualizar em segundo plano
+            model_catalog.request_refresh(client)
+        raise GeminiModelError(model, f"status={response.status_code} body={response.text}", response.status_code)
+
+    text = _extract_text(response.json())
+    if not text:
+        # se status 200 mas sem candidatos, capturar corpo para debug
+        model_health.record_failure(model)
+        raise GeminiModelError(model, f"No candidates returned. body={response.text}")
+
+    model_health.record_success(model, time.monotonic() - started)
+    return text
+
+
+async def _generate_with_fallback(
+    client: httpx.AsyncClient,
+    models: List[str],
+    payload: Dict[str, Any],
+    deadline: float = GEMINI_REQUEST_DEADLINE,
+) -> Tuple[str, str]:
+    """
+    Tenta os modelos por ordem dentro de um prazo total único
+
+    Modelos com circuito aberto são saltados. Uma falha lança de imediato o
+    modelo seguinte; com GEMINI_HEDGE_ENABLED, se um modelo demorar mais do
+    que o seu percentil de latência, o modelo seguinte é lançado em paralelo
+    e vence a primeira resposta bem-sucedida (as restantes são canceladas).
+
+    Args:
+        client: Cliente HTTP partilhado do Gemini
+        models: Modelos a tentar, por ordem de preferência
+        payload: Corpo do pedido generateContent
+        deadline: Tempo total em segundos para todas as tentativas
+
+    Returns:
+        Tuple[str, str]: (modelo usado, texto gerado)
+
+    Raises:
+        GeminiUnavailableError: Se nenhum modelo responder com sucesso a tempo
+    """
+    pending = list(models)
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + deadline
+    running: Dict[asyncio.Task, str] = {}
+    hedged: set = set()
+    admitted: set = set()
+    last_error: Optional[str] = None
+
+    def launch(hedge: bool = False) -> Optional[str]:
+        # o circuito é consultado só no lançamento: com o circuito semi-aberto,
+        # a consulta reserva a única chamada de teste do modelo
+        model = None
+        while pending:
+            candidate = pending.pop(0)
+            if model_health.is_available(candidate):
+                model = candidate
+                break
+        if model is None:
+            return None
+        timeout = min(GEMINI_MODEL_TIMEOUT, max(expires_at - loop.time(), 0.001))
+        task = asyncio.create_task(_call_model(client, model, payload, timeout, admitted))
+        running[task] = model
+        if hedge:
+            hedged.add(task)
+            model_health.hedges_launched += 1
+        return model
+
+    current = launch()
+    if current is None:
+        raise GeminiUnavailableError(None, all_open=bool(models))
+    try:
+        while running:
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                last_error = f"prazo de {deadline:.0f}s esgotado"
+                # modelos que não responderam a tempo contam como falha (timeout);
+                # tentativas ainda na fila de admissão não são culpa do modelo
+                for model in running.values():
+                    if model in admitted:
+                        model_health.record_failure(model)
+                break
+
+            wait_for = remaining
+            if GEMINI_HEDGE_ENABLED and pending:
+                wait_for = min(remaining, model_health.hedge_delay(current))
+
+            done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if GEMINI_HEDGE_ENABLED and pending:
+                    current = launch(hedge=True) or current
                 continue
 
-            try:
-                url = f"{GEMINI_API_URL}/models/{model}:generateContent"
-                params = {"key": GEMINI_API_KEY}
+            for task in done:
+                model = running.pop(task)
+                try:
+                    text = task.result()
+                except GeminiModelError as e:
+                    last_error = str(e)
+                    logger.warning(last_error)
+                except Exception as e:
+                    last_error = str(e) or type(e).__name__
+                    logger.exception("Erro ao chamar Gemini para model %s: %s", model, e)
+                else:
+                    if task in hedged:
+                        model_health.hedges_won += 1
+                    return model, text
+                if pending:
+                    current = launch() or current
+    finally:
+        for task in running:
+            task.cancel()
+
+    raise GeminiUnavailableError(last_error)
+
+
+@router.post("/generate")
+async def generate_with_gemini(
+    request: GeminiRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client)
+):
+    """
+    Gera explicação usando Gemini API (versão gratuita)
+
+    Usa o cliente HTTP partilhado (pool de conexões com keep-alive). Quem
+    chama esta função diretamente deve passar `client` explicitamente,
+    por exemplo `client=get_gemini_client()`.
+
+    Respostas iguais (mesmo modelo, prompt completo e generation_config) são
+    servidas a partir do cache de respostas; o campo `cached` da resposta
+    indica se houve acerto. Use `use_cache=False` para forçar nova geração.
+    Só as respostas de GEMINI_MODEL são guardadas; as dos modelos de
+    fallback não são servidas a pedidos futuros.
+
+    Os modelos são tentados por ordem dentro de um prazo total
+    (GEMINI_REQUEST_DEADLINE), saltando os que têm o circuito aberto; ver
+    _generate_with_fallback. Responde 503 se todos os circuitos estiverem abertos.
+    """
+    if not GEMINI_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="GEMINI_API_KEY não configurado"
+        )
+
+    full_prompt, payload = _build_payload(request)
+    cache_key = response_cache.make_key(GEMINI_MODEL, full_prompt, request.generation_config)
+    if request.use_cache:
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return {
+                "response": cached["response"],
+                "prompt": request.prompt,
+                "topic_id": request.topic_id,
+                "slide_id": request.slide_id,
+                "model_used": cached["model_used"],
+                "cached": True
+            }
+
+    try:
+        model, text = await _generate_with_fallback(client, await _candidate_models(client), payload)
+    except GeminiUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE if e.all_open else status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+    # A chave é a do modelo principal: respostas de fallback não são guardadas
+    if model == GEMINI_MODEL:
+        await response_cache.set(cache_key, text, model)
+    return {
+        "response": text,
+        "prompt": request.prompt,
+        "topic_id": request.topic_id,
+        "slide_id": request.slide_id,
+        "model_used": model,
+        "cached": False
+    }
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Formata um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _persist_stream_result(request: GeminiStreamRequest, text: Optional[str]) -> bool:
+    """
+    Grava o texto final no AIRequest e/ou na Note indicados no pedido
+
+    Com `text=None` (geração falhou) apenas marca o AIRequest como FAILED.
+
+    Returns:
+        bool: True se todas as escritas foram feitas
+    """
+    try:
+        if request.request_id:
+            if text is None:
+                update = AIRequestUpdate(status=AIStatus.FAILED)
+            else:
+                update = AIRequestUpdate(response=text, status=AIStatus.COMPLETED)
+            await AIRequestService.update_ai_request(request.request_id, update)
+        if request.note_id and text is not None:
+            await NoteService.update_note(request.note_id, NoteUpdate(content=text))
+        return True
+    except Exception:
+        logger.exception("Erro ao gravar resultado do stream do Gemini")
+        return False
+
+
+async def _stream_generation(request: GeminiStreamRequest, client: httpx.AsyncClient) -> AsyncIterator[str]:
+    """
+    Gera a resposta com streamGenerateContent e reencaminha os fragmentos como SSE
+
+    Eventos emitidos:
+        chunk: {"text": fragmento}
+        done: {"response", "model_used", "cached", "persisted", ...}
+        error: {"detail": motivo}
+
+    O fallback entre modelos só é possível antes do primeiro fragmento;
+    se o stream falhar a meio, é emitido um evento error. Como em
+    _generate_with_fallback, as tentativas partilham um prazo total
+    (GEMINI_REQUEST_DEADLINE) até ao início do stream.
+    """
+    full_prompt, payload = _build_payload(request)
+    cache_key = response_cache.make_key(GEMINI_MODEL, full_prompt, request.generation_config)
+
+    def _done(text: str, model: Optional[str], cached: bool, persisted: bool) -> str:
+        return _sse("done", {
+            "response": text,
+            "prompt": request.prompt,
+            "topic_id": request.topic_id,
+            "slide_id": request.slide_id,
+            "request_id": request.request_id,
+            "note_id": request.note_id,
+            "model_used": model,
+            "cached": cached,
+            "persisted": persisted
+        })
 
-                response = await client.post(
-                    url,
+    if request.use_cache:
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            yield _sse("chunk", {"text": cached["response"]})
+            persisted = await _persist_stream_result(request, cached["response"])
+            yield _done(cached["response"], cached["model_used"], True, persisted)
+            return
+
+    last_error = None
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + GEMINI_REQUEST_DEADLINE
+
+    for model in await _candidate_models(client):
+        if expires_at - loop.time() <= 0:
+            last_error = f"prazo total de {GEMINI_REQUEST_DEADLINE:.0f}s esgotado antes do model {model}"
+            break
+        if not model_health.is_available(model):
+            continue
+        texts: List[str] = []
+        started = time.monotonic()
+        try:
+            url = f"{GEMINI_API_URL}/models/{model}:streamGenerateContent"
+            params = {"key": GEMINI_API_KEY, "alt": "sse"}
+
+            async with gemini_admission.slot(tokens=_payload_tokens(payload)):
+                # Calculado após a admissão: a espera pelo slot também conta para o prazo
+                timeout = min(GEMINI_MODEL_TIMEOUT, max(expires_at - loop.time(), 0.001))
+                response = await send_with_retry(
+                    client, "POST", url,
+                    policy=gemini_retry,
+                    idempotent=True,
+                    deadline=timeout,
+                    timeout=timeout,
+                    stream=True,
                     params=params,
-                    json=payload,
-                    timeout=30.0
+                    json=payload
                 )
+                try:
+                    logger.debug("Tentativa (stream) model=%s status=%s", model, response.status_code)
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        last_error = f"model={model} status={response.status_code} body={body}"
+                        logger.warning(last_error)
+                        model_health.record_failure(
+                            model, response.status_code, parse_retry_after(response.headers.get("retry-after"))
+                        )
+                        if response.status_code == 404:
+                            model_catalog.request_refresh(client)
+                        continue
 
-                # debug
-                logger.debug("Tentativa model=%s status=%s", model, response.status_code)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    # estrutura esperada: data["candidates"][0]["content"]["parts"][0]["text"]
-                    candidates = data.get("candidates") or []
-                    if len(candidates) > 0:
-                        # concatena todos os parts de texto (se houver mais de um)
-                        parts = candidates[0].get("content", {}).get("parts", [])
-                        texts = []
-                        for p in parts:
-                            # p pode ter 'text' ou 'inline_data'; lidamos apenas com text aqui
-                            if isinstance(p, dict) and p.get("text"):
-                                texts.append(p.get("text"))
-                        text = "\n".join(texts).strip()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        text = _extract_text(json.loads(line[len("data:"):]), chunk=True)
                         if text:
-                            return {
-                                "response": text,
-                                "prompt": request.prompt,
-                                "topic_id": request.topic_id,
-                                "slide_id": request.slide_id,
-                                "model_used": model
-                            }
-
-                    # se status 200 mas sem candidatos, capturar corpo para debug
-                    last_error = f"No candidates returned. body={response.text}"
-                else:
-                    # registrar corpo de erro/razão (ex.: 404 model not found)
-                    last_error = f"model={model} status={response.status_code} body={response.text}"
-                    logger.warning(last_error)
+                            texts.append(text)
+                            yield _sse("chunk", {"text": text})
+                finally:
+                    await response.aclose()
 
-            except Exception as e:
-                last_error = str(e)
-                logger.exception("Erro ao chamar Gemini para model %s: %s", model, e)
-                continue
+        except Exception as e:
+            last_error = str(e)
+            logger.exception("Erro no stream do Gemini para model %s: %s", model, e)
+            model_health.record_failure(model)
+            if texts:
+                # o cliente já recebeu parte do texto deste modelo: não há fallback possível
+                break
+            continue
+        except BaseException:
+            # cliente desligou-se a meio: a tentativa fica sem resultado
+            model_health.release(model)
+            raise
+
+        full_text = "".join(texts).strip()
+        if full_text:
+            model_health.record_success(model, time.monotonic() - started)
+            if model == GEMINI_MODEL:
+                await response_cache.set(cache_key, full_text, model)
+            persisted = await _persist_stream_result(request, full_text)
+            yield _done(full_text, model, False, persisted)
+            return
+
+        model_health.record_failure(model)
+        last_error = f"model={model}: no candidates returned"
 
-        # Se nenhum modelo funcionou, retornar erro
+    await _persist_stream_result(request, None)
+    yield _sse("error", {
+        "detail": f"Erro ao gerar resposta com todos os modelos tentados. Último erro: {last_error}"
+    })
+
+
+@router.post("/generate/stream")
+async def stream_with_gemini(
+    request: GeminiStreamRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client)
+):
+    """
+    Versão em streaming de /generate (Server-Sent Events)
+
+    Os fragmentos de texto são enviados ao cliente à medida que o Gemini os
+    gera (eventos `chunk`), em vez de esperar pela resposta completa. No fim
+    do stream o texto completo é gravado no AIRequest (`request_id`, status
+    COMPLETED) e/ou na Note (`note_id`) indicados, e é emitido o evento `done`.
+
+    Args:
+        request: Mesmos campos de GeminiRequest, mais `request_id` e `note_id` opcionais
+
+    Returns:
+        StreamingResponse: Stream `text/event-stream`
+
+    Raises:
+        HTTPException: Se a API key não estiver configurada (500) ou se o
+            AIRequest / Note indicado não existir (404)
+    """
+    if not GEMINI_API_KEY:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao gerar resposta com todos os modelos tentados. Último erro: {last_error}"
+            detail="GEMINI_API_KEY não configurado"
+        )
+    if request.request_id and not await AIRequestService.get_ai_request(request.request_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="AI request não encontrado"
+        )
+    if request.note_id and not await NoteService.get_note(request.note_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note não encontrada"
         )
 
+    return StreamingResponse(
+        _stream_generation(request, client),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/summarize")
 async def summarize_with_gemini(
     content: str,
-    topic_id: Optional[str] = None
+    topic_id: Optional[str] = None,
+    client: httpx.AsyncClient = Depends(get_gemini_client)
 ):
     """Gera um resumo usando Gemini API"""
+    return await generate_with_gemini(_summary_request(content, topic_id), client)
+
+
+def _summary_request(content: str, topic_id: Optional[str] = None) -> GeminiRequest:
+    """Constrói o pedido de resumo de um conteúdo"""
     prompt = f"Por favor, crie um resumo conciso e bem estruturado do seguinte conteúdo:\n\n{content}"
-    req = GeminiRequest(prompt=prompt, topic_id=topic_id)
-    return await generate_with_gemini(req)
+    return GeminiRequest(prompt=prompt, topic_id=topic_id)
+
+
+class SummarizeBatchItem(BaseModel):
+    id: str
+    content: str
+    topic_id: Optional[str] = None
+
+
+class SummarizeBatchRequest(BaseModel):
+    items: List[SummarizeBatchItem] = Field(..., min_length=1, max_length=GEMINI_BATCH_MAX_ITEMS)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+
+
+async def _summarize_item(item: SummarizeBatchItem, client: httpx.AsyncClient, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """Resume um item do lote e devolve a linha de resultado (nunca lança HTTPException)"""
+    async with semaphore:
+        try:
+            result = await generate_with_gemini(_summary_request(item.content, item.topic_id), client)
+        except HTTPException as e:
+            return {"id": item.id, "status": "error", "detail": e.detail}
+        except Exception as e:
+            logger.exception("Erro ao resumir item %s do lote", item.id)
+            return {"id": item.id, "status": "error", "detail": str(e)}
+    return {
+        "id": item.id,
+        "status": "ok",
+        "response": result["response"],
+        "model_used": result["model_used"],
+        "cached": result["cached"]
+    }
+
+
+async def _summarize_batch(request: SummarizeBatchRequest, client: httpx.AsyncClient) -> AsyncIterator[str]:
+    limit = min(request.max_concurrency or GEMINI_BATCH_CONCURRENCY, GEMINI_BATCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(limit)
+    # Lote é trabalho em massa: prioridade baixa no controlo de admissão
+    with use_priority(Priority.BACKGROUND):
+        tasks = [asyncio.create_task(_summarize_item(item, client, semaphore)) for item in request.items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+    finally:
+        # cliente desligou-se a meio: não gastar quota com o resto do lote
+        for task in tasks:
+            task.cancel()
+
+
+@router.post("/summarize/batch")
+async def summarize_batch_with_gemini(
+    request: SummarizeBatchRequest,
+    client: httpx.AsyncClient = Depends(get_gemini_client)
+):
+    """
+    Resume vários conteúdos num só pedido, em paralelo com limite de concorrência
+
+    Os resultados são enviados como NDJSON (uma linha JSON por item) pela
+    ordem em que ficam prontos, não pela ordem do pedido; use `id` para os
+    associar. Um item que falha gera uma linha com status "error" sem
+    interromper os restantes.
+
+    Args:
+        request: Lista de itens {id, content, topic_id} (máx. GEMINI_BATCH_MAX_ITEMS)
+            e `max_concurrency` opcional (limitado por GEMINI_BATCH_CONCURRENCY)
+
+    Returns:
+        StreamingResponse: Stream `application/x-ndjson` com linhas
+            {"id", "status": "ok", "response", "model_used", "cached"} ou
+            {"id", "status": "error", "detail"}
+
+    Raises:
+        HTTPException: Se a API key não estiver configurada (500)
+    """
+    if not GEMINI_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="GEMINI_API_KEY não configurado"
+        )
+
+    return StreamingResponse(
+        _summarize_batch(request, client),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
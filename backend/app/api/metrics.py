@@ -0,0 +1,109 @@
+"""
+Rotas de métricas internas (caches, pools, filas, tokens)
+"""
+from fastapi import APIRouter
+from app.services.cache_service import DocumentCache
+from app.services.http_client_service import http_clients
+from app.services.gemini_service import model_catalog, model_health, gemini_admission
+from app.services.gemini_cache_service import response_cache
+from app.services.retry_policy import RETRY_POLICIES
+from app.services.google_oauth_service import google_jwks
+from app.services.token_manager import token_manager
+from app.services.youtube_cache_service import search_cache
+from app.services.youtube_quota_service import youtube_quota
+from app.worker import worker_pool
+
+router = APIRouter()
+
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """
+    Retorna os contadores dos caches de documentos
+
+    Útil para dimensionar DOCUMENT_CACHE_MAXSIZE e DOCUMENT_CACHE_TTL
+    a partir da taxa de acerto (hit_ratio) e do número de despejos.
+
+    Returns:
+        dict: {"caches": [ {namespace, size, hits, misses, hit_ratio, ...}, ... ]}
+    """
+    return {"caches": DocumentCache.all_stats()}
+
+
+@router.get("/http")
+async def get_http_pool_metrics():
+    """
+    Retorna a utilização dos pools de conexões HTTP partilhados
+
+    Returns:
+        dict: {"clients": {nome: {max_connections, requests_sent,
+            requests_failed, requests_in_flight, peak_in_flight, ...}}}
+    """
+    return {"clients": http_clients.stats()}
+
+
+@router.get("/gemini")
+async def get_gemini_metrics():
+    """
+    Retorna o estado do Gemini: caches (modelos e respostas) e saúde dos modelos
+
+    Returns:
+        dict: {"models": {models, age_seconds, ttl, stale, refreshes},
+            "responses": {memory_hits, persistent_hits, misses, hit_ratio, ...},
+            "health": {hedges_launched, hedges_won, models: {modelo: {state, latency_p95, ...}}},
+            "admission": {in_flight, queue_depth, priorities: {interactive, background}}}
+    """
+    return {
+        "models": model_catalog.stats(),
+        "responses": response_cache.stats(),
+        "health": model_health.stats(),
+        "admission": gemini_admission.stats(),
+    }
+
+
+@router.get("/youtube")
+async def get_youtube_metrics():
+    """
+    Retorna o cache de pesquisas do YouTube e o consumo de quota do dia
+
+    Returns:
+        dict: {"search_cache": {memory_hits, persistent_hits, stale_served, misses, ...},
+            "quota": {day, used, daily_quota, remaining, soft_limit, denied}}
+    """
+    return {"search_cache": search_cache.stats(), "quota": youtube_quota.stats()}
+
+
+@router.get("/tokens")
+async def get_token_metrics():
+    """
+    Retorna os contadores do cache de tokens OAuth e das chaves JWKS do Google
+
+    Returns:
+        dict: {"access_tokens": {entries, in_flight, hits, loads, shared, refreshes,
+            background_refreshes, refresh_failures, ...},
+            "jwks": {keys, ttl_remaining, hits, fetches, unknown_kids}}
+    """
+    return {"access_tokens": token_manager.stats(), "jwks": google_jwks.stats()}
+
+
+@router.get("/retries")
+async def get_retry_metrics():
+    """
+    Retorna os contadores da política de retry por serviço externo
+
+    Returns:
+        dict: {"policies": {nome: {calls, retries, gave_up, max_attempts}}}
+    """
+    return {"policies": {name: policy.stats() for name, policy in RETRY_POLICIES.items()}}
+
+
+@router.get("/jobs")
+async def get_job_metrics():
+    """
+    Retorna o estado do pool de workers e da fila de jobs em segundo plano
+
+    Returns:
+        dict: {workers, busy, max_attempts, queue: {ready, delayed, in_flight,
+            enqueued, completed, retried, dead_lettered}}
+    """
+    return await worker_pool.stats()
@@ -1,10 +1,11 @@
 """
 Rotas para gerenciamento de Notes
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.models.note import Note, NoteCreate, NoteUpdate
+from app.models.page import Page
 from app.services.note_service import NoteService
-from typing import List
+from app.api.dependencies import PageParams, pagination_params
 
 router = APIRouter()
 
@@ -13,7 +14,7 @@ router = APIRouter()
 async def create_note(note: NoteCreate):
     """Cria uma nova note"""
     try:
-        return NoteService.create_note(note)
+        return await NoteService.create_note(note)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -24,7 +25,7 @@ async def create_note(note: NoteCreate):
 @router.get("/{note_id}", response_model=Note)
 async def get_note(note_id: str):
     """Busca uma note por ID"""
-    note = NoteService.get_note(note_id)
+    note = await NoteService.get_note(note_id)
     if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -36,7 +37,7 @@ async def get_note(note_id: str):
 @router.put("/{note_id}", response_model=Note)
 async def update_note(note_id: str, note: NoteUpdate):
     """Atualiza uma note"""
-    updated_note = NoteService.update_note(note_id, note)
+    updated_note = await NoteService.update_note(note_id, note)
     if not updated_note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,18 +49,23 @@ async def update_note(note_id: str, note: NoteUpdate):
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_note(note_id: str):
     """Deleta uma note"""
-    note = NoteService.get_note(note_id)
+    note = await NoteService.get_note(note_id)
     if not note:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note não encontrada"
         )
-    NoteService.delete_note(note_id)
+    await NoteService.delete_note(note_id)
     return None
 
 
-@router.get("/topic/{topic_id}", response_model=List[Note])
-async def list_notes_by_topic(topic_id: str):
-    """Lista todas as notes de um topic"""
-    return NoteService.list_notes_by_topic(topic_id)
+@router.get("/topic/{topic_id}", response_model=Page[Note])
+async def list_notes_by_topic(topic_id: str, page: PageParams = Depends(pagination_params)):
+    """Lista as notes de um topic (paginado por `limit` e `cursor`)"""
+    return await NoteService.list_notes_by_topic(topic_id, page.limit, page.cursor)
 
+
+@router.get("/topic/{topic_id}/count")
+async def count_notes_by_topic(topic_id: str):
+    """Conta as notes de um topic sem listar os documentos"""
+    return {"topicId": topic_id, "count": await NoteService.count_notes_by_topic(topic_id)}
@@ -1,12 +1,15 @@
 import os
 from datetime import datetime, timezone
-from fastapi import APIRouter
+import httpx
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 from google_auth_oauthlib.flow import Flow
-from google.oauth2 import id_token
-from google.auth.transport.requests import Request as GoogleRequest
 
-from app.services.firebase_service import db
+from app.api.dependencies import get_oauth_client
+from app.services.firebase_service import async_db
+from app.services.google_oauth_service import GoogleOAuthError, GoogleOAuthService
+from app.services.token_manager import token_manager
+from app.services.user_service import UserService
 
 router = APIRouter()
 
@@ -50,38 +53,35 @@ async def login():
     return {"url": auth_url}
 
 @router.get("/callback")
-async def callback(code: str):
-    flow = create_flow()
-    flow.fetch_token(code=code)
-
-
-    credentials = flow.credentials
-
-    userinfo = id_token.verify_oauth2_token(
-        credentials.id_token, GoogleRequest(), GOOGLE_CLIENT_ID
-    )
+async def callback(code: str, client: httpx.AsyncClient = Depends(get_oauth_client)):
+    #Troca do código pelo cliente HTTP partilhado e validação local do ID token (JWKS em cache)
+    try:
+        tokens = await GoogleOAuthService.exchange_code(client, code, REDIRECT_URI)
+        userinfo = await GoogleOAuthService.verify_id_token(client, tokens["id_token"] or "", GOOGLE_CLIENT_ID)
+    except GoogleOAuthError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
     user_id = userinfo.get("sub")
 
-    users_collection = db.collection("users")
+    users_collection = async_db.collection("users")
     user_ref = users_collection.document(user_id)
-    user_doc = user_ref.get()
+    user_doc = await user_ref.get()
 
     user_data = {
         "name": userinfo.get("name"),
         "email": userinfo.get("email"),
-        "googleCalendarConnected": True if credentials.refresh_token else False,
+        "googleCalendarConnected": True if tokens["refresh_token"] else False,
         "updatedAt": datetime.now(timezone.utc),
         "googleTokens": {
-            "access_token": credentials.token,
-            "refresh_token": credentials.refresh_token,
-            "expiry": credentials.expiry.isoformat() if credentials.expiry else None,
+            "access_token": tokens["access_token"],
+            "refresh_token": tokens["refresh_token"],
+            "expiry": tokens["expiry"],
         },
     }
 
     if not user_doc.exists:
         user_data["createdAt"] = datetime.now(timezone.utc)
-        user_ref.set(user_data)
+        await user_ref.set(user_data)
     else:
         existing = user_doc.to_dict()
         existing_created_at = existing.get("createdAt")
@@ -90,7 +90,9 @@ async def callback(code: str):
             user_data["createdAt"] = existing_created_at
         else:
             user_data["createdAt"] = datetime.now(timezone.utc)
-        user_ref.set(user_data, merge=True)
+        await user_ref.set(user_data, merge=True)
+    UserService.CACHE.invalidate(user_id)
+    token_manager.invalidate(user_id)
 
     # Converter datetimes para strings ISO antes de retornar
     response_user_data = {
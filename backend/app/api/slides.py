@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.models.slide import Slide, SlideCreate, SlideUpdate
+from app.models.page import Page
 from app.services.slide_service import SlideService
-from typing import List
+from app.api.dependencies import PageParams, pagination_params
 
 router = APIRouter()
 
@@ -10,7 +11,7 @@ router = APIRouter()
 async def create_slide(slide: SlideCreate):
     """Cria um novo slide"""
     try:
-        return SlideService.create_slide(slide)
+        return await SlideService.create_slide(slide)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -21,7 +22,7 @@ async def create_slide(slide: SlideCreate):
 @router.get("/{slide_id}", response_model=Slide)
 async def get_slide(slide_id: str):
     """Busca um slide por ID"""
-    slide = SlideService.get_slide(slide_id)
+    slide = await SlideService.get_slide(slide_id)
     if not slide:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -33,7 +34,7 @@ async def get_slide(slide_id: str):
 @router.put("/{slide_id}", response_model=Slide)
 async def update_slide(slide_id: str, slide: SlideUpdate):
     """Atualiza um slide"""
-    updated_slide = SlideService.update_slide(slide_id, slide)
+    updated_slide = await SlideService.update_slide(slide_id, slide)
     if not updated_slide:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -45,18 +46,23 @@ async def update_slide(slide_id: str, slide: SlideUpdate):
 @router.delete("/{slide_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_slide(slide_id: str):
     """Deleta um slide"""
-    slide = SlideService.get_slide(slide_id)
+    slide = await SlideService.get_slide(slide_id)
     if not slide:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Slide não encontrado"
         )
-    SlideService.delete_slide(slide_id)
+    await SlideService.delete_slide(slide_id)
     return None
 
 
-@router.get("/topic/{topic_id}", response_model=List[Slide])
-async def list_slides_by_topic(topic_id: str):
-    """Lista todos os slides de um topic"""
-    return SlideService.list_slides_by_topic(topic_id)
+@router.get("/topic/{topic_id}", response_model=Page[Slide])
+async def list_slides_by_topic(topic_id: str, page: PageParams = Depends(pagination_params)):
+    """Lista os slides de um topic (paginado por `limit` e `cursor`)"""
+    return await SlideService.list_slides_by_topic(topic_id, page.limit, page.cursor)
 
+
+@router.get("/topic/{topic_id}/count")
+async def count_slides_by_topic(topic_id: str):
+    """Conta os slides de um topic sem listar os documentos"""
+    return {"topicId": topic_id, "count": await SlideService.count_slides_by_topic(topic_id)}
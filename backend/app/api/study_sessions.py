@@ -1,10 +1,11 @@
 """
 Rotas para gerenciamento de StudySessions
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.models.study_session import StudySession, StudySessionCreate, StudySessionUpdate
+from app.models.page import Page
 from app.services.study_session_service import StudySessionService
-from typing import List
+from app.api.dependencies import PageParams, pagination_params
 
 router = APIRouter()
 
@@ -24,7 +25,7 @@ async def create_study_session(session: StudySessionCreate):
         HTTPException: Se falhar ao criar a sessão (500)
     """
     try:
-        return StudySessionService.create_study_session(session)
+        return await StudySessionService.create_study_session(session)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -46,7 +47,7 @@ async def get_study_session(session_id: str):
     Raises:
         HTTPException: Se a sessão não for encontrada (404)
     """
-    session = StudySessionService.get_study_session(session_id)
+    session = await StudySessionService.get_study_session(session_id)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,7 +71,7 @@ async def update_study_session(session_id: str, session: StudySessionUpdate):
     Raises:
         HTTPException: Se a sessão não for encontrada (404)
     """
-    updated_session = StudySessionService.update_study_session(session_id, session)
+    updated_session = await StudySessionService.update_study_session(session_id, session)
     if not updated_session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -93,40 +94,69 @@ async def delete_study_session(session_id: str):
     Raises:
         HTTPException: Se a sessão não for encontrada (404)
     """
-    session = StudySessionService.get_study_session(session_id)
+    session = await StudySessionService.get_study_session(session_id)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Study session não encontrada"
         )
-    StudySessionService.delete_study_session(session_id)
+    await StudySessionService.delete_study_session(session_id)
     return None
 
 
-@router.get("/user/{user_id}", response_model=List[StudySession])
-async def list_study_sessions_by_user(user_id: str):
+@router.get("/user/{user_id}", response_model=Page[StudySession])
+async def list_study_sessions_by_user(user_id: str, page: PageParams = Depends(pagination_params)):
     """
-    Lista todas as sessões de estudo de um usuário
+    Lista as sessões de estudo de um usuário (paginado)
     
     Args:
         user_id: ID único do usuário
+        page: Parâmetros de paginação (`limit` e `cursor` na query string)
     
     Returns:
-        List[StudySession]: Lista de todas as sessões do usuário
+        Page[StudySession]: Página de sessões do usuário e `next_cursor`
     """
-    return StudySessionService.list_study_sessions_by_user(user_id)
+    return await StudySessionService.list_study_sessions_by_user(user_id, page.limit, page.cursor)
 
 
-@router.get("/topic/{topic_id}", response_model=List[StudySession])
-async def list_study_sessions_by_topic(topic_id: str):
+@router.get("/topic/{topic_id}", response_model=Page[StudySession])
+async def list_study_sessions_by_topic(topic_id: str, page: PageParams = Depends(pagination_params)):
     """
-    Lista todas as sessões de estudo relacionadas a um topic
+    Lista as sessões de estudo relacionadas a um topic (paginado)
     
     Args:
         topic_id: ID único do topic
+        page: Parâmetros de paginação (`limit` e `cursor` na query string)
     
     Returns:
-        List[StudySession]: Lista de todas as sessões do topic
+        Page[StudySession]: Página de sessões do topic e `next_cursor`
     """
-    return StudySessionService.list_study_sessions_by_topic(topic_id)
+    return await StudySessionService.list_study_sessions_by_topic(topic_id, page.limit, page.cursor)
 
+
+@router.get("/user/{user_id}/count")
+async def count_study_sessions_by_user(user_id: str):
+    """
+    Conta as sessões de estudo de um usuário (aggregation query, sem listar)
+    
+    Args:
+        user_id: ID único do usuário
+    
+    Returns:
+        dict: {"userId": ..., "count": <total>}
+    """
+    return {"userId": user_id, "count": await StudySessionService.count_study_sessions_by_user(user_id)}
+
+
+@router.get("/topic/{topic_id}/count")
+async def count_study_sessions_by_topic(topic_id: str):
+    """
+    Conta as sessões de estudo relacionadas a um topic (aggregation query, sem listar)
+    
+    Args:
+        topic_id: ID único do topic
+    
+    Returns:
+        dict: {"topicId": ..., "count": <total>}
+    """
+    return {"topicId": topic_id, "count": await StudySessionService.count_study_sessions_by_topic(topic_id)}
@@ -1,10 +1,18 @@
 """
 Rotas para gerenciamento de Subjects
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models.cascade_delete import CascadeDeleteCounts, CascadeDeleteJob
 from app.models.subject import Subject, SubjectCreate, SubjectUpdate
+from app.models.page import Page
 from app.services.subject_service import SubjectService
-from typing import List
+from app.services.cascade_delete_service import CascadeDeleteService
+from app.services.subject_tree_service import TREE_MAX_DEPTH, InvalidTreeQueryError, SubjectTreeService
+from app.api.delete_jobs import accepted_response
+from app.api.dependencies import PageParams, pagination_params
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -13,7 +21,7 @@ router = APIRouter()
 async def create_subject(subject: SubjectCreate):
     """Cria um novo subject"""
     try:
-        return SubjectService.create_subject(subject)
+        return await SubjectService.create_subject(subject)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -24,7 +32,7 @@ async def create_subject(subject: SubjectCreate):
 @router.get("/{subject_id}", response_model=Subject)
 async def get_subject(subject_id: str):
     """Busca um subject por ID"""
-    subject = SubjectService.get_subject(subject_id)
+    subject = await SubjectService.get_subject(subject_id)
     if not subject:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -33,10 +41,42 @@ async def get_subject(subject_id: str):
     return subject
 
 
+@router.get("/{subject_id}/tree")
+async def get_subject_tree(
+    subject_id: str,
+    depth: int = Query(TREE_MAX_DEPTH, ge=0, le=TREE_MAX_DEPTH, description="0: subject, 1: + topics, 2: + conteúdos"),
+    include: Optional[List[str]] = Query(None, description="notes, slides e/ou youtubeSuggestions (padrão: todos)"),
+    fields: Optional[List[str]] = Query(None, description="Campos por nível, ex: topics.title, notes.source"),
+):
+    """
+    Busca um subject com os seus topics e, de cada topic, as notes, slides
+    e sugestões do YouTube, num único documento aninhado
+
+    Substitui a listagem por topic (1 + 3N pedidos): os conteúdos de todos
+    os topics são lidos com filtros "in" em paralelo (ver SubjectTreeService).
+
+    Example:
+        GET /api/subjects/{id}/tree?include=notes&fields=topics.title&fields=notes.source
+    """
+    try:
+        tree = await SubjectTreeService.get_tree(subject_id, depth, include, fields)
+    except InvalidTreeQueryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if tree is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Subject não encontrado"
+        )
+    return tree
+
+
 @router.put("/{subject_id}", response_model=Subject)
 async def update_subject(subject_id: str, subject: SubjectUpdate):
     """Atualiza um subject"""
-    updated_subject = SubjectService.update_subject(subject_id, subject)
+    updated_subject = await SubjectService.update_subject(subject_id, subject)
     if not updated_subject:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -45,21 +85,44 @@ async def update_subject(subject_id: str, subject: SubjectUpdate):
     return updated_subject
 
 
-@router.delete("/{subject_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_subject(subject_id: str):
-    """Deleta um subject"""
-    subject = SubjectService.get_subject(subject_id)
+@router.delete(
+    "/{subject_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_200_OK: {"model": CascadeDeleteCounts},
+        status.HTTP_202_ACCEPTED: {"model": CascadeDeleteJob},
+    },
+)
+async def delete_subject(subject_id: str, dry_run: bool = False):
+    """
+    Deleta um subject e, em cascata, os seus topics e tudo o que deles depende
+
+    Com `dry_run` nada é apagado e são devolvidas as contagens por coleção.
+    Eliminações com mais de CASCADE_DELETE_SYNC_LIMIT documentos correm em
+    segundo plano: a resposta é 202 com o job, cujo progresso se consulta
+    em GET /api/delete-jobs/{job_id}.
+
+    Returns:
+        204 sem corpo (apagado), 200 CascadeDeleteCounts (dry_run) ou
+        202 CascadeDeleteJob (em segundo plano)
+    """
+    subject = await SubjectService.get_subject(subject_id)
     if not subject:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Subject não encontrado"
         )
-    SubjectService.delete_subject(subject_id)
-    return None
+    if dry_run:
+        counts = await CascadeDeleteService.count(subject_id=subject_id)
+        return JSONResponse(jsonable_encoder(counts))
+    job = await CascadeDeleteService.delete_or_submit(subject_id=subject_id)
+    if job is not None:
+        return accepted_response(job)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.get("/user/{user_id}", response_model=List[Subject])
-async def list_subjects_by_user(user_id: str):
-    """Lista todos os subjects de um usuário"""
-    return SubjectService.list_subjects_by_user(user_id)
+@router.get("/user/{user_id}", response_model=Page[Subject])
+async def list_subjects_by_user(user_id: str, page: PageParams = Depends(pagination_params)):
+    """Lista os subjects de um usuário (paginado por `limit` e `cursor`)"""
+    return await SubjectService.list_subjects_by_user(user_id, page.limit, page.cursor)
 
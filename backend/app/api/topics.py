@@ -1,13 +1,23 @@
 """
 Rotas para gerenciamento de Topics
 """
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models.cascade_delete import CascadeDeleteCounts, CascadeDeleteJob
 from app.models.topic import Topic, TopicCreate, TopicUpdate
-from app.models.note import NoteCreate, NoteSource, NoteUpdate
+from app.models.page import Page
+from app.models.note import NoteCreate, NoteSource
+from app.models.ai_request import AIRequestCreate
 from app.services.topic_service import TopicService
+from app.services.cascade_delete_service import CascadeDeleteService
+from app.services.subject_service import SubjectService
 from app.services.note_service import NoteService
-from app.api.gemini import generate_with_gemini, GeminiRequest
-from typing import List, Optional
+from app.services.ai_job_service import AIJobService
+from app.services.text_chunker import iter_text_chunks
+from app.api.delete_jobs import accepted_response
+from app.api.dependencies import PageParams, pagination_params
+from typing import Optional
 import logging
 
 router = APIRouter()
@@ -20,10 +30,20 @@ async def create_topic(
     description: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None)
 ):
-    """Cria um novo topic com opção de upload de arquivo .txt e gera conteúdo com IA"""
+    """
+    Cria um novo topic com opção de upload de arquivo .txt e gera conteúdo com IA
+
+    A geração não bloqueia a resposta: é criada uma note vazia e um AIRequest
+    (PENDING) cujo processamento é enfileirado; um worker preenche a note
+    quando o Gemini responder (ver AIJobService).
+
+    O arquivo é lido por partes com orçamento de tokens (ver text_chunker);
+    ficheiros com várias partes são resumidos em map-reduce pelo worker.
+    """
     try:
-        # Se um arquivo foi enviado, ler seu conteúdo
-        file_content = None
+        # Se um arquivo foi enviado, lê-lo por partes (sem carregar o ficheiro inteiro)
+        chunks = None
+        first_chunk = None
         if file:
             # Validar extensão do arquivo
             if not file.filename.endswith('.txt'):
@@ -32,14 +52,14 @@ async def create_topic(
                     detail="Apenas arquivos .txt são permitidos"
                 )
             
-            # Ler conteúdo do arquivo
+            # Ler a primeira parte do arquivo (valida a codificação logo no início)
             try:
-                file_content = await file.read()
-                file_content = file_content.decode('utf-8')
+                chunks = iter_text_chunks(file)
+                first_chunk = await anext(chunks, None)
                 
                 # Se não houver descrição, usar conteúdo do arquivo como descrição
-                if not description and file_content:
-                    description = file_content[:500]  # Limitar a 500 caracteres
+                if not description and first_chunk:
+                    description = first_chunk[:500]  # Limitar a 500 caracteres
             except UnicodeDecodeError:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -59,10 +79,10 @@ async def create_topic(
         )
         
         # Criar o topic
-        new_topic = TopicService.create_topic(topic_data)
+        new_topic = await TopicService.create_topic(topic_data)
         
         # Se houver arquivo, gerar conteúdo com IA baseado nas notas
-        if file_content:
+        if first_chunk:
             try:
                 # Criar uma note vazia para o topic
                 note_data = NoteCreate(
@@ -70,32 +90,29 @@ async def create_topic(
                     source=NoteSource.AI_GENERATED,
                     topicId=new_topic.topicId
                 )
-                new_note = NoteService.create_note(note_data)
+                new_note = await NoteService.create_note(note_data)
                 
-                # Gerar conteúdo com Gemini usando o arquivo como contexto
+                # Enfileirar a geração com Gemini usando o arquivo como contexto
                 prompt = f"Com base nas seguintes notas, crie uma explicação completa, clara e didática sobre: {title}"
-                
-                gemini_request = GeminiRequest(
-                    prompt=prompt,
-                    topic_id=new_topic.topicId,
-                    context=file_content
+                subject = await SubjectService.get_subject(subjectId)
+                if subject is None:
+                    raise ValueError(f"Subject {subjectId} não encontrado")
+
+                await AIJobService.submit_document(
+                    AIRequestCreate(
+                        prompt=prompt,
+                        topicId=new_topic.topicId,
+                        userId=subject.userId,
+                        noteId=new_note.noteId
+                    ),
+                    first_chunk,
+                    chunks
                 )
-                
-                # Chamar a API do Gemini
-                gemini_response = await generate_with_gemini(gemini_request)
-                generated_content = gemini_response.get("response", "")
-                
-                # Atualizar a note com o conteúdo gerado
-                if generated_content:
-                    NoteService.update_note(
-                        new_note.noteId,
-                        NoteUpdate(content=generated_content)
-                    )
             except Exception as e:
                 # Não falhar a criação do topic se a geração de conteúdo falhar
                 # Apenas logar o erro
                 logger = logging.getLogger(__name__)
-                logger.error(f"Erro ao gerar conteúdo com IA para topic {new_topic.topicId}: {str(e)}")
+                logger.error(f"Erro ao enfileirar geração de conteúdo com IA para topic {new_topic.topicId}: {str(e)}")
         
         return new_topic
     except HTTPException:
@@ -110,7 +127,7 @@ async def create_topic(
 @router.get("/{topic_id}", response_model=Topic)
 async def get_topic(topic_id: str):
     """Busca um topic por ID"""
-    topic = TopicService.get_topic(topic_id)
+    topic = await TopicService.get_topic(topic_id)
     if not topic:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,7 +139,7 @@ async def get_topic(topic_id: str):
 @router.put("/{topic_id}", response_model=Topic)
 async def update_topic(topic_id: str, topic: TopicUpdate):
     """Atualiza um topic"""
-    updated_topic = TopicService.update_topic(topic_id, topic)
+    updated_topic = await TopicService.update_topic(topic_id, topic)
     if not updated_topic:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -131,21 +148,44 @@ async def update_topic(topic_id: str, topic: TopicUpdate):
     return updated_topic
 
 
-@router.delete("/{topic_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_topic(topic_id: str):
-    """Deleta um topic"""
-    topic = TopicService.get_topic(topic_id)
+@router.delete(
+    "/{topic_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        status.HTTP_200_OK: {"model": CascadeDeleteCounts},
+        status.HTTP_202_ACCEPTED: {"model": CascadeDeleteJob},
+    },
+)
+async def delete_topic(topic_id: str, dry_run: bool = False):
+    """
+    Deleta um topic e, em cascata, as suas notes, slides, study sessions,
+    AI requests e sugestões do YouTube
+
+    Com `dry_run` nada é apagado e são devolvidas as contagens por coleção.
+    Eliminações grandes correm em segundo plano (202 com o job; progresso
+    em GET /api/delete-jobs/{job_id}).
+
+    Returns:
+        204 sem corpo (apagado), 200 CascadeDeleteCounts (dry_run) ou
+        202 CascadeDeleteJob (em segundo plano)
+    """
+    topic = await TopicService.get_topic(topic_id)
     if not topic:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Topic não encontrado"
         )
-    TopicService.delete_topic(topic_id)
-    return None
+    if dry_run:
+        counts = await CascadeDeleteService.count(topic_ids=[topic_id])
+        return JSONResponse(jsonable_encoder(counts))
+    job = await CascadeDeleteService.delete_or_submit(topic_ids=[topic_id])
+    if job is not None:
+        return accepted_response(job)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.get("/subject/{subject_id}", response_model=List[Topic])
-async def list_topics_by_subject(subject_id: str):
-    """Lista todos os topics de um subject"""
-    return TopicService.list_topics_by_subject(subject_id)
+@router.get("/subject/{subject_id}", response_model=Page[Topic])
+async def list_topics_by_subject(subject_id: str, page: PageParams = Depends(pagination_params)):
+    """Lista os topics de um subject (paginado por `limit` e `cursor`)"""
+    return await TopicService.list_topics_by_subject(subject_id, page.limit, page.cursor)
 
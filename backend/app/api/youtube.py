@@ -1,8 +1,12 @@
 import os
 import logging
-from fastapi import APIRouter, HTTPException, status
-from googleapiclient.discovery import build  
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, status
 from dotenv import load_dotenv
+from app.api.dependencies import get_youtube_http_client
+from app.services.retry_policy import send_with_retry, youtube_retry
+from app.services.youtube_cache_service import search_cache
+from app.services.youtube_quota_service import SEARCH_COST, youtube_quota
 
 load_dotenv()
 
@@ -10,52 +14,112 @@ router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
-YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY") 
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
 
 
-def get_youtube_client():
+def _serve_stale(cached: dict) -> dict:
+    search_cache.record_stale_served()
+    return {"results": cached["results"], "cached": True, "stale": True}
+
+
+async def search_videos(client: httpx.AsyncClient, query: str, max_results: int = 5) -> dict:
+    """
+    Pesquisa vídeos pela REST API do YouTube, com cache e controlo de quota
+
+    Resultados frescos em cache não gastam quota. Com a quota acima do
+    limite suave, ou se a API falhar, é devolvido o resultado expirado
+    (stale) quando existe; sem quota e sem cache a pesquisa é recusada.
+
+    Args:
+        client: Cliente HTTP partilhado ("youtube")
+        query: Texto a pesquisar
+        max_results: Número máximo de vídeos
+
+    Returns:
+        dict: {"results": [{"title", "url"}, ...], "cached": bool, "stale": bool}
+
+    Raises:
+        HTTPException: Se a chave não estiver configurada (500), a quota
+            diária estiver esgotada (429) ou a API falhar (500)
+    """
     if not YOUTUBE_API_KEY:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="YOUTUBE_API_KEY não configurado"
         )
-    try:
-        return build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
-    except Exception as e:
-        logger.exception("Erro ao criar cliente do YouTube: %s", e)
+
+    cached = await search_cache.get(query, max_results)
+    if cached is not None:
+        if not cached["stale"]:
+            return {"results": cached["results"], "cached": True, "stale": False}
+        if await youtube_quota.over_soft_limit():
+            return _serve_stale(cached)
+
+    if not await youtube_quota.can_spend(SEARCH_COST):
+        if cached is not None:
+            return _serve_stale(cached)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao inicializar cliente do YouTube: {str(e)}"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Quota diária da YouTube API esgotada. Tente novamente amanhã."
         )
 
-
-@router.get("/search")
-def youtube_search(query: str, max_results: int = 5):
-   #Pesquisa vídeos, retornando apenas título e link
+    # Pesquisa é só de leitura: 429/5xx/erros de rede são repetidos com backoff
     try:
-        youtube = get_youtube_client()
+        response = await send_with_retry(
+            client, "GET", f"{YOUTUBE_API_URL}/search",
+            policy=youtube_retry,
+            params={
+                "key": YOUTUBE_API_KEY,
+                "part": "snippet",
+                "q": query,
+                "type": "video",
+                "maxResults": max_results,
+            },
+        )
+    except httpx.HTTPError:
+        if cached is not None:
+            return _serve_stale(cached)
+        raise
 
-        response = youtube.search().list(
-            part="snippet",
-            q=query,
-            type="video",
-            maxResults=max_results,
-        ).execute()
+    if response.status_code < 500 and response.status_code != 429:
+        # Pedido processado pela API: conta para a quota
+        await youtube_quota.charge(SEARCH_COST)
+    if response.status_code == 403 and "quotaExceeded" in response.text:
+        youtube_quota.mark_exhausted()
+    if response.status_code != 200:
+        if cached is not None:
+            return _serve_stale(cached)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao chamar YouTube API: status={response.status_code} body={response.text[:300]}"
+        )
 
-        items = response.get("items", [])
-        results = []
+    results = []
+    for item in response.json().get("items", []):
+        video_id = item["id"]["videoId"]
+        title = item["snippet"]["title"]
 
-        for item in items:
-            video_id = item["id"]["videoId"]
-            title = item["snippet"]["title"]
+        results.append({
+            "title": title,
+            "url": f"https://www.youtube.com/watch?v={video_id}"
+        })
+    await search_cache.set(query, max_results, results)
+    return {"results": results, "cached": False, "stale": False}
 
-            results.append({
-                "title": title,
-                "url": f"https://www.youtube.com/watch?v={video_id}"
-            })
 
-        return {"query": query, "results": results}
+@router.get("/search")
+async def youtube_search(
+    query: str,
+    max_results: int = 5,
+    client: httpx.AsyncClient = Depends(get_youtube_http_client)
+):
+   #Pesquisa vídeos, retornando apenas título e link
+    try:
+        return {"query": query, **await search_videos(client, query, max_results)}
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Erro ao pesquisar no YouTube: %s", e)
         raise HTTPException(
@@ -1,29 +1,58 @@
 """
 Rotas para gerenciamento de YouTubeSuggestions
+
+Configuração (variáveis de ambiente):
+    YOUTUBE_BULK_MAX_TOPICS: Topics por pedido de /bulk (padrão: 50)
+    YOUTUBE_BULK_CONCURRENCY: Pesquisas em paralelo em /bulk (padrão: 4)
 """
-from fastapi import APIRouter, HTTPException, status
-from app.api.youtube import youtube_search
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, model_validator
+import httpx
+from app.api.youtube import search_videos
 from app.models.youtube_suggestion import (
     YouTubeSuggestion,
     YouTubeSuggestionCreate
 )
+from app.models.page import Page
 from app.services.youtube_suggestion_service import YouTubeSuggestionService
 from app.services.topic_service import TopicService  # ⬅ IMPORTANTE
+from app.api.dependencies import PageParams, pagination_params, get_youtube_http_client
 
 router = APIRouter()
 
+YOUTUBE_BULK_MAX_TOPICS = int(os.getenv("YOUTUBE_BULK_MAX_TOPICS", "50"))
+YOUTUBE_BULK_CONCURRENCY = int(os.getenv("YOUTUBE_BULK_CONCURRENCY", "4"))
+
+
+class BulkSuggestionRequest(BaseModel):
+    """Topics a preencher: todos os de um subject ou uma lista explícita"""
+    subjectId: Optional[str] = None
+    topicIds: Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def _check_target(self):
+        if not self.subjectId and not self.topicIds:
+            raise ValueError("Indique subjectId ou topicIds")
+        return self
+
 
 @router.get("/suggest", response_model=YouTubeSuggestion)
-def generate_single_youtube_suggestion(topicId: str):
+async def generate_single_youtube_suggestion(
+    topicId: str,
+    client: httpx.AsyncClient = Depends(get_youtube_http_client)
+):
     #Gera sugestão, através do título do topic
     #Busca na FireStore
-    topic = TopicService.get_topic(topicId)
+    topic = await TopicService.get_topic(topicId)
     if not topic:
         raise HTTPException(status_code=404, detail="Topic não encontrado.")
 
     # Verifica se já existe o limite máximo de 5 sugestões
-    current_count = YouTubeSuggestionService.count_suggestions_by_topic(topicId)
-    if current_count >= 5:
+    current_count = await YouTubeSuggestionService.count_suggestions_by_topic(topicId)
+    if current_count >= YouTubeSuggestionService.MAX_SUGGESTIONS_PER_TOPIC:
         raise HTTPException(
             status_code=400,
             detail="Limite máximo de 5 sugestões atingido para este tópico. Delete uma sugestão existente antes de criar uma nova."
@@ -31,7 +60,7 @@ def generate_single_youtube_suggestion(topicId: str):
 
     #Pesquisa no Youtube
     search_text = topic.title
-    yt_results = youtube_search(search_text, max_results=1)["results"]
+    yt_results = (await search_videos(client, search_text, max_results=1))["results"]
 
     if not yt_results:
         raise HTTPException(
@@ -48,24 +77,106 @@ def generate_single_youtube_suggestion(topicId: str):
         topicId=topicId
     )
 
-    saved = YouTubeSuggestionService.create_youtube_suggestion(suggestion)
+    saved = await YouTubeSuggestionService.create_youtube_suggestion(suggestion)
     return saved
 
 
+async def _bulk_topics(request: BulkSuggestionRequest) -> List[Any]:
+    """Resolve os topics do pedido (IDs inexistentes são ignorados)"""
+    if request.topicIds:
+        topic_ids = list(dict.fromkeys(request.topicIds))
+        if len(topic_ids) > YOUTUBE_BULK_MAX_TOPICS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo de {YOUTUBE_BULK_MAX_TOPICS} topics por pedido"
+            )
+        topics = await asyncio.gather(*(TopicService.get_topic(topic_id) for topic_id in topic_ids))
+        return [topic for topic in topics if topic is not None]
+
+    page = await TopicService.list_topics_by_subject(request.subjectId, YOUTUBE_BULK_MAX_TOPICS + 1)
+    if len(page.items) > YOUTUBE_BULK_MAX_TOPICS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O subject tem mais de {YOUTUBE_BULK_MAX_TOPICS} topics; use topicIds por partes"
+        )
+    return page.items
+
+
+@router.post("/bulk")
+async def generate_bulk_youtube_suggestions(
+    request: BulkSuggestionRequest,
+    client: httpx.AsyncClient = Depends(get_youtube_http_client)
+):
+    """
+    Preenche as sugestões do YouTube de vários topics de uma vez
+
+    Cada topic gasta no máximo uma pesquisa (até 5 resultados, servida do
+    cache quando possível). Vídeos já sugeridos para o topic são ignorados
+    e o limite de 5 sugestões por topic é respeitado; todas as sugestões
+    novas são gravadas num único batch do Firestore.
+
+    Returns:
+        dict: {"created": [YouTubeSuggestion, ...],
+            "topics": [{"topicId", "created", "existing", "error"?}, ...]}
+    """
+    topics = await _bulk_topics(request)
+    if not topics:
+        raise HTTPException(status_code=404, detail="Nenhum topic encontrado.")
+
+    limit = YouTubeSuggestionService.MAX_SUGGESTIONS_PER_TOPIC
+    existing = await YouTubeSuggestionService.urls_by_topics([topic.topicId for topic in topics])
+    semaphore = asyncio.Semaphore(YOUTUBE_BULK_CONCURRENCY)
+
+    async def search(topic) -> Optional[Dict[str, Any]]:
+        if len(existing[topic.topicId]) >= limit:
+            return None
+        async with semaphore:
+            return await search_videos(client, topic.title, max_results=limit)
+
+    searches = await asyncio.gather(*(search(topic) for topic in topics), return_exceptions=True)
+
+    new_suggestions: List[YouTubeSuggestionCreate] = []
+    report = []
+    for topic, result in zip(topics, searches):
+        urls = existing[topic.topicId]
+        entry: Dict[str, Any] = {"topicId": topic.topicId, "created": 0, "existing": len(urls)}
+        if isinstance(result, Exception):
+            entry["error"] = result.detail if isinstance(result, HTTPException) else str(result)
+        elif result is not None:
+            for video in result["results"]:
+                if len(urls) >= limit:
+                    break
+                if video["url"] in urls:
+                    continue
+                urls.add(video["url"])
+                new_suggestions.append(YouTubeSuggestionCreate(title=video["title"], url=video["url"], topicId=topic.topicId))
+                entry["created"] += 1
+        report.append(entry)
+
+    created = await YouTubeSuggestionService.create_youtube_suggestions_batch(new_suggestions)
+    return {"created": created, "topics": report}
+
+
 @router.get("/{suggestion_id}", response_model=YouTubeSuggestion)
-def get_youtube_suggestion(suggestion_id: str):
-    suggestion = YouTubeSuggestionService.get_youtube_suggestion(suggestion_id)
+async def get_youtube_suggestion(suggestion_id: str):
+    suggestion = await YouTubeSuggestionService.get_youtube_suggestion(suggestion_id)
     if not suggestion:
         raise HTTPException(status_code=404, detail="Sugestão não encontrada.")
     return suggestion
 
 
-@router.get("/topic/{topic_id}")
-def list_suggestions_by_topic(topic_id: str):
-    return YouTubeSuggestionService.list_youtube_suggestions_by_topic(topic_id)
+@router.get("/topic/{topic_id}", response_model=Page[YouTubeSuggestion])
+async def list_suggestions_by_topic(topic_id: str, page: PageParams = Depends(pagination_params)):
+    return await YouTubeSuggestionService.list_youtube_suggestions_by_topic(topic_id, page.limit, page.cursor)
 
 
 @router.delete("/{suggestion_id}")
-def delete_youtube_suggestion(suggestion_id: str):
-    YouTubeSuggestionService.delete_youtube_suggestion(suggestion_id)
+async def delete_youtube_suggestion(suggestion_id: str):
+    await YouTubeSuggestionService.delete_youtube_suggestion(suggestion_id)
     return {"deleted": True, "suggestionId": suggestion_id}
+
+
+@router.get("/topic/{topic_id}/count")
+async def count_suggestions_by_topic(topic_id: str):
+    """Conta as sugestões do YouTube de um topic sem listar os documentos"""
+    return {"topicId": topic_id, "count": await YouTubeSuggestionService.count_suggestions_by_topic(topic_id)}
@@ -9,6 +9,8 @@ from .note import Note, NoteCreate, NoteUpdate, NoteSource
 from .ai_request import AIRequest, AIRequestCreate, AIRequestUpdate, AIStatus
 from .study_session import StudySession, StudySessionCreate, StudySessionUpdate, SessionState
 from .youtube_suggestion import YouTubeSuggestion, YouTubeSuggestionCreate, YouTubeSuggestionUpdate
+from .cascade_delete import CascadeDeleteCounts, CascadeDeleteJob, CascadeDeleteStatus
+from .page import Page
 
 __all__ = [
     "User", "UserCreate", "UserUpdate",
@@ -19,5 +21,7 @@ __all__ = [
     "AIRequest", "AIRequestCreate", "AIRequestUpdate", "AIStatus",
     "StudySession", "StudySessionCreate", "StudySessionUpdate", "SessionState",
     "YouTubeSuggestion", "YouTubeSuggestionCreate", "YouTubeSuggestionUpdate",
+    "CascadeDeleteCounts", "CascadeDeleteJob", "CascadeDeleteStatus",
+    "Page",
 ]
 
@@ -9,6 +9,7 @@ from enum import Enum
 
 class AIStatus(str, Enum):
     PENDING = "pending"
+    PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
 
@@ -17,6 +18,7 @@ class AIRequestBase(BaseModel):
     prompt: str
     topicId: str
     slideId: Optional[str] = None
+    noteId: Optional[str] = None
 
 
 class AIRequestCreate(AIRequestBase):
@@ -33,7 +35,11 @@ class AIRequest(AIRequestBase):
     userId: str
     response: Optional[str] = None
     status: AIStatus = AIStatus.PENDING
+    jobId: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
     createdAt: datetime
+    updatedAt: Optional[datetime] = None
 
     class Config:
         from_attributes = True
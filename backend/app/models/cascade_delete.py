@@ -0,0 +1,48 @@
+"""
+Modelos de dados para a eliminação em cascata de subjects e topics
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+from enum import Enum
+
+
+class CascadeDeleteStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class CascadeDeleteCounts(BaseModel):
+    """
+    Documentos abrangidos por uma eliminação em cascata
+
+    Attributes:
+        counts: Número de documentos por coleção (inclui "chunks", as partes
+            de documentos dos AI requests)
+        total: Soma de todas as coleções
+    """
+    counts: Dict[str, int]
+    total: int
+
+
+class CascadeDeleteJob(CascadeDeleteCounts):
+    """
+    Progresso de uma eliminação em cascata feita em segundo plano
+
+    Attributes:
+        jobId: ID do job na fila
+        subjectId: Subject apagado (None se forem apenas topics)
+        topicIds: Topics apagados (quando não é um subject inteiro)
+        deleted: Documentos já apagados
+    """
+    jobId: str
+    subjectId: Optional[str] = None
+    topicIds: List[str] = []
+    status: CascadeDeleteStatus = CascadeDeleteStatus.QUEUED
+    deleted: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+    createdAt: datetime
+    updatedAt: Optional[datetime] = None
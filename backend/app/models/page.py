@@ -0,0 +1,20 @@
+"""
+Modelo de dados para respostas paginadas
+"""
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Página de resultados de uma listagem
+
+    Attributes:
+        items: Entidades desta página
+        next_cursor: Cursor opaco para buscar a página seguinte
+            (None quando não há mais resultados)
+    """
+    items: List[T]
+    next_cursor: Optional[str] = None
@@ -1,23 +1,27 @@
 """
 Serviços do BrainBudy
+
+Os serviços do Firestore são importados só quando usados (PEP 562), para
+que os módulos sem Firestore (fila de jobs, retries, caches, ...) possam
+ser importados, e testados, sem credenciais do Firebase.
 """
-from .user_service import UserService
-from .subject_service import SubjectService
-from .topic_service import TopicService
-from .slide_service import SlideService
-from .note_service import NoteService
-from .ai_request_service import AIRequestService
-from .study_session_service import StudySessionService
-from .youtube_suggestion_service import YouTubeSuggestionService
+import importlib
+
+_SERVICES = {
+    "UserService": ".user_service",
+    "SubjectService": ".subject_service",
+    "TopicService": ".topic_service",
+    "SlideService": ".slide_service",
+    "NoteService": ".note_service",
+    "AIRequestService": ".ai_request_service",
+    "StudySessionService": ".study_session_service",
+    "YouTubeSuggestionService": ".youtube_suggestion_service",
+}
+
+__all__ = list(_SERVICES)
 
-__all__ = [
-    "UserService",
-    "SubjectService",
-    "TopicService",
-    "SlideService",
-    "NoteService",
-    "AIRequestService",
-    "StudySessionService",
-    "YouTubeSuggestionService",
-]
 
+def __getattr__(name: str):
+    if name not in _SERVICES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_SERVICES[name], __name__), name)
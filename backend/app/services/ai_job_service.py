@@ -0,0 +1,262 @@
+"""
+Processamento assíncrono de AI requests
+
+A API cria o AIRequest (status PENDING, com o jobId) e enfileira um job na
+fila durável; um worker (ver app/worker.py, no processo da API ou em
+`python -m app.worker`) chama o Gemini, grava o texto na Note associada e
+atualiza o status do AIRequest (PROCESSING -> COMPLETED, ou FAILED quando
+as tentativas se esgotam).
+
+Documentos grandes (ver submit_document) seguem um caminho map-reduce: as
+partes são gravadas no Firestore durante o upload, resumidas em paralelo
+pelo worker (map) e os resumos são combinados por níveis até caberem num
+único pedido (reduce), que gera a Note final.
+
+Configuração (variáveis de ambiente):
+    GEMINI_MAP_CONCURRENCY: Partes resumidas em simultâneo por job (padrão: 4)
+"""
+import asyncio
+import logging
+import os
+import uuid
+from typing import AsyncIterator, List, Optional
+
+from fastapi import HTTPException
+
+from app.api.gemini import GeminiRequest, generate_with_gemini
+from app.models.ai_request import AIRequest, AIRequestCreate, AIStatus
+from app.models.note import NoteUpdate
+from app.services.ai_request_service import AIRequestService
+from app.services.document_chunk_service import DocumentChunkService
+from app.services.gemini_service import estimate_tokens
+from app.services.http_client_service import http_clients
+from app.services.job_queue import Job, job_queue
+from app.services.note_service import NoteService
+from app.services.rate_limiter import Priority, use_priority
+from app.services.text_chunker import UPLOAD_CHUNK_TOKENS
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MAP_CONCURRENCY = int(os.getenv("GEMINI_MAP_CONCURRENCY", "4"))
+
+MAP_PROMPT = (
+    "Resume de forma concisa a seguinte parte de um documento de estudo, mantendo "
+    "definições, fórmulas, exemplos e termos importantes."
+)
+REDUCE_PROMPT = (
+    "Combina os seguintes resumos parciais (consecutivos) de um documento de estudo "
+    "num único resumo coerente, sem perder conceitos importantes."
+)
+
+
+async def _prepend(first: str, rest: AsyncIterator[str]) -> AsyncIterator[str]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+def _pack(summaries: List[str], budget: int) -> List[List[str]]:
+    """Agrupa resumos consecutivos até `budget` tokens (pelo menos dois por grupo)"""
+    groups: List[List[str]] = []
+    current: List[str] = []
+    tokens = 0
+    for summary in summaries:
+        size = estimate_tokens(summary)
+        if len(current) >= 2 and tokens + size > budget:
+            groups.append(current)
+            current, tokens = [], 0
+        current.append(summary)
+        tokens += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+class AIJobService:
+    """
+    Enfileiramento e processamento de AI requests em segundo plano
+
+    Attributes:
+        KIND: Tipo dos jobs na fila ("ai_request")
+    """
+    KIND = "ai_request"
+
+    @staticmethod
+    async def submit(request_data: AIRequestCreate, context: Optional[str] = None) -> AIRequest:
+        """
+        Cria um AI request e enfileira o seu processamento
+
+        Args:
+            request_data: Dados da requisição (prompt, topicId, userId, noteId opcional)
+            context: Contexto adicional do prompt (ex: conteúdo de um ficheiro)
+
+        Returns:
+            AIRequest: Requisição criada, com status PENDING
+        """
+        job_id = uuid.uuid4().hex
+        ai_request = await AIRequestService.create_ai_request(request_data, job_id=job_id)
+        await job_queue.enqueue(Job(
+            kind=AIJobService.KIND,
+            payload={"requestId": ai_request.requestId, "context": context},
+            job_id=job_id,
+        ))
+        return ai_request
+
+    @staticmethod
+    async def submit_document(
+        request_data: AIRequestCreate,
+        first_chunk: str,
+        chunks: AsyncIterator[str],
+    ) -> AIRequest:
+        """
+        Cria um AI request cujo contexto é um documento grande, lido por partes
+
+        Um documento com uma só parte segue o caminho normal (contexto no job).
+        Caso contrário as partes são gravadas à medida que chegam, sem juntar
+        o documento em memória, e o job só é enfileirado no fim.
+
+        Args:
+            request_data: Dados da requisição (prompt, topicId, userId, noteId opcional)
+            first_chunk: Primeira parte do documento (já lida pelo chamador)
+            chunks: Partes restantes (ver text_chunker.iter_text_chunks)
+
+        Returns:
+            AIRequest: Requisição criada, com status PENDING
+
+        Raises:
+            Exception: Erros de leitura do documento (o AIRequest fica FAILED)
+        """
+        second_chunk = await anext(chunks, None)
+        if second_chunk is None:
+            return await AIJobService.submit(request_data, context=first_chunk)
+
+        job_id = uuid.uuid4().hex
+        ai_request = await AIRequestService.create_ai_request(request_data, job_id=job_id)
+        request_id = ai_request.requestId
+        try:
+            count = await DocumentChunkService.save_chunks(
+                request_id, _prepend(first_chunk, _prepend(second_chunk, chunks))
+            )
+        except Exception as e:
+            await DocumentChunkService.delete_chunks(request_id)
+            await AIRequestService.set_job_state(request_id, AIStatus.FAILED, error=f"Erro ao ler documento: {e}")
+            raise
+
+        await job_queue.enqueue(Job(
+            kind=AIJobService.KIND,
+            payload={"requestId": request_id, "chunks": count},
+            job_id=job_id,
+        ))
+        return ai_request
+
+    @staticmethod
+    async def _generate(
+        prompt: str,
+        topic_id: Optional[str],
+        context: Optional[str],
+        slide_id: Optional[str] = None,
+    ) -> str:
+        """Chama o Gemini com prioridade de segundo plano (falhas viram RuntimeError)"""
+        gemini_request = GeminiRequest(prompt=prompt, topic_id=topic_id, slide_id=slide_id, context=context)
+        try:
+            with use_priority(Priority.BACKGROUND):
+                result = await generate_with_gemini(gemini_request, http_clients.get("gemini"))
+        except HTTPException as e:
+            raise RuntimeError(e.detail) from e
+        return result.get("response", "")
+
+    @staticmethod
+    async def _summarize_chunks(request_id: str, topic_id: Optional[str]) -> str:
+        """
+        Map-reduce sobre as partes gravadas de um documento
+
+        Map: cada página de partes é resumida em paralelo (até
+        GEMINI_MAP_CONCURRENCY pedidos); resumos já gravados por uma tentativa
+        anterior são reaproveitados. Reduce: os resumos são agrupados até
+        UPLOAD_CHUNK_TOKENS e combinados em paralelo, nível a nível, até
+        caberem num único contexto.
+
+        Returns:
+            str: Contexto final (resumos combinados) para o pedido original
+        """
+        semaphore = asyncio.Semaphore(GEMINI_MAP_CONCURRENCY)
+
+        async def summarize(chunk_id: str, text: str) -> str:
+            async with semaphore:
+                summary = await AIJobService._generate(MAP_PROMPT, topic_id, text)
+            await DocumentChunkService.set_summary(request_id, chunk_id, summary)
+            return summary
+
+        async def combine(group: List[str]) -> str:
+            async with semaphore:
+                return await AIJobService._generate(REDUCE_PROMPT, topic_id, "\n\n---\n\n".join(group))
+
+        summaries: List[str] = []
+        page: List[tuple] = []
+        page_size = GEMINI_MAP_CONCURRENCY * 2
+
+        async def flush_page() -> None:
+            results = await asyncio.gather(*(
+                summarize(chunk_id, text) if summary is None else asyncio.sleep(0, summary)
+                for chunk_id, text, summary in page
+            ))
+            summaries.extend(results)
+            page.clear()
+
+        async for chunk in DocumentChunkService.iter_chunks(request_id, page_size):
+            page.append(chunk)
+            if len(page) >= page_size:
+                await flush_page()
+        await flush_page()
+
+        groups = _pack(summaries, UPLOAD_CHUNK_TOKENS)
+        while len(groups) > 1:
+            summaries = list(await asyncio.gather(*(combine(group) for group in groups)))
+            groups = _pack(summaries, UPLOAD_CHUNK_TOKENS)
+        return "\n\n".join(groups[0]) if groups else ""
+
+    @staticmethod
+    async def process(job: Job) -> None:
+        """
+        Processa um job: gera a resposta, grava a Note e marca COMPLETED
+
+        Pode ser chamado mais de uma vez para o mesmo job (retries); um
+        AI request já COMPLETED ou apagado é ignorado.
+
+        Raises:
+            Exception: Qualquer falha da geração, para o worker repetir o job
+        """
+        request_id = job.payload["requestId"]
+        ai_request = await AIRequestService.get_ai_request(request_id)
+        if ai_request is None or ai_request.status == AIStatus.COMPLETED:
+            return
+
+        await AIRequestService.set_job_state(request_id, AIStatus.PROCESSING, attempts=job.attempts)
+
+        if job.payload.get("chunks"):
+            context = await AIJobService._summarize_chunks(request_id, ai_request.topicId)
+        else:
+            context = job.payload.get("context")
+        text = await AIJobService._generate(ai_request.prompt, ai_request.topicId, context, ai_request.slideId)
+
+        if ai_request.noteId and text:
+            await NoteService.update_note(ai_request.noteId, NoteUpdate(content=text))
+        await AIRequestService.set_job_state(request_id, AIStatus.COMPLETED, response=text, attempts=job.attempts)
+        if job.payload.get("chunks"):
+            await DocumentChunkService.delete_chunks(request_id)
+
+    @staticmethod
+    async def on_retry(job: Job, error: str) -> None:
+        """Volta a marcar PENDING (com o erro) um job que vai ser repetido"""
+        await AIRequestService.set_job_state(
+            job.payload["requestId"], AIStatus.PENDING, error=error, attempts=job.attempts
+        )
+
+    @staticmethod
+    async def on_dead_letter(job: Job, error: str) -> None:
+        """Marca como FAILED um job cujas tentativas se esgotaram (e apaga as partes do documento)"""
+        await AIRequestService.set_job_state(
+            job.payload["requestId"], AIStatus.FAILED, error=error, attempts=job.attempts
+        )
+        if job.payload.get("chunks"):
+            await DocumentChunkService.delete_chunks(job.payload["requestId"])
@@ -1,10 +1,13 @@
 """
 Serviço para operações CRUD de AIRequest no Firestore
 """
-from app.services.firebase_service import db
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, count_documents, DEFAULT_PAGE_SIZE
 from app.models.ai_request import AIRequest, AIRequestCreate, AIRequestUpdate, AIStatus
+from app.models.page import Page
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 from google.cloud.firestore_v1 import FieldFilter
 
 
@@ -17,11 +20,24 @@ class AIRequestService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("ai_requests")
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
+
+    Note:
+        Só requisições concluídas (COMPLETED/FAILED) entram no CACHE: o estado
+        das restantes é escrito pelos workers, que podem correr noutro processo.
     """
     COLLECTION = "ai_requests"
+    CACHE = DocumentCache(COLLECTION)
+
+    @staticmethod
+    def _cache(ai_request: AIRequest, version) -> None:
+        if ai_request.status in (AIStatus.COMPLETED, AIStatus.FAILED):
+            AIRequestService.CACHE.set(ai_request.requestId, ai_request, version=version)
+        else:
+            AIRequestService.CACHE.invalidate(ai_request.requestId)
 
     @staticmethod
-    def create_ai_request(request_data: AIRequestCreate) -> AIRequest:
+    async def create_ai_request(request_data: AIRequestCreate, job_id: Optional[str] = None) -> AIRequest:
         """
         Cria um novo AI request no Firestore
         
@@ -29,6 +45,7 @@ class AIRequestService:
         
         Args:
             request_data: Dados da requisição a ser criada (AIRequestCreate)
+            job_id: ID do job da fila que vai processar a requisição (opcional)
         
         Returns:
             AIRequest: Requisição criada (com requestId, status e createdAt atribuídos)
@@ -38,14 +55,17 @@ class AIRequestService:
         """
         request_dict = request_data.model_dump()
         request_dict["status"] = AIStatus.PENDING
+        request_dict["jobId"] = job_id
         request_dict["createdAt"] = datetime.utcnow()
         
-        doc_ref = db.collection(AIRequestService.COLLECTION).add(request_dict)
+        doc_ref = await async_db.collection(AIRequestService.COLLECTION).add(request_dict)
         request_dict["requestId"] = doc_ref[1].id
-        return AIRequest(**request_dict)
+        created = AIRequest(**request_dict)
+        AIRequestService._cache(created, doc_ref[0])
+        return created
 
     @staticmethod
-    def get_ai_request(request_id: str) -> Optional[AIRequest]:
+    async def get_ai_request(request_id: str) -> Optional[AIRequest]:
         """
         Busca um AI request por ID no Firestore
         
@@ -54,15 +74,24 @@ class AIRequestService:
         
         Returns:
             Optional[AIRequest]: Dados da requisição se encontrada, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(AIRequestService.COLLECTION).document(request_id).get()
+        cached = AIRequestService.CACHE.get(request_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(AIRequestService.COLLECTION).document(request_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return AIRequest(requestId=doc.id, **data)
+            ai_request = AIRequest(requestId=doc.id, **data)
+            AIRequestService._cache(ai_request, doc.update_time)
+            return ai_request
         return None
 
     @staticmethod
-    def update_ai_request(request_id: str, request_data: AIRequestUpdate) -> Optional[AIRequest]:
+    async def update_ai_request(request_id: str, request_data: AIRequestUpdate) -> Optional[AIRequest]:
         """
         Atualiza um AI request existente no Firestore
         
@@ -75,17 +104,65 @@ class AIRequestService:
         
         Returns:
             Optional[AIRequest]: Requisição atualizada se encontrada, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = request_data.model_dump(exclude_unset=True)
         if not update_data:
-            return AIRequestService.get_ai_request(request_id)
-        
-        doc_ref = db.collection(AIRequestService.COLLECTION).document(request_id)
-        doc_ref.update(update_data)
-        return AIRequestService.get_ai_request(request_id)
+            return await AIRequestService.get_ai_request(request_id)
+        return await AIRequestService._apply_update(request_id, update_data)
+
+    @staticmethod
+    async def set_job_state(
+        request_id: str,
+        status: AIStatus,
+        response: Optional[str] = None,
+        error: Optional[str] = None,
+        attempts: Optional[int] = None,
+    ) -> Optional[AIRequest]:
+        """
+        Regista o estado do processamento em segundo plano de um AI request
+
+        Usado pelos workers (ver AIJobService): PROCESSING ao iniciar uma
+        tentativa, COMPLETED com a resposta, ou FAILED com o erro quando as
+        tentativas se esgotam.
+
+        Args:
+            request_id: ID único da requisição
+            status: Novo status
+            response: Texto gerado (apenas em COMPLETED)
+            error: Erro da última tentativa (None limpa o erro anterior)
+            attempts: Número de tentativas feitas até agora
+
+        Returns:
+            Optional[AIRequest]: Requisição atualizada, ou None se não existir
+        """
+        update_data = {"status": status, "error": error, "updatedAt": datetime.utcnow()}
+        if response is not None:
+            update_data["response"] = response
+        if attempts is not None:
+            update_data["attempts"] = attempts
+        return await AIRequestService._apply_update(request_id, update_data)
+
+    @staticmethod
+    async def _apply_update(request_id: str, update_data: dict) -> Optional[AIRequest]:
+        cached = AIRequestService.CACHE.get_entry(request_id)
+        snapshot = (cached.value.model_dump(exclude={"requestId"}), cached.version) if cached else None
+        result = await update_document(AIRequestService.COLLECTION, request_id, update_data, snapshot)
+        if result is None:
+            AIRequestService.CACHE.invalidate(request_id)
+            return None
+
+        data, version = result
+        ai_request = AIRequest(requestId=request_id, **data)
+        AIRequestService._cache(ai_request, version)
+        return ai_request
 
     @staticmethod
-    def delete_ai_request(request_id: str) -> bool:
+    async def delete_ai_request(request_id: str) -> bool:
         """
         Deleta um AI request do Firestore
         
@@ -95,38 +172,84 @@ class AIRequestService:
         Returns:
             bool: True se a operação foi bem-sucedida
         """
-        db.collection(AIRequestService.COLLECTION).document(request_id).delete()
+        await async_db.collection(AIRequestService.COLLECTION).document(request_id).delete()
+        AIRequestService.CACHE.invalidate(request_id)
         return True
 
     @staticmethod
-    def list_ai_requests_by_user(user_id: str) -> List[AIRequest]:
+    async def list_ai_requests_by_user(user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[AIRequest]:
         """
-        Lista todos os AI requests de um usuário
+        Lista os AI requests de um usuário
         
         Args:
             user_id: ID único do usuário
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[AIRequest]: Lista de todas as requisições do usuário (todos os status)
+            Page[AIRequest]: Página das requisições do usuário (todos os status), ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(AIRequestService.COLLECTION).where(
+        query = async_db.collection(AIRequestService.COLLECTION).where(
             filter=FieldFilter("userId", "==", user_id)
-        ).stream()
-        return [AIRequest(requestId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[AIRequest](
+            items=[AIRequest(requestId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
     @staticmethod
-    def list_ai_requests_by_topic(topic_id: str) -> List[AIRequest]:
+    async def list_ai_requests_by_topic(topic_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[AIRequest]:
         """
-        Lista todos os AI requests relacionados a um topic
+        Lista os AI requests relacionados a um topic
         
         Args:
             topic_id: ID único do topic
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[AIRequest]: Lista de todas as requisições do topic especificado
+            Page[AIRequest]: Página das requisições do topic especificado, ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(AIRequestService.COLLECTION).where(
+        query = async_db.collection(AIRequestService.COLLECTION).where(
             filter=FieldFilter("topicId", "==", topic_id)
-        ).stream()
-        return [AIRequest(requestId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[AIRequest](
+            items=[AIRequest(requestId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    async def count_ai_requests_by_user(user_id: str) -> int:
+        """
+        Conta os AI requests do usuário sem transferir os documentos
+        
+        Args:
+            user_id: ID único do usuário
+        
+        Returns:
+            int: Número total de documentos (aggregation query no servidor)
+        """
+        query = async_db.collection(AIRequestService.COLLECTION).where(
+            filter=FieldFilter("userId", "==", user_id)
+        )
+        return await count_documents(query)
 
+    @staticmethod
+    async def count_ai_requests_by_topic(topic_id: str) -> int:
+        """
+        Conta os AI requests do topic sem transferir os documentos
+        
+        Args:
+            topic_id: ID único do topic
+        
+        Returns:
+            int: Número total de documentos (aggregation query no servidor)
+        """
+        query = async_db.collection(AIRequestService.COLLECTION).where(
+            filter=FieldFilter("topicId", "==", topic_id)
+        )
+        return await count_documents(query)
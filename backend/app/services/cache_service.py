@@ -0,0 +1,214 @@
+"""
+Cache em memória (read-through) para documentos do Firestore
+
+Cada serviço mantém um DocumentCache próprio, consultado pelos métodos
+`get_*` e invalidado pelos métodos `update_*`/`delete_*` do mesmo serviço.
+O armazenamento é plugável: por padrão usa um cache LRU com expiração por
+TTL (cachetools.TTLCache), mas qualquer objeto que implemente CacheBackend
+pode ser usado (ex: um backend partilhado entre processos).
+
+Configuração (variáveis de ambiente):
+    DOCUMENT_CACHE_ENABLED: "false" desativa o cache (padrão: "true")
+    DOCUMENT_CACHE_MAXSIZE: Número máximo de documentos por coleção (padrão: 1024)
+    DOCUMENT_CACHE_TTL: Tempo de vida de cada entrada em segundos (padrão: 60)
+"""
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Protocol
+
+from cachetools import TTLCache
+
+DOCUMENT_CACHE_ENABLED = os.getenv("DOCUMENT_CACHE_ENABLED", "true").lower() != "false"
+DOCUMENT_CACHE_MAXSIZE = int(os.getenv("DOCUMENT_CACHE_MAXSIZE", "1024"))
+DOCUMENT_CACHE_TTL = float(os.getenv("DOCUMENT_CACHE_TTL", "60"))
+
+_MISSING = object()
+
+
+class CacheEntry(NamedTuple):
+    """
+    Entrada do cache: a entidade e a versão do documento que a originou
+
+    Attributes:
+        value: Entidade (modelo Pydantic) em cache
+        version: `update_time` do documento no Firestore, se conhecido.
+            Permite escrever com pré-condição sobre este snapshot
+    """
+    value: Any
+    version: Optional[Any] = None
+
+
+class CacheBackend(Protocol):
+    """
+    Interface mínima de armazenamento usada pelo DocumentCache
+
+    Qualquer implementação deve ser segura para uso a partir do event loop
+    (operações rápidas e sem I/O bloqueante).
+    """
+
+    def get(self, key: str, default: Any = None) -> Any: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class TTLLRUBackend:
+    """
+    Backend padrão: LRU limitado por número de entradas com expiração por TTL
+
+    Attributes:
+        maxsize: Número máximo de entradas antes de despejar a menos usada
+        ttl: Tempo de vida de cada entrada em segundos
+        evictions: Número de entradas despejadas por falta de espaço
+    """
+
+    def __init__(self, maxsize: int = DOCUMENT_CACHE_MAXSIZE, ttl: float = DOCUMENT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        backend = self
+
+        class _CountingTTLCache(TTLCache):
+            def popitem(self):
+                item = super().popitem()
+                backend.evictions += 1
+                return item
+
+        self._data = _CountingTTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = value
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DocumentCache:
+    """
+    Cache read-through de entidades do Firestore para um serviço
+
+    Args:
+        namespace: Nome da coleção (usado para identificar o cache nas métricas)
+        backend: Armazenamento a usar. Se omitido, usa a fábrica configurada
+            em `set_backend_factory` (por padrão um TTLLRUBackend)
+
+    Example:
+        >>> cache = DocumentCache("topics")
+        >>> cache.set("abc", topic)
+        >>> cache.get("abc")  # conta um hit
+    """
+
+    _registry: Dict[str, "DocumentCache"] = {}
+    _backend_factory: Callable[[str], CacheBackend] = staticmethod(lambda namespace: TTLLRUBackend())
+
+    def __init__(self, namespace: str, backend: Optional[CacheBackend] = None):
+        self.namespace = namespace
+        self.enabled = DOCUMENT_CACHE_ENABLED
+        self.backend = backend if backend is not None else DocumentCache._backend_factory(namespace)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        DocumentCache._registry[namespace] = self
+
+    @classmethod
+    def set_backend_factory(cls, factory: Callable[[str], CacheBackend]) -> None:
+        """
+        Substitui o backend de todos os caches registrados
+
+        Args:
+            factory: Função que recebe o namespace e devolve um CacheBackend
+        """
+        cls._backend_factory = staticmethod(factory)
+        for cache in cls._registry.values():
+            cache.backend = factory(cache.namespace)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Busca uma entrada no cache
+
+        Returns:
+            Optional[Any]: Valor em cache, ou None em caso de miss
+        """
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Busca uma entrada no cache junto com a versão do documento
+
+        Returns:
+            Optional[CacheEntry]: Entrada em cache, ou None em caso de miss
+        """
+        if not self.enabled:
+            return None
+        entry = self.backend.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, value: Any, version: Optional[Any] = None) -> None:
+        """
+        Guarda (ou substitui) uma entrada no cache
+
+        Args:
+            key: ID do documento
+            value: Entidade a guardar
+            version: `update_time` do documento, se conhecido
+        """
+        if self.enabled and value is not None:
+            self.backend.set(key, CacheEntry(value, version))
+
+    def invalidate(self, key: str) -> None:
+        """Remove uma entrada do cache (após update/delete do documento)"""
+        self.invalidations += 1
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        """Remove todas as entradas e zera os contadores"""
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Contadores do cache, úteis para dimensionar maxsize/TTL
+
+        Returns:
+            dict: namespace, size, hits, misses, hit_ratio, invalidations
+                e (se o backend suportar) maxsize, ttl e evictions
+        """
+        lookups = self.hits + self.misses
+        stats = {
+            "namespace": self.namespace,
+            "enabled": self.enabled,
+            "size": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+        for attr in ("maxsize", "ttl", "evictions"):
+            if hasattr(self.backend, attr):
+                stats[attr] = getattr(self.backend, attr)
+        return stats
+
+    @classmethod
+    def all_stats(cls) -> List[Dict[str, Any]]:
+        """Estatísticas de todos os caches registrados"""
+        return [cache.stats() for cache in cls._registry.values()]
@@ -0,0 +1,189 @@
+"""
+Pedidos em lote (batch) à API do Google Calendar
+
+Vários pedidos são enviados num único POST multipart/mixed para o endpoint
+de batch; cada parte é um pedido HTTP completo e a resposta traz uma parte
+por pedido, identificada pelo Content-ID. O Google aceita até 50 pedidos
+por batch, pelo que listas maiores são divididas.
+
+Partes que falham com status repetível (429, 5xx) são reenviadas num novo
+batch, com o backoff da política de retry do Calendar, até esgotar as
+tentativas. Só devem ser usados pedidos idempotentes (IDs de evento
+gerados pelo cliente, PATCH, DELETE).
+"""
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.services.retry_policy import calendar_retry, is_retryable_status, send_with_retry
+
+GOOGLE_CALENDAR_BATCH_URL = "https://www.googleapis.com/batch/calendar/v3"
+CALENDAR_API_PATH = "/calendar/v3"
+
+#Máximo de pedidos por batch aceite pelo Google Calendar
+CALENDAR_BATCH_MAX_REQUESTS = 50
+
+
+@dataclass
+class BatchRequest:
+    """
+    Pedido individual dentro de um batch
+
+    Attributes:
+        method: Método HTTP
+        path: Caminho relativo à API (ex: "/calendars/primary/events")
+        body: Corpo JSON (opcional)
+    """
+    method: str
+    path: str
+    body: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class BatchResponse:
+    """
+    Resposta a um pedido individual de um batch
+
+    Attributes:
+        status_code: Status HTTP da parte
+        body: Corpo JSON (ou None se vazio / não JSON)
+        text: Corpo em texto (para mensagens de erro)
+    """
+    status_code: int
+    body: Optional[Dict[str, Any]]
+    text: str = ""
+
+
+def build_batch_body(requests: List[BatchRequest], boundary: str) -> bytes:
+    """Codifica os pedidos como multipart/mixed (Content-ID = índice do pedido)"""
+    lines: List[str] = []
+    for index, request in enumerate(requests):
+        lines += [
+            f"--{boundary}",
+            "Content-Type: application/http",
+            f"Content-ID: <item-{index}>",
+            "",
+            f"{request.method} {CALENDAR_API_PATH}{request.path} HTTP/1.1",
+        ]
+        if request.body is not None:
+            lines += ["Content-Type: application/json; charset=UTF-8", "", json.dumps(request.body)]
+        else:
+            lines += [""]
+        lines.append("")
+    lines.append(f"--{boundary}--")
+    return "\r\n".join(lines).encode("utf-8")
+
+
+def _parse_part(part: str) -> Tuple[Optional[int], BatchResponse]:
+    # Cabeçalhos da parte, linha em branco, resposta HTTP (status, cabeçalhos, corpo)
+    outer, _, http = part.partition("\r\n\r\n")
+    index = None
+    for line in outer.split("\r\n"):
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-id":
+            # Formato <response-item-N>
+            value = value.strip().strip("<>")
+            if value.rsplit("-", 1)[-1].isdigit():
+                index = int(value.rsplit("-", 1)[-1])
+
+    head, _, body = http.partition("\r\n\r\n")
+    status_line = head.split("\r\n", 1)[0]
+    try:
+        status_code = int(status_line.split(" ")[1])
+    except (IndexError, ValueError):
+        status_code = 502
+    body = body.strip()
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        data = None
+    return index, BatchResponse(status_code, data if isinstance(data, dict) else None, body)
+
+
+def parse_batch_response(response: httpx.Response, count: int) -> List[BatchResponse]:
+    """
+    Decodifica a resposta multipart de um batch
+
+    Args:
+        response: Resposta do endpoint de batch
+        count: Número de pedidos enviados
+
+    Returns:
+        List[BatchResponse]: Uma resposta por pedido, pela ordem de envio
+            (partes em falta ficam com status 502)
+    """
+    content_type = response.headers.get("content-type", "")
+    boundary = None
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary":
+            boundary = value.strip('"')
+    results = [BatchResponse(502, None, "Parte em falta na resposta do batch") for _ in range(count)]
+    if boundary is None:
+        return results
+
+    text = response.text.replace("\r\n", "\n").replace("\n", "\r\n")
+    for part in text.split(f"--{boundary}"):
+        part = part.strip("\r\n")
+        if not part or part == "--":
+            continue
+        index, parsed = _parse_part(part)
+        if index is not None and 0 <= index < count:
+            results[index] = parsed
+    return results
+
+
+async def _send_batch(client: httpx.AsyncClient, access_token: str, requests: List[BatchRequest]) -> List[BatchResponse]:
+    boundary = f"batch_{uuid.uuid4().hex}"
+    response = await send_with_retry(
+        client, "POST", GOOGLE_CALENDAR_BATCH_URL,
+        policy=calendar_retry,
+        idempotent=True,
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": f"multipart/mixed; boundary={boundary}",
+        },
+        content=build_batch_body(requests, boundary),
+    )
+    if response.status_code != 200:
+        # O batch inteiro falhou (ex: token inválido): o erro vale para todas as partes
+        return [BatchResponse(response.status_code, None, response.text) for _ in requests]
+    return parse_batch_response(response, len(requests))
+
+
+async def execute_batch(client: httpx.AsyncClient, access_token: str, requests: List[BatchRequest]) -> List[BatchResponse]:
+    """
+    Executa pedidos à API do Calendar em batches de até 50
+
+    Args:
+        client: Cliente HTTP partilhado ("calendar")
+        access_token: Token OAuth do utilizador
+        requests: Pedidos idempotentes a executar
+
+    Returns:
+        List[BatchResponse]: Uma resposta por pedido, pela mesma ordem
+
+    Raises:
+        httpx.HTTPError: Se o endpoint de batch não puder ser contactado
+    """
+    results: List[Optional[BatchResponse]] = [None] * len(requests)
+    pending = list(range(len(requests)))
+    attempt = 0
+    while pending:
+        for start in range(0, len(pending), CALENDAR_BATCH_MAX_REQUESTS):
+            indexes = pending[start:start + CALENDAR_BATCH_MAX_REQUESTS]
+            responses = await _send_batch(client, access_token, [requests[i] for i in indexes])
+            for i, response in zip(indexes, responses):
+                results[i] = response
+
+        attempt += 1
+        pending = [i for i in pending if is_retryable_status(results[i].status_code, idempotent=True)]
+        if not pending or attempt >= calendar_retry.max_attempts:
+            break
+        calendar_retry.retries += 1
+        await asyncio.sleep(calendar_retry.backoff(attempt - 1))
+    return results
@@ -0,0 +1,114 @@
+"""
+Eventos do Google Calendar associados às study sessions
+
+As horas das sessões são horas de relógio (wall-clock), sem fuso: o
+frontend envia-as sem offset e o Firestore devolve-as marcadas como UTC.
+Os eventos são criados com essas horas no fuso indicado no pedido
+(`timeZone`), que o Google guarda no evento. Na sincronização, as horas
+do evento são convertidas de volta para esse fuso antes de comparar, para
+que um evento não alterado num fuso diferente de UTC não mova a sessão.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+#Marca dos eventos criados pela aplicação (extendedProperties.private)
+CALENDAR_APP_TAG = "brainbuddy"
+
+
+def app_event_properties(session_id: Optional[str] = None) -> Dict[str, Any]:
+    """extendedProperties a incluir nos eventos criados pela aplicação"""
+    private = {"app": CALENDAR_APP_TAG}
+    if session_id:
+        private["sessionId"] = session_id
+    return {"private": private}
+
+
+def is_app_event(event: Dict[str, Any]) -> bool:
+    """Se o evento foi criado pela aplicação (ver app_event_properties)"""
+    private = (event.get("extendedProperties") or {}).get("private") or {}
+    return private.get("app") == CALENDAR_APP_TAG
+
+
+def wall_clock(value: datetime) -> datetime:
+    """
+    Hora de relógio de uma sessão, sem fuso
+
+    Datas com fuso (lidas do Firestore, sempre em UTC) são convertidas
+    para UTC e perdem o fuso; datas sem fuso ficam como estão.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def event_wall_clock(value: Optional[Dict[str, Any]]) -> Optional[datetime]:
+    """
+    Hora de relógio de `start`/`end` de um evento, no fuso do próprio evento
+
+    Args:
+        value: Campo start ou end do evento ({"dateTime", "timeZone"})
+
+    Returns:
+        Optional[datetime]: Hora sem fuso, ou None para eventos de dia inteiro
+            ou datas inválidas
+    """
+    raw = (value or {}).get("dateTime")
+    if not raw:
+        return None
+    try:
+        instant = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if instant.tzinfo is None:
+        return instant
+    try:
+        zone = ZoneInfo(value["timeZone"]) if value.get("timeZone") else None
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = None
+    # Sem timeZone, o offset de dateTime já é o do fuso do evento
+    return instant.astimezone(zone).replace(tzinfo=None) if zone else instant.replace(tzinfo=None)
+
+
+def session_event_body(start: datetime, end: datetime, summary: str, time_zone: str, session_id: str) -> Dict[str, Any]:
+    """
+    Corpo de um evento do Calendar para uma study session
+
+    Args:
+        start: Início da sessão (hora de relógio, ver wall_clock)
+        end: Fim da sessão
+        summary: Título do evento
+        time_zone: Fuso (IANA) em que as horas da sessão são interpretadas
+        session_id: ID da sessão (guardado em extendedProperties)
+    """
+    return {
+        "summary": summary,
+        "start": {"dateTime": wall_clock(start).isoformat(), "timeZone": time_zone},
+        "end": {"dateTime": wall_clock(end).isoformat(), "timeZone": time_zone},
+        "extendedProperties": app_event_properties(session_id),
+    }
+
+
+def session_changes(session: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Campos a atualizar numa sessão cujo evento foi movido ou religado no Calendar
+
+    As horas são comparadas como horas de relógio no fuso do evento; as
+    novas horas são gravadas no mesmo formato (sem fuso).
+
+    Args:
+        session: Dados da sessão (startTime, endTime, calendarEvent)
+        event: Evento devolvido pela API do Calendar
+
+    Returns:
+        dict: Campos alterados (vazio se a sessão já corresponde ao evento)
+    """
+    update: Dict[str, Any] = {}
+    for field, key in (("startTime", "start"), ("endTime", "end")):
+        value = event_wall_clock(event.get(key))
+        current = session.get(field)
+        if value is not None and (current is None or wall_clock(current) != value):
+            update[field] = value
+    if session.get("calendarEvent") != event["id"]:
+        update["calendarEvent"] = event["id"]
+    return update
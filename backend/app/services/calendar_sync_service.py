@@ -0,0 +1,320 @@
+"""
+Sincronização incremental do Google Calendar com um espelho no Firestore
+
+Para cada utilizador é mantido um espelho dos eventos criados pela
+aplicação (marcados com extendedProperties.private.app = "brainbuddy") e
+da lista de calendários. A primeira sincronização lista tudo; as seguintes
+usam o `syncToken` devolvido pelo Google e só recebem o que mudou, pelo que
+o custo passa a ser proporcional às alterações e não ao número de eventos.
+
+Estrutura no Firestore:
+    calendar_sync/{userId}: syncToken dos eventos e da lista de calendários,
+        calendários espelhados e data da última sincronização
+    calendar_sync/{userId}/events/{eventId}: eventos espelhados
+
+Alterações feitas pelo utilizador no Calendar são reconciliadas com as
+study sessions: eventos movidos atualizam startTime/endTime da sessão e
+eventos apagados limpam o seu calendarEvent.
+
+Configuração (variáveis de ambiente):
+    CALENDAR_SYNC_INTERVAL: Idade máxima do espelho em segundos antes de
+        uma leitura provocar nova sincronização (padrão: 60)
+"""
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.services.calendar_events import is_app_event, session_changes
+from app.services.firebase_service import async_db
+from app.services.firestore_utils import get_documents, paginate
+from app.services.retry_policy import calendar_retry, send_with_retry
+from app.services.study_session_service import StudySessionService
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_SYNC_INTERVAL = float(os.getenv("CALENDAR_SYNC_INTERVAL", "60"))
+
+GOOGLE_CALENDAR_API_URL = "https://www.googleapis.com/calendar/v3"
+
+#Escritas por batch do Firestore (limite: 500)
+MIRROR_WRITE_BATCH = 400
+
+
+class CalendarSyncError(Exception):
+    """Falha da API do Calendar durante a sincronização"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CalendarSyncService:
+    """
+    Espelho por utilizador dos eventos e calendários do Google Calendar
+
+    Attributes:
+        COLLECTION: Coleção do estado de sincronização ("calendar_sync")
+        EVENTS: Subcoleção dos eventos espelhados ("events")
+    """
+    COLLECTION = "calendar_sync"
+    EVENTS = "events"
+
+    @staticmethod
+    def _state_ref(user_id: str):
+        return async_db.collection(CalendarSyncService.COLLECTION).document(user_id)
+
+    @staticmethod
+    def _events(user_id: str):
+        return CalendarSyncService._state_ref(user_id).collection(CalendarSyncService.EVENTS)
+
+    @staticmethod
+    async def _list_all(
+        client: httpx.AsyncClient,
+        path: str,
+        access_token: str,
+        params: Dict[str, Any],
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Percorre todas as páginas de uma listagem incremental
+
+        Returns:
+            Tuple[list, Optional[str]]: Itens alterados e o novo syncToken
+
+        Raises:
+            CalendarSyncError: Se a API responder com erro (410 = syncToken expirado)
+        """
+        items: List[Dict[str, Any]] = []
+        page_token = None
+        while True:
+            page_params = dict(params)
+            if page_token:
+                page_params["pageToken"] = page_token
+            response = await send_with_retry(
+                client, "GET", f"{GOOGLE_CALENDAR_API_URL}{path}",
+                policy=calendar_retry,
+                headers={"Authorization": f"Bearer {access_token}"},
+                params=page_params,
+            )
+            if response.status_code != 200:
+                raise CalendarSyncError(response.status_code, response.text[:300])
+            data = response.json()
+            items.extend(data.get("items", []))
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                return items, data.get("nextSyncToken")
+
+    @staticmethod
+    async def get_state(user_id: str) -> Dict[str, Any]:
+        """Estado de sincronização do utilizador (vazio se nunca sincronizou)"""
+        doc = await CalendarSyncService._state_ref(user_id).get()
+        return doc.to_dict() if doc.exists else {}
+
+    @staticmethod
+    async def sync(client: httpx.AsyncClient, user_id: str, access_token: str) -> Dict[str, Any]:
+        """
+        Sincroniza eventos e calendários do utilizador (incremental quando possível)
+
+        Args:
+            client: Cliente HTTP partilhado ("calendar")
+            user_id: ID do utilizador dono do espelho
+            access_token: Token OAuth do utilizador
+
+        Returns:
+            dict: {"full": bool, "events_changed", "events_removed",
+                "sessions_updated", "calendars"}
+
+        Raises:
+            CalendarSyncError: Se a API do Calendar falhar
+            httpx.HTTPError: Se a API não puder ser contactada
+        """
+        state = await CalendarSyncService.get_state(user_id)
+        events_token = state.get("eventsSyncToken")
+        full = events_token is None
+
+        try:
+            # O syncToken não pode ser combinado com filtros: a listagem inclui
+            # todos os eventos e os que não são da aplicação são ignorados
+            params = {"syncToken": events_token} if events_token else {}
+            items, next_events_token = await CalendarSyncService._list_all(
+                client, "/calendars/primary/events", access_token, {**params, "maxResults": 250}
+            )
+        except CalendarSyncError as e:
+            if e.status_code != 410 or full:
+                raise
+            # syncToken expirado: descartar o espelho e sincronizar tudo
+            logger.info("syncToken do Calendar expirado para %s; sincronização completa", user_id)
+            await CalendarSyncService.clear(user_id, keep_calendars=True)
+            full = True
+            items, next_events_token = await CalendarSyncService._list_all(
+                client, "/calendars/primary/events", access_token, {"maxResults": 250}
+            )
+
+        changed, removed, sessions_updated = await CalendarSyncService._apply_event_changes(user_id, items, full)
+        calendars, calendars_token = await CalendarSyncService._sync_calendars(client, access_token, state)
+
+        await CalendarSyncService._state_ref(user_id).set({
+            "userId": user_id,
+            "eventsSyncToken": next_events_token,
+            "calendarsSyncToken": calendars_token,
+            "calendars": calendars,
+            "lastSyncAt": datetime.now(timezone.utc),
+        })
+        return {
+            "full": full,
+            "events_changed": changed,
+            "events_removed": removed,
+            "sessions_updated": sessions_updated,
+            "calendars": len(calendars),
+        }
+
+    @staticmethod
+    async def _sync_calendars(
+        client: httpx.AsyncClient,
+        access_token: str,
+        state: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        calendars: Dict[str, Any] = dict(state.get("calendars") or {})
+        token = state.get("calendarsSyncToken")
+        try:
+            items, next_token = await CalendarSyncService._list_all(
+                client, "/users/me/calendarList", access_token, {"syncToken": token} if token else {}
+            )
+        except CalendarSyncError as e:
+            if e.status_code != 410 or token is None:
+                raise
+            calendars = {}
+            items, next_token = await CalendarSyncService._list_all(client, "/users/me/calendarList", access_token, {})
+        for item in items:
+            if item.get("deleted"):
+                calendars.pop(item["id"], None)
+            else:
+                calendars[item["id"]] = item
+        return calendars, next_token
+
+    @staticmethod
+    async def _apply_event_changes(user_id: str, items: List[Dict[str, Any]], full: bool) -> Tuple[int, int, int]:
+        """
+        Aplica ao espelho os eventos alterados e reconcilia as study sessions
+
+        Os documentos do espelho (eventos removidos) e as sessões afetadas são
+        lidos com get_all, em lote, e as escritas seguem em batches; o custo
+        não cresce em idas ao Firestore por evento.
+
+        Args:
+            user_id: ID do utilizador
+            items: Eventos devolvidos pela listagem
+            full: Se é uma sincronização completa (espelho vazio: nada a remover)
+
+        Returns:
+            Tuple[int, int, int]: (eventos gravados, eventos removidos, sessões atualizadas)
+        """
+        events = CalendarSyncService._events(user_id)
+        removals = [
+            item["id"] for item in items
+            if not full and (item.get("status") == "cancelled" or not is_app_event(item))
+        ]
+        # Itens cancelados só trazem o ID: a sessão vem do espelho
+        mirrored = await get_documents(events, removals, fields=["sessionId"]) if removals else {}
+
+        writes: List[Tuple[str, Any, Optional[Dict[str, Any]]]] = []
+        moved: Dict[str, Dict[str, Any]] = {}
+        unlinked: Dict[str, str] = {}
+        now = datetime.now(timezone.utc)
+        for item in items:
+            ref = events.document(item["id"])
+            if item.get("status") == "cancelled" or not is_app_event(item):
+                doc = mirrored.get(item["id"])
+                if doc is None:
+                    continue
+                writes.append(("delete", ref, None))
+                session_id = (doc.to_dict() or {}).get("sessionId")
+                if session_id:
+                    unlinked[session_id] = item["id"]
+            else:
+                session_id = item["extendedProperties"]["private"].get("sessionId")
+                writes.append(("set", ref, {**item, "sessionId": session_id, "mirroredAt": now}))
+                if session_id:
+                    moved[session_id] = item
+
+        for start in range(0, len(writes), MIRROR_WRITE_BATCH):
+            batch = async_db.batch()
+            for op, ref, data in writes[start:start + MIRROR_WRITE_BATCH]:
+                if op == "delete":
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, data)
+            await batch.commit()
+        changed = sum(1 for op, _, _ in writes if op == "set")
+        removed = len(writes) - changed
+
+        sessions = await get_documents(
+            async_db.collection(StudySessionService.COLLECTION),
+            [*moved, *unlinked],
+            fields=["startTime", "endTime", "calendarEvent"],
+        ) if moved or unlinked else {}
+        updates: Dict[str, Dict[str, Any]] = {}
+        for session_id, doc in sessions.items():
+            data = doc.to_dict() or {}
+            if session_id in moved:
+                update = session_changes(data, moved[session_id])
+            elif data.get("calendarEvent") == unlinked[session_id]:
+                update = {"calendarEvent": None}
+            else:
+                update = {}
+            if update:
+                updates[session_id] = update
+        sessions_updated = len(await StudySessionService.update_many(updates)) if updates else 0
+        return changed, removed, sessions_updated
+
+    @staticmethod
+    async def ensure_synced(client: httpx.AsyncClient, user_id: str, access_token: str) -> None:
+        """Sincroniza se o espelho for mais antigo do que CALENDAR_SYNC_INTERVAL"""
+        state = await CalendarSyncService.get_state(user_id)
+        last = state.get("lastSyncAt")
+        if last is not None and (datetime.now(timezone.utc) - last).total_seconds() < CALENDAR_SYNC_INTERVAL:
+            return
+        await CalendarSyncService.sync(client, user_id, access_token)
+
+    @staticmethod
+    async def get_event(user_id: str, event_id: str) -> Optional[Dict[str, Any]]:
+        """Evento espelhado (None se não estiver no espelho)"""
+        doc = await CalendarSyncService._events(user_id).document(event_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        data.pop("mirroredAt", None)
+        data.pop("sessionId", None)
+        return data
+
+    @staticmethod
+    async def list_events(user_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Eventos espelhados, paginados pelo ID"""
+        docs, next_cursor = await paginate(CalendarSyncService._events(user_id), limit, cursor)
+        items = []
+        for doc in docs:
+            data = doc.to_dict()
+            data.pop("mirroredAt", None)
+            data.pop("sessionId", None)
+            items.append(data)
+        return items, next_cursor
+
+    @staticmethod
+    async def clear(user_id: str, keep_calendars: bool = False) -> None:
+        """Apaga o espelho de eventos do utilizador (e o estado, salvo keep_calendars)"""
+        events = CalendarSyncService._events(user_id)
+        while True:
+            docs, _ = await paginate(events.select([]), MIRROR_WRITE_BATCH)
+            if not docs:
+                break
+            batch = async_db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            await batch.commit()
+        if keep_calendars:
+            await CalendarSyncService._state_ref(user_id).set({"eventsSyncToken": None}, merge=True)
+        else:
+            await CalendarSyncService._state_ref(user_id).delete()
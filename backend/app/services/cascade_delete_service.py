@@ -0,0 +1,297 @@
+"""
+Eliminação em cascata de subjects e topics
+
+Apagar um subject apaga os seus topics e, de cada topic, as notes, slides,
+study sessions, AI requests (com as partes de documentos em
+`ai_requests/{id}/chunks`) e sugestões do YouTube. Os documentos são
+encontrados com filtros "in" sobre `topicId` (blocos de 30, em paralelo) e
+apagados em batches de 500, vários em simultâneo.
+
+A ordem é: partes dos documentos, filhos dos topics, topics e, por fim, o
+subject. Se a eliminação for interrompida, o que ficou continua alcançável
+a partir do subject/topics e uma nova execução termina o trabalho.
+
+Eliminações pequenas correm no próprio pedido; acima de
+CASCADE_DELETE_SYNC_LIMIT documentos é enfileirado um job (ver
+app/worker.py), cujo progresso fica na coleção "cascade_deletes".
+
+Configuração (variáveis de ambiente):
+    CASCADE_DELETE_SYNC_LIMIT: Documentos até aos quais a eliminação é feita
+        no pedido (padrão: 500)
+    CASCADE_DELETE_CONCURRENCY: Batches enviados em simultâneo (padrão: 4)
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from google.cloud.firestore_v1 import FieldFilter, Increment
+
+from app.models.cascade_delete import CascadeDeleteCounts, CascadeDeleteJob, CascadeDeleteStatus
+from app.services.ai_request_service import AIRequestService
+from app.services.cache_service import DocumentCache
+from app.services.document_chunk_service import DocumentChunkService
+from app.services.firebase_service import async_db
+from app.services.firestore_utils import count_documents, count_in, query_in
+from app.services.job_queue import Job, job_queue
+from app.services.note_service import NoteService
+from app.services.slide_service import SlideService
+from app.services.study_session_service import StudySessionService
+from app.services.subject_service import SubjectService
+from app.services.topic_service import TopicService
+from app.services.youtube_suggestion_service import YouTubeSuggestionService
+
+logger = logging.getLogger(__name__)
+
+CASCADE_DELETE_SYNC_LIMIT = int(os.getenv("CASCADE_DELETE_SYNC_LIMIT", "500"))
+CASCADE_DELETE_CONCURRENCY = int(os.getenv("CASCADE_DELETE_CONCURRENCY", "4"))
+
+#Eliminações por batch do Firestore (limite: 500)
+CASCADE_DELETE_BATCH = 500
+
+#Serviços das coleções com documentos de um topic (campo topicId)
+TOPIC_CHILDREN = (NoteService, SlideService, StudySessionService, AIRequestService, YouTubeSuggestionService)
+
+#Documento a apagar e cache onde pode estar (None para as partes)
+_Target = Tuple[Optional[DocumentCache], Any]
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+class CascadeDeleteService:
+    """
+    Eliminação em cascata (no pedido ou em segundo plano) e o seu progresso
+
+    Attributes:
+        KIND: Tipo dos jobs na fila ("cascade_delete")
+        COLLECTION: Coleção do progresso dos jobs ("cascade_deletes")
+    """
+    KIND = "cascade_delete"
+    COLLECTION = "cascade_deletes"
+
+    @staticmethod
+    async def _subject_topic_ids(subject_id: str) -> List[str]:
+        query = async_db.collection(TopicService.COLLECTION).where(
+            filter=FieldFilter("subjectId", "==", subject_id)
+        ).select([])
+        return [doc.id async for doc in query.stream()]
+
+    @staticmethod
+    async def _resolve(subject_id: Optional[str], topic_ids: Optional[Sequence[str]]) -> List[str]:
+        if subject_id is not None:
+            return await CascadeDeleteService._subject_topic_ids(subject_id)
+        return list(dict.fromkeys(topic_ids or []))
+
+    @staticmethod
+    async def count(subject_id: Optional[str] = None, topic_ids: Optional[Sequence[str]] = None) -> CascadeDeleteCounts:
+        """
+        Conta o que uma eliminação em cascata apagaria (dry-run)
+
+        Os totais das coleções vêm de aggregation queries, sem ler os
+        documentos; só os IDs dos AI requests são lidos, para contar as suas
+        partes.
+
+        Args:
+            subject_id: Subject a apagar (com todos os seus topics)
+            topic_ids: Topics a apagar (quando não é indicado um subject)
+
+        Returns:
+            CascadeDeleteCounts: Documentos por coleção e total
+        """
+        topic_ids = await CascadeDeleteService._resolve(subject_id, topic_ids)
+        counts: Dict[str, int] = {}
+        if subject_id is not None:
+            counts[SubjectService.COLLECTION] = 1
+        counts[TopicService.COLLECTION] = len(topic_ids)
+
+        if topic_ids:
+            totals = await asyncio.gather(*(
+                count_in(async_db.collection(service.COLLECTION), "topicId", topic_ids)
+                for service in TOPIC_CHILDREN
+            ))
+            counts.update({service.COLLECTION: total for service, total in zip(TOPIC_CHILDREN, totals)})
+            requests = await query_in(async_db.collection(AIRequestService.COLLECTION), "topicId", topic_ids, fields=[])
+            chunks = await asyncio.gather(*(
+                count_documents(doc.reference.collection(DocumentChunkService.COLLECTION)) for doc in requests
+            ))
+            counts[DocumentChunkService.COLLECTION] = sum(chunks)
+        else:
+            counts.update({service.COLLECTION: 0 for service in TOPIC_CHILDREN})
+            counts[DocumentChunkService.COLLECTION] = 0
+        return CascadeDeleteCounts(counts=counts, total=sum(counts.values()))
+
+    @staticmethod
+    async def _delete_targets(targets: List[_Target], on_progress: Optional[ProgressCallback]) -> int:
+        """Apaga os documentos em batches de 500, até CASCADE_DELETE_CONCURRENCY em paralelo"""
+        semaphore = asyncio.Semaphore(CASCADE_DELETE_CONCURRENCY)
+
+        async def commit(chunk: List[_Target]) -> None:
+            async with semaphore:
+                batch = async_db.batch()
+                for _, ref in chunk:
+                    batch.delete(ref)
+                await batch.commit()
+            for cache, ref in chunk:
+                if cache is not None:
+                    cache.invalidate(ref.id)
+            if on_progress is not None:
+                await on_progress(len(chunk))
+
+        chunks = [targets[i:i + CASCADE_DELETE_BATCH] for i in range(0, len(targets), CASCADE_DELETE_BATCH)]
+        await asyncio.gather(*(commit(chunk) for chunk in chunks))
+        return len(targets)
+
+    @staticmethod
+    async def delete(
+        subject_id: Optional[str] = None,
+        topic_ids: Optional[Sequence[str]] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> int:
+        """
+        Apaga um subject (ou uma lista de topics) e tudo o que deles depende
+
+        Args:
+            subject_id: Subject a apagar (com todos os seus topics)
+            topic_ids: Topics a apagar (quando não é indicado um subject)
+            on_progress: Chamado com o número de documentos de cada batch apagado
+
+        Returns:
+            int: Número de documentos apagados
+        """
+        topic_ids = await CascadeDeleteService._resolve(subject_id, topic_ids)
+        deleted = 0
+
+        if topic_ids:
+            children = await asyncio.gather(*(
+                query_in(async_db.collection(service.COLLECTION), "topicId", topic_ids, fields=[])
+                for service in TOPIC_CHILDREN
+            ))
+            child_targets: List[_Target] = [
+                (service.CACHE, doc.reference)
+                for service, docs in zip(TOPIC_CHILDREN, children) for doc in docs
+            ]
+            requests = children[TOPIC_CHILDREN.index(AIRequestService)]
+            chunk_docs = await asyncio.gather(*(
+                _stream_refs(doc.reference.collection(DocumentChunkService.COLLECTION)) for doc in requests
+            ))
+            chunk_targets: List[_Target] = [(None, ref) for refs in chunk_docs for ref in refs]
+
+            # Partes antes dos AI requests: uma subcoleção sem pai deixa de ser encontrada
+            deleted += await CascadeDeleteService._delete_targets(chunk_targets, on_progress)
+            deleted += await CascadeDeleteService._delete_targets(child_targets, on_progress)
+
+        topics = async_db.collection(TopicService.COLLECTION)
+        parents: List[_Target] = [(TopicService.CACHE, topics.document(topic_id)) for topic_id in topic_ids]
+        if subject_id is not None:
+            parents.append((SubjectService.CACHE, async_db.collection(SubjectService.COLLECTION).document(subject_id)))
+        deleted += await CascadeDeleteService._delete_targets(parents, on_progress)
+        return deleted
+
+    @staticmethod
+    async def delete_or_submit(
+        subject_id: Optional[str] = None,
+        topic_ids: Optional[Sequence[str]] = None,
+    ) -> Optional[CascadeDeleteJob]:
+        """
+        Apaga já (até CASCADE_DELETE_SYNC_LIMIT documentos) ou enfileira um job
+
+        Returns:
+            Optional[CascadeDeleteJob]: O job criado, ou None se a eliminação
+                já foi feita
+        """
+        counts = await CascadeDeleteService.count(subject_id, topic_ids)
+        if counts.total <= CASCADE_DELETE_SYNC_LIMIT:
+            await CascadeDeleteService.delete(subject_id, topic_ids)
+            return None
+        return await CascadeDeleteService.submit(counts, subject_id, topic_ids)
+
+    @staticmethod
+    async def submit(
+        counts: CascadeDeleteCounts,
+        subject_id: Optional[str] = None,
+        topic_ids: Optional[Sequence[str]] = None,
+    ) -> CascadeDeleteJob:
+        """
+        Regista o progresso (QUEUED) e enfileira a eliminação em segundo plano
+
+        Args:
+            counts: Contagem prévia (ver count), usada como total do progresso
+            subject_id: Subject a apagar
+            topic_ids: Topics a apagar (quando não é indicado um subject)
+
+        Returns:
+            CascadeDeleteJob: Estado inicial do job
+        """
+        job = Job(
+            kind=CascadeDeleteService.KIND,
+            payload={"subjectId": subject_id, "topicIds": list(topic_ids or []) if subject_id is None else []},
+        )
+        progress = CascadeDeleteJob(
+            jobId=job.job_id,
+            subjectId=subject_id,
+            topicIds=job.payload["topicIds"],
+            counts=counts.counts,
+            total=counts.total,
+            createdAt=datetime.utcnow(),
+        )
+        await async_db.collection(CascadeDeleteService.COLLECTION).document(job.job_id).set(
+            progress.model_dump(exclude={"jobId"})
+        )
+        await job_queue.enqueue(job)
+        return progress
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[CascadeDeleteJob]:
+        """
+        Busca o progresso de uma eliminação em segundo plano
+
+        Returns:
+            Optional[CascadeDeleteJob]: Progresso, ou None se o job não existir
+        """
+        doc = await async_db.collection(CascadeDeleteService.COLLECTION).document(job_id).get()
+        if not doc.exists:
+            return None
+        return CascadeDeleteJob(jobId=doc.id, **doc.to_dict())
+
+    @staticmethod
+    async def _set_progress(job_id: str, **fields: Any) -> None:
+        await async_db.collection(CascadeDeleteService.COLLECTION).document(job_id).set(
+            {**fields, "updatedAt": datetime.utcnow()}, merge=True
+        )
+
+    @staticmethod
+    async def process(job: Job) -> None:
+        """
+        Processa um job de eliminação, registando o progresso a cada batch
+
+        Uma nova tentativa recomeça a contagem de `deleted` e apaga apenas o
+        que a anterior deixou.
+        """
+        job_id = job.job_id
+
+        async def on_progress(count: int) -> None:
+            await CascadeDeleteService._set_progress(job_id, deleted=Increment(count))
+
+        await CascadeDeleteService._set_progress(
+            job_id, status=CascadeDeleteStatus.RUNNING, deleted=0, attempts=job.attempts, error=None
+        )
+        await CascadeDeleteService.delete(job.payload.get("subjectId"), job.payload.get("topicIds"), on_progress)
+        await CascadeDeleteService._set_progress(job_id, status=CascadeDeleteStatus.COMPLETED)
+
+    @staticmethod
+    async def on_retry(job: Job, error: str) -> None:
+        """Volta a marcar QUEUED (com o erro) um job que vai ser repetido"""
+        await CascadeDeleteService._set_progress(
+            job.job_id, status=CascadeDeleteStatus.QUEUED, error=error, attempts=job.attempts
+        )
+
+    @staticmethod
+    async def on_dead_letter(job: Job, error: str) -> None:
+        """Marca como FAILED um job cujas tentativas se esgotaram"""
+        await CascadeDeleteService._set_progress(
+            job.job_id, status=CascadeDeleteStatus.FAILED, error=error, attempts=job.attempts
+        )
+
+
+async def _stream_refs(collection) -> List[Any]:
+    return [doc.reference async for doc in collection.select([]).stream()]
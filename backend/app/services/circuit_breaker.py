@@ -0,0 +1,147 @@
+"""
+Circuit breaker e janela de latências para chamadas a serviços externos
+
+Um circuito abre após falhas consecutivas (ou imediatamente, para erros que
+indicam indisponibilidade certa, como 404/429) e fica aberto durante um
+período de recuperação. Depois desse período passa a semi-aberto: só uma
+chamada de teste (probe) é deixada passar, e o seu resultado decide se o
+circuito fecha (sucesso) ou volta a abrir (falha). As outras chamadas são
+recusadas enquanto o probe não terminar.
+"""
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (fechado / aberto / semi-aberto)
+
+    Attributes:
+        failure_threshold: Falhas consecutivas que abrem o circuito
+        recovery_timeout: Segundos que o circuito fica aberto antes de semi-abrir
+        probe_timeout: Segundos após os quais um probe sem resultado é
+            abandonado e outra chamada pode testar o circuito
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, recovery_timeout: float = 60.0, probe_timeout: Optional[float] = None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe_timeout = probe_timeout if probe_timeout is not None else recovery_timeout
+        self.probe_started_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.open_for = recovery_timeout
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Estado atual (a passagem de aberto para semi-aberto é feita pelo tempo)"""
+        if self.opened_at is None:
+            return CircuitBreaker.CLOSED
+        if time.monotonic() - self.opened_at >= self.open_for:
+            return CircuitBreaker.HALF_OPEN
+        return CircuitBreaker.OPEN
+
+    def allows_requests(self) -> bool:
+        """
+        Indica se uma chamada pode ser feita
+
+        Com o circuito semi-aberto, a primeira chamada fica com o probe e as
+        seguintes são recusadas até record_success, record_failure ou
+        release_probe. Quem recebe True deve, por isso, registar sempre o
+        resultado (ou libertar o probe se a chamada não chegar a terminar).
+        """
+        state = self.state
+        if state == CircuitBreaker.CLOSED:
+            return True
+        if state == CircuitBreaker.OPEN:
+            return False
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < self.probe_timeout:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def release_probe(self) -> None:
+        """Liberta o probe sem resultado (ex: chamada cancelada)"""
+        self.probe_started_at = None
+
+    def record_success(self) -> None:
+        """Regista um sucesso e fecha o circuito"""
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self, trip: bool = False, open_for: Optional[float] = None) -> None:
+        """
+        Regista uma falha
+
+        Args:
+            trip: Abre o circuito imediatamente, sem esperar pelo limite de falhas
+            open_for: Segundos que o circuito fica aberto (padrão: recovery_timeout)
+        """
+        self.consecutive_failures += 1
+        if (
+            trip
+            or self.consecutive_failures >= self.failure_threshold
+            or self.state == CircuitBreaker.HALF_OPEN
+        ):
+            self.opened_at = time.monotonic()
+            self.open_for = open_for if open_for is not None else self.recovery_timeout
+            self.times_opened += 1
+        self.probe_started_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado do circuito (para métricas)"""
+        state = self.state
+        remaining = None
+        if state == CircuitBreaker.OPEN:
+            remaining = round(self.open_for - (time.monotonic() - self.opened_at), 1)
+        return {
+            "state": state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "probe_in_flight": state == CircuitBreaker.HALF_OPEN and self.probe_started_at is not None,
+            "open_seconds_remaining": remaining,
+        }
+
+
+class LatencyWindow:
+    """
+    Janela deslizante das últimas latências observadas
+
+    Attributes:
+        size: Número máximo de amostras guardadas
+    """
+
+    def __init__(self, size: int = 100):
+        self.size = size
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        """Adiciona uma amostra de latência (em segundos)"""
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Percentil das amostras (método nearest-rank)
+
+        Args:
+            p: Percentil entre 0 e 1 (ex: 0.95)
+
+        Returns:
+            Optional[float]: Latência em segundos, ou None se não houver amostras
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = max(0, min(len(ordered) - 1, math.ceil(p * len(ordered)) - 1))
+        return ordered[index]
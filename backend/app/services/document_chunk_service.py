@@ -0,0 +1,103 @@
+"""
+Serviço para as partes de documentos grandes associadas a um AI request
+
+As partes ficam na subcoleção `ai_requests/{requestId}/chunks`, com IDs
+sequenciais com zeros à esquerda (a ordem do documento é a ordem dos IDs).
+Cada parte guarda o texto original e, depois da fase map, o seu resumo, o
+que permite retomar o processamento sem repetir partes já resumidas.
+"""
+from app.services.firebase_service import async_db
+from app.services.firestore_utils import paginate
+from typing import AsyncIterator, Optional, Tuple
+
+#Escritas por batch ao gravar as partes (limite do Firestore: 500)
+CHUNK_WRITE_BATCH = 20
+
+
+class DocumentChunkService:
+    """
+    Serviço para gravar, percorrer e apagar as partes de um documento
+
+    Attributes:
+        PARENT_COLLECTION: Coleção dos AI requests ("ai_requests")
+        COLLECTION: Nome da subcoleção das partes ("chunks")
+    """
+    PARENT_COLLECTION = "ai_requests"
+    COLLECTION = "chunks"
+
+    @staticmethod
+    def _collection(request_id: str):
+        return async_db.collection(DocumentChunkService.PARENT_COLLECTION).document(request_id).collection(
+            DocumentChunkService.COLLECTION
+        )
+
+    @staticmethod
+    async def save_chunks(request_id: str, chunks: AsyncIterator[str]) -> int:
+        """
+        Grava as partes à medida que são produzidas (em batches pequenos)
+
+        Args:
+            request_id: ID do AI request
+            chunks: Partes do documento, pela ordem original
+
+        Returns:
+            int: Número de partes gravadas
+        """
+        collection = DocumentChunkService._collection(request_id)
+        batch = async_db.batch()
+        pending = 0
+        count = 0
+        async for text in chunks:
+            batch.set(collection.document(f"{count:06d}"), {"index": count, "text": text, "summary": None})
+            count += 1
+            pending += 1
+            if pending >= CHUNK_WRITE_BATCH:
+                await batch.commit()
+                batch = async_db.batch()
+                pending = 0
+        if pending:
+            await batch.commit()
+        return count
+
+    @staticmethod
+    async def iter_chunks(request_id: str, page_size: int) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        """
+        Percorre as partes por páginas, pela ordem do documento
+
+        Yields:
+            Tuple[str, str, Optional[str]]: (ID da parte, texto, resumo ou None)
+        """
+        collection = DocumentChunkService._collection(request_id)
+        cursor = None
+        while True:
+            docs, cursor = await paginate(collection, page_size, cursor)
+            for doc in docs:
+                data = doc.to_dict()
+                yield doc.id, data.get("text", ""), data.get("summary")
+            if cursor is None:
+                return
+
+    @staticmethod
+    async def set_summary(request_id: str, chunk_id: str, summary: str) -> None:
+        """Grava o resumo de uma parte"""
+        await DocumentChunkService._collection(request_id).document(chunk_id).update({"summary": summary})
+
+    @staticmethod
+    async def delete_chunks(request_id: str) -> int:
+        """
+        Apaga todas as partes de um AI request
+
+        Returns:
+            int: Número de partes apagadas
+        """
+        collection = DocumentChunkService._collection(request_id)
+        deleted = 0
+        while True:
+            docs, _ = await paginate(collection.select([]), CHUNK_WRITE_BATCH * 10)
+            if not docs:
+                return deleted
+            batch = async_db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            await batch.commit()
+            deleted += len(docs)
@@ -1,9 +1,14 @@
 """
 Serviço Firebase para o backend BrainBudy.
 Inicializa o Firebase Admin SDK e fornece acesso ao Firestore.
+
+Expõe dois clientes:
+    db: Cliente síncrono (scripts e ferramentas de linha de comando)
+    async_db: Cliente assíncrono (AsyncClient) usado pelos serviços e rotas,
+        para que os acessos ao Firestore não bloqueiem o event loop do uvicorn
 """
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 import os
 from pathlib import Path
 
@@ -25,6 +30,7 @@ if not firebase_admin._apps:
 
 #Inicializar serviços
 db = firestore.client()
+async_db = firestore_async.client()
 
-__all__ = ['db']
+__all__ = ['db', 'async_db']
 
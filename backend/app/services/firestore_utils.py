@@ -0,0 +1,216 @@
+"""
+Funções auxiliares partilhadas pelos serviços do Firestore
+"""
+from app.services.firebase_service import async_db
+#Reexportados: os serviços importam os tamanhos de página daqui
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
+from google.api_core.exceptions import FailedPrecondition, NotFound
+from google.cloud.firestore_v1 import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+
+#Número de tentativas otimistas antes de desistir da pré-condição
+UPDATE_MAX_ATTEMPTS = 3
+
+#Máximo de valores num filtro "in" do Firestore
+IN_QUERY_MAX_VALUES = 30
+
+#Documentos pedidos por chamada a get_all (leituras em lote por ID)
+GET_ALL_MAX_DOCUMENTS = 100
+
+
+async def paginate(query, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    Executa uma query paginada ordenada pelo ID do documento
+
+    A ordenação por `__name__` é estável e combina com filtros de igualdade
+    sem exigir índices compostos. É pedido um documento a mais do que `limit`
+    para saber se existe uma página seguinte.
+
+    Args:
+        query: Query (ou coleção) do AsyncClient, já com os filtros aplicados
+        limit: Número máximo de documentos a devolver
+        cursor: Cursor opaco devolvido pela página anterior
+
+    Returns:
+        Tuple[List[DocumentSnapshot], Optional[str]]: Documentos da página e
+            cursor da página seguinte (None se esta for a última)
+
+    Raises:
+        InvalidCursorError: Se o cursor for inválido
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = query.order_by(FieldPath.document_id())
+    if cursor:
+        query = query.start_after({FieldPath.document_id(): decode_cursor(cursor)})
+
+    docs = [doc async for doc in query.limit(limit + 1).stream()]
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, encode_cursor(docs[-1].id)
+    return docs, None
+
+
+async def update_document(
+    collection: str,
+    doc_id: str,
+    update_data: Dict[str, Any],
+    snapshot: Optional[Tuple[Dict[str, Any], Any]] = None,
+) -> Optional[Tuple[Dict[str, Any], Any]]:
+    """
+    Atualiza um documento e devolve o documento resultante sem reler do Firestore
+
+    A escrita é feita com pré-condição `last_update_time` sobre um snapshot
+    conhecido, e o patch é aplicado localmente sobre esse snapshot. Se o
+    snapshot vier do cache, a atualização custa um único round trip. Se não
+    houver snapshot (ou se ele estiver desatualizado), o documento é lido e a
+    escrita é repetida de forma otimista.
+
+    Args:
+        collection: Nome da coleção no Firestore
+        doc_id: ID do documento a ser atualizado
+        update_data: Campos a atualizar (apenas campos de primeiro nível)
+        snapshot: Tupla opcional (dados, update_time) conhecida do documento
+
+    Returns:
+        Optional[Tuple[dict, Any]]: (dados atualizados, novo update_time),
+            ou None se o documento não existir
+    """
+    doc_ref = async_db.collection(collection).document(doc_id)
+
+    for _ in range(UPDATE_MAX_ATTEMPTS):
+        if snapshot is None or snapshot[1] is None:
+            doc = await doc_ref.get()
+            if not doc.exists:
+                return None
+            snapshot = (doc.to_dict(), doc.update_time)
+
+        data, version = snapshot
+        try:
+            result = await doc_ref.update(
+                update_data, option=async_db.write_option(last_update_time=version)
+            )
+        except NotFound:
+            return None
+        except FailedPrecondition:
+            # Snapshot desatualizado: reler e tentar novamente
+            snapshot = None
+            continue
+        return {**data, **update_data}, result.update_time
+
+    # Documento sob escrita concorrente: escrever sem pré-condição e reler
+    try:
+        await doc_ref.update(update_data)
+    except NotFound:
+        return None
+    doc = await doc_ref.get()
+    if not doc.exists:
+        return None
+    return doc.to_dict(), doc.update_time
+
+
+async def count_documents(query) -> int:
+    """
+    Conta os documentos de uma query no servidor (aggregation query)
+
+    O Firestore devolve apenas o total, sem transferir os documentos;
+    o custo é de uma leitura por cada 1000 entradas de índice.
+
+    Args:
+        query: Query (ou coleção) do AsyncClient, já com os filtros aplicados
+
+    Returns:
+        int: Número de documentos que satisfazem a query
+    """
+    results = await query.count(alias="total").get()
+    for aggregation in results:
+        for result in aggregation:
+            if result.alias == "total":
+                return int(result.value)
+    return 0
+
+
+async def query_in(collection, field: str, values: Sequence[Any], fields: Optional[List[str]] = None) -> List[Any]:
+    """
+    Busca os documentos cujo `field` está em `values`, em blocos de 30 valores
+
+    O Firestore aceita no máximo IN_QUERY_MAX_VALUES valores por filtro "in";
+    os blocos são consultados em paralelo e os resultados concatenados.
+
+    Args:
+        collection: Coleção (ou query) do AsyncClient
+        field: Campo filtrado
+        values: Valores aceites (duplicados são ignorados)
+        fields: Campos a devolver (projeção); None devolve o documento inteiro
+
+    Returns:
+        List[DocumentSnapshot]: Documentos encontrados, sem ordem garantida
+    """
+    unique = list(dict.fromkeys(values))
+
+    async def _fetch(chunk: List[Any]) -> List[Any]:
+        query = collection.where(filter=FieldFilter(field, "in", chunk))
+        if fields is not None:
+            query = query.select(fields)
+        return [doc async for doc in query.stream()]
+
+    chunks = [unique[i:i + IN_QUERY_MAX_VALUES] for i in range(0, len(unique), IN_QUERY_MAX_VALUES)]
+    results = await asyncio.gather(*(_fetch(chunk) for chunk in chunks))
+    return [doc for docs in results for doc in docs]
+
+
+async def get_documents(collection, doc_ids: Sequence[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Lê vários documentos de uma coleção pelo ID com get_all
+
+    Os IDs são divididos em blocos de GET_ALL_MAX_DOCUMENTS, pedidos em
+    paralelo, em vez de uma leitura por documento.
+
+    Args:
+        collection: Coleção do AsyncClient
+        doc_ids: IDs dos documentos (duplicados são ignorados)
+        fields: Campos a devolver (projeção); None devolve o documento inteiro
+
+    Returns:
+        Dict[str, DocumentSnapshot]: Documentos existentes por ID (os que não
+            existem ficam de fora)
+    """
+    unique = list(dict.fromkeys(doc_ids))
+
+    async def _fetch(chunk: List[str]) -> List[Any]:
+        refs = [collection.document(doc_id) for doc_id in chunk]
+        return [doc async for doc in async_db.get_all(refs, field_paths=fields)]
+
+    chunks = [unique[i:i + GET_ALL_MAX_DOCUMENTS] for i in range(0, len(unique), GET_ALL_MAX_DOCUMENTS)]
+    results = await asyncio.gather(*(_fetch(chunk) for chunk in chunks))
+    return {doc.id: doc for docs in results for doc in docs if doc.exists}
+
+
+async def count_in(collection, field: str, values: Sequence[Any]) -> int:
+    """
+    Conta no servidor os documentos cujo `field` está em `values`
+
+    Os valores são divididos em blocos de IN_QUERY_MAX_VALUES, contados em
+    paralelo com aggregation queries (ver count_documents).
+
+    Args:
+        collection: Coleção (ou query) do AsyncClient
+        field: Campo filtrado
+        values: Valores aceites (duplicados são ignorados)
+
+    Returns:
+        int: Número total de documentos
+    """
+    unique = list(dict.fromkeys(values))
+    chunks = [unique[i:i + IN_QUERY_MAX_VALUES] for i in range(0, len(unique), IN_QUERY_MAX_VALUES)]
+    totals = await asyncio.gather(*(
+        count_documents(collection.where(filter=FieldFilter(field, "in", chunk))) for chunk in chunks
+    ))
+    return sum(totals)
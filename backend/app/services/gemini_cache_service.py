@@ -0,0 +1,247 @@
+"""
+Cache de respostas do Gemini endereçado por conteúdo
+
+Gerações com o mesmo modelo, prompt completo (incluindo contexto) e
+configuração de geração devolvem o mesmo resultado guardado, em vez de uma
+nova chamada paga à API. A chave é o SHA-256 desses três elementos.
+
+O cache tem dois níveis:
+    memória: LRU limitado em bytes, com TTL por entrada (cachetools.TLRUCache)
+    Firestore: coleção "gemini_cache", partilhada entre workers e reinícios.
+        Cada documento guarda `expiresAt`; configure uma TTL policy do
+        Firestore sobre esse campo para que as entradas expiradas sejam
+        removidas automaticamente. O número de documentos é limitado a
+        GEMINI_CACHE_MAX_DOCUMENTS: a cada GEMINI_CACHE_PRUNE_INTERVAL
+        gravações, os documentos mais antigos (createdAt) acima do limite
+        são apagados
+
+Configuração (variáveis de ambiente):
+    GEMINI_CACHE_ENABLED: "false" desativa o cache (padrão: "true")
+    GEMINI_CACHE_PERSISTENT: "false" usa apenas o nível em memória (padrão: "true")
+    GEMINI_CACHE_TTL: Tempo de vida padrão de cada entrada em segundos (padrão: 7 dias)
+    GEMINI_CACHE_MEMORY_BYTES: Tamanho máximo do nível em memória (padrão: 32 MiB)
+    GEMINI_CACHE_MAX_ENTRY_BYTES: Maior resposta que pode ser guardada (padrão: 512 KiB)
+    GEMINI_CACHE_MAX_DOCUMENTS: Máximo de documentos no nível Firestore (padrão: 10000)
+    GEMINI_CACHE_PRUNE_INTERVAL: Gravações entre duas podas do nível Firestore (padrão: 100)
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from cachetools import TLRUCache
+
+from app.services.firebase_service import async_db
+
+logger = logging.getLogger(__name__)
+
+GEMINI_CACHE_ENABLED = os.getenv("GEMINI_CACHE_ENABLED", "true").lower() != "false"
+GEMINI_CACHE_PERSISTENT = os.getenv("GEMINI_CACHE_PERSISTENT", "true").lower() != "false"
+GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600)))
+GEMINI_CACHE_MEMORY_BYTES = int(os.getenv("GEMINI_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+GEMINI_CACHE_MAX_ENTRY_BYTES = int(os.getenv("GEMINI_CACHE_MAX_ENTRY_BYTES", str(512 * 1024)))
+GEMINI_CACHE_MAX_DOCUMENTS = int(os.getenv("GEMINI_CACHE_MAX_DOCUMENTS", "10000"))
+GEMINI_CACHE_PRUNE_INTERVAL = int(os.getenv("GEMINI_CACHE_PRUNE_INTERVAL", "100"))
+
+#Limite de operações por batch do Firestore
+_DELETE_BATCH = 500
+
+
+def _entry_size(entry: Dict[str, Any]) -> int:
+    return len(entry["response"].encode("utf-8")) + len(entry.get("model_used") or "")
+
+
+def _entry_expiry(key: str, entry: Dict[str, Any], now: float) -> float:
+    return entry["expires_at"]
+
+
+class GeminiResponseCache:
+    """
+    Cache de dois níveis (memória + Firestore) para respostas do Gemini
+
+    Attributes:
+        COLLECTION: Nome da coleção do nível persistente ("gemini_cache")
+    """
+    COLLECTION = "gemini_cache"
+
+    def __init__(
+        self,
+        memory_bytes: int = GEMINI_CACHE_MEMORY_BYTES,
+        default_ttl: float = GEMINI_CACHE_TTL,
+        max_entry_bytes: int = GEMINI_CACHE_MAX_ENTRY_BYTES,
+        persistent: bool = GEMINI_CACHE_PERSISTENT,
+        max_documents: int = GEMINI_CACHE_MAX_DOCUMENTS,
+        prune_interval: int = GEMINI_CACHE_PRUNE_INTERVAL,
+    ):
+        self.enabled = GEMINI_CACHE_ENABLED
+        self.persistent = persistent
+        self.default_ttl = default_ttl
+        self.max_entry_bytes = max_entry_bytes
+        self.max_documents = max_documents
+        self.prune_interval = max(prune_interval, 1)
+        self._writes_since_prune = 0
+        # O relógio é time.time para que expires_at coincida com o guardado no Firestore
+        self._memory = TLRUCache(
+            maxsize=memory_bytes, ttu=_entry_expiry, timer=time.time, getsizeof=_entry_size
+        )
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped_too_large = 0
+        self.pruned = 0
+
+    @staticmethod
+    def make_key(model: str, full_prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Calcula a chave (SHA-256) de uma geração
+
+        Args:
+            model: Modelo pedido
+            full_prompt: Prompt completo enviado ao modelo (com contexto)
+            generation_config: Configuração de geração (temperature, etc.)
+
+        Returns:
+            str: Hash hexadecimal que identifica a geração
+        """
+        material = json.dumps(
+            {"model": model, "prompt": full_prompt, "config": generation_config or {}},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma resposta em cache (memória primeiro, depois Firestore)
+
+        Returns:
+            Optional[dict]: {"response": str, "model_used": str} ou None
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            self.memory_hits += 1
+            return {"response": entry["response"], "model_used": entry["model_used"]}
+
+        if self.persistent:
+            try:
+                doc = await async_db.collection(GeminiResponseCache.COLLECTION).document(key).get()
+            except Exception:
+                logger.debug("Falha ao ler cache persistente do Gemini", exc_info=True)
+                doc = None
+            if doc is not None and doc.exists:
+                data = doc.to_dict()
+                expires_at = data.get("expiresAt")
+                if expires_at is not None and expires_at.timestamp() > time.time():
+                    self.persistent_hits += 1
+                    entry = {
+                        "response": data["response"],
+                        "model_used": data.get("model_used"),
+                        "expires_at": expires_at.timestamp(),
+                    }
+                    self._remember(key, entry)
+                    return {"response": entry["response"], "model_used": entry["model_used"]}
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, response: str, model_used: str, ttl: Optional[float] = None) -> None:
+        """
+        Guarda uma resposta nos dois níveis
+
+        Args:
+            key: Chave obtida com make_key
+            response: Texto gerado
+            model_used: Modelo que gerou a resposta
+            ttl: Tempo de vida desta entrada em segundos (padrão: GEMINI_CACHE_TTL)
+        """
+        if not self.enabled:
+            return
+        entry = {
+            "response": response,
+            "model_used": model_used,
+            "expires_at": time.time() + (ttl if ttl is not None else self.default_ttl),
+        }
+        size = _entry_size(entry)
+        if size > self.max_entry_bytes:
+            self.skipped_too_large += 1
+            return
+
+        self.stores += 1
+        self._remember(key, entry)
+        if self.persistent:
+            try:
+                await async_db.collection(GeminiResponseCache.COLLECTION).document(key).set({
+                    "response": response,
+                    "model_used": model_used,
+                    "size": size,
+                    "createdAt": datetime.now(timezone.utc),
+                    "expiresAt": datetime.fromtimestamp(entry["expires_at"], tz=timezone.utc),
+                })
+            except Exception:
+                logger.debug("Falha ao gravar cache persistente do Gemini", exc_info=True)
+                return
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.prune_interval:
+                self._writes_since_prune = 0
+                await self._prune()
+
+    async def _prune(self) -> None:
+        """Apaga os documentos mais antigos acima de max_documents"""
+        collection = async_db.collection(GeminiResponseCache.COLLECTION)
+        try:
+            result = await collection.count().get()
+            excess = int(result[0][0].value) - self.max_documents
+            if excess <= 0:
+                return
+            oldest = collection.order_by("createdAt").limit(excess).select([])
+            batch = async_db.batch()
+            pending = 0
+            async for doc in oldest.stream():
+                batch.delete(doc.reference)
+                pending += 1
+                if pending == _DELETE_BATCH:
+                    await batch.commit()
+                    self.pruned += pending
+                    batch = async_db.batch()
+                    pending = 0
+            if pending:
+                await batch.commit()
+                self.pruned += pending
+        except Exception:
+            logger.debug("Falha ao podar cache persistente do Gemini", exc_info=True)
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            self._memory[key] = entry
+        except ValueError:
+            # Entrada maior do que todo o nível em memória
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do cache de respostas (para métricas)"""
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "persistent": self.persistent,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory.currsize,
+            "memory_max_bytes": self._memory.maxsize,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "skipped_too_large": self.skipped_too_large,
+            "pruned": self.pruned,
+        }
+
+
+response_cache = GeminiResponseCache()
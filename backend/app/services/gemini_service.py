@@ -0,0 +1,290 @@
+"""
+Serviço de acesso à API do Gemini (configuração e descoberta de modelos)
+
+A lista de modelos disponíveis é obtida uma vez no arranque da aplicação,
+guardada em memória com TTL e atualizada em segundo plano, em vez de ser
+pedida à API antes de cada geração. Uma atualização imediata só é forçada
+quando um modelo responde 404 (modelo removido ou renomeado).
+
+A saúde de cada modelo é acompanhada por um circuit breaker e por uma
+janela de latências (ver GeminiModelHealth), usados pelo fallback entre
+modelos para saltar modelos em falha e decidir quando lançar um pedido
+de cobertura (hedge) para o modelo seguinte.
+
+Configuração (variáveis de ambiente):
+    GEMINI_API_KEY: Chave da API do Gemini
+    GEMINI_MODEL: Modelo preferido (padrão: "gemini-pro")
+    GEMINI_MODELS_TTL: Segundos até a lista de modelos ser atualizada (padrão: 3600)
+    GEMINI_REQUEST_DEADLINE: Tempo total por geração, somando todos os modelos (padrão: 45)
+    GEMINI_MODEL_TIMEOUT: Tempo máximo de uma tentativa num modelo (padrão: 30)
+    GEMINI_BREAKER_FAILURES: Falhas consecutivas que abrem o circuito de um modelo (padrão: 3)
+    GEMINI_BREAKER_COOLDOWN: Segundos que o circuito fica aberto (padrão: 60)
+    GEMINI_BREAKER_NOT_FOUND_COOLDOWN: Segundos de circuito aberto após um 404 (padrão: 3600)
+    GEMINI_HEDGE_ENABLED: "true" ativa pedidos de cobertura (padrão: "false")
+    GEMINI_HEDGE_PERCENTILE: Percentil de latência que dispara o hedge (padrão: 0.95)
+    GEMINI_HEDGE_DELAY: Atraso do hedge enquanto não há amostras suficientes (padrão: 5)
+    GEMINI_HEDGE_MIN_SAMPLES: Amostras necessárias para usar o percentil (padrão: 20)
+    GEMINI_MAX_CONCURRENCY: Chamadas simultâneas ao Gemini (padrão: 8)
+    GEMINI_RPM: Pedidos por minuto admitidos (padrão: 60)
+    GEMINI_TPM: Tokens de entrada por minuto admitidos (padrão: 1000000)
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.services.circuit_breaker import CircuitBreaker, LatencyWindow
+from app.services.rate_limiter import AdmissionController
+
+logger = logging.getLogger(__name__)
+
+# API do Gemini - versão gratuita
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+GEMINI_MODELS_TTL = float(os.getenv("GEMINI_MODELS_TTL", "3600"))
+GEMINI_REQUEST_DEADLINE = float(os.getenv("GEMINI_REQUEST_DEADLINE", "45"))
+GEMINI_MODEL_TIMEOUT = float(os.getenv("GEMINI_MODEL_TIMEOUT", "30"))
+GEMINI_BREAKER_FAILURES = int(os.getenv("GEMINI_BREAKER_FAILURES", "3"))
+GEMINI_BREAKER_COOLDOWN = float(os.getenv("GEMINI_BREAKER_COOLDOWN", "60"))
+GEMINI_BREAKER_NOT_FOUND_COOLDOWN = float(os.getenv("GEMINI_BREAKER_NOT_FOUND_COOLDOWN", "3600"))
+GEMINI_HEDGE_ENABLED = os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() == "true"
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0.95"))
+GEMINI_HEDGE_DELAY = float(os.getenv("GEMINI_HEDGE_DELAY", "5"))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa grosseira do número de tokens de um texto (~4 caracteres por token)
+
+    Usada apenas para o limite de tokens por minuto; não substitui o countTokens da API.
+    """
+    return max(1, len(text) // 4)
+
+
+async def list_available_models(client: httpx.AsyncClient) -> List[str]:
+    """
+    Lista modelos disponíveis via API. Útil para debug / fallback dinâmico.
+    Retorna uma lista de model ids (strings) — se falhar, retorna lista vazia.
+    """
+    try:
+        url = f"{GEMINI_API_URL}/models"
+        r = await client.get(url, params={"key": GEMINI_API_KEY}, timeout=10.0)
+        if r.status_code == 200:
+            data = r.json()
+            models = []
+            for m in data.get("models", []):
+                # cada item tem 'name' ou 'id' dependendo da resposta — adaptamos
+                name = m.get("name") or m.get("id") or m.get("model")
+                if name:
+                    models.append(name)
+            return models
+    except Exception as e:
+        logger.debug("Não foi possível listar modelos: %s", e)
+    return []
+
+
+class GeminiModelCatalog:
+    """
+    Cache da lista de modelos disponíveis no Gemini
+
+    Attributes:
+        ttl: Segundos até a lista ser considerada desatualizada
+        models: Última lista obtida com sucesso (vazia se nunca obtida)
+        fetched_at: Instante (time.monotonic) da última atualização bem-sucedida
+        refreshes: Número de pedidos feitos à API de listagem
+    """
+
+    def __init__(self, ttl: float = GEMINI_MODELS_TTL):
+        self.ttl = ttl
+        self.models: List[str] = []
+        self.fetched_at: Optional[float] = None
+        self.refreshes = 0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._background_task: Optional[asyncio.Task] = None
+
+    def is_stale(self) -> bool:
+        """Indica se a lista nunca foi obtida ou já passou do TTL"""
+        return self.fetched_at is None or time.monotonic() - self.fetched_at > self.ttl
+
+    async def refresh(self, client: httpx.AsyncClient) -> List[str]:
+        """
+        Pede a lista de modelos à API e atualiza o cache
+
+        Chamadas concorrentes partilham o mesmo pedido. Se a API falhar ou
+        devolver uma lista vazia, a lista anterior é mantida.
+        """
+        async with self._lock:
+            self.refreshes += 1
+            models = await list_available_models(client)
+            if models:
+                self.models = models
+                self.fetched_at = time.monotonic()
+            return self.models
+
+    def request_refresh(self, client: httpx.AsyncClient) -> None:
+        """
+        Agenda uma atualização em segundo plano (sem bloquear o chamador)
+
+        Usado quando um modelo responde 404: a requisição atual continua com
+        o fallback e as seguintes já usam a lista atualizada.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh(client))
+
+    async def get_models(self, client: httpx.AsyncClient) -> List[str]:
+        """
+        Retorna a lista de modelos em cache
+
+        Apenas o primeiro uso (se o arranque não conseguiu obter a lista)
+        espera pela API; uma lista expirada é devolvida de imediato e
+        atualizada em segundo plano.
+        """
+        if self.fetched_at is None and not self.models:
+            return await self.refresh(client)
+        if self.is_stale():
+            self.request_refresh(client)
+        return self.models
+
+    async def start(self, client: httpx.AsyncClient) -> None:
+        """
+        Obtém a lista inicial e inicia a atualização periódica (lifespan)
+        """
+        if not GEMINI_API_KEY:
+            return
+        await self.refresh(client)
+        self._background_task = asyncio.create_task(self._refresh_periodically(client))
+
+    async def stop(self) -> None:
+        """Cancela as tarefas de atualização em segundo plano (shutdown)"""
+        for task in (self._background_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._background_task = None
+        self._refresh_task = None
+
+    async def _refresh_periodically(self, client: httpx.AsyncClient) -> None:
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.refresh(client)
+            except Exception:
+                logger.debug("Falha ao atualizar lista de modelos do Gemini", exc_info=True)
+
+    def stats(self) -> dict:
+        """Estado do cache de modelos (para métricas)"""
+        age = time.monotonic() - self.fetched_at if self.fetched_at is not None else None
+        return {
+            "models": len(self.models),
+            "age_seconds": round(age, 1) if age is not None else None,
+            "ttl": self.ttl,
+            "stale": self.is_stale(),
+            "refreshes": self.refreshes,
+        }
+
+
+class GeminiModelHealth:
+    """
+    Circuit breaker e latências observadas de cada modelo do Gemini
+
+    404 (modelo inexistente) e 429 (quota esgotada) abrem o circuito do
+    modelo de imediato; outras falhas (5xx, timeouts) só após
+    GEMINI_BREAKER_FAILURES falhas consecutivas.
+    """
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self.hedges_launched = 0
+        self.hedges_won = 0
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_COOLDOWN)
+            self._breakers[model] = breaker
+        return breaker
+
+    def is_available(self, model: str) -> bool:
+        """
+        Indica se o circuito do modelo permite uma chamada
+
+        Com o circuito semi-aberto só uma chamada de teste é permitida de
+        cada vez: chame imediatamente antes da tentativa e registe sempre o
+        resultado (record_success/record_failure) ou chame release.
+        """
+        return self._breaker(model).allows_requests()
+
+    def release(self, model: str) -> None:
+        """Liberta a chamada de teste do modelo sem resultado (ex: tentativa cancelada)"""
+        self._breaker(model).release_probe()
+
+    def record_success(self, model: str, latency: float) -> None:
+        """Regista uma geração bem-sucedida e a sua latência (segundos)"""
+        self._breaker(model).record_success()
+        self._latencies.setdefault(model, LatencyWindow()).add(latency)
+
+    def record_failure(self, model: str, status_code: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        """
+        Regista uma falha do modelo
+
+        Args:
+            model: Modelo que falhou
+            status_code: Status HTTP da resposta (None para erros de rede/timeout)
+            retry_after: Segundos indicados pelo servidor (Retry-After), se houver
+        """
+        breaker = self._breaker(model)
+        if status_code == 404:
+            breaker.record_failure(trip=True, open_for=GEMINI_BREAKER_NOT_FOUND_COOLDOWN)
+        elif status_code == 429:
+            breaker.record_failure(trip=True, open_for=retry_after or GEMINI_BREAKER_COOLDOWN)
+        else:
+            breaker.record_failure()
+
+    def hedge_delay(self, model: str) -> float:
+        """
+        Tempo de espera antes de lançar um pedido de cobertura para o modelo seguinte
+
+        Usa o percentil GEMINI_HEDGE_PERCENTILE das latências do modelo, ou
+        GEMINI_HEDGE_DELAY enquanto houver menos de GEMINI_HEDGE_MIN_SAMPLES amostras.
+        """
+        window = self._latencies.get(model)
+        if window is None or len(window) < GEMINI_HEDGE_MIN_SAMPLES:
+            return GEMINI_HEDGE_DELAY
+        return window.percentile(GEMINI_HEDGE_PERCENTILE) or GEMINI_HEDGE_DELAY
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado dos circuitos e latências por modelo (para métricas)"""
+        models: Dict[str, Any] = {}
+        for model, breaker in self._breakers.items():
+            entry = breaker.stats()
+            window = self._latencies.get(model)
+            if window is not None and len(window):
+                entry["latency_p50"] = round(window.percentile(0.5), 3)
+                entry["latency_p95"] = round(window.percentile(0.95), 3)
+            entry["hedge_delay"] = round(self.hedge_delay(model), 3)
+            models[model] = entry
+        return {
+            "hedging_enabled": GEMINI_HEDGE_ENABLED,
+            "hedges_launched": self.hedges_launched,
+            "hedges_won": self.hedges_won,
+            "deadline": GEMINI_REQUEST_DEADLINE,
+            "models": models,
+        }
+
+
+model_catalog = GeminiModelCatalog()
+model_health = GeminiModelHealth()
+gemini_admission = AdmissionController("gemini", GEMINI_MAX_CONCURRENCY, GEMINI_RPM, GEMINI_TPM)
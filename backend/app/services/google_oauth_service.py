@@ -0,0 +1,276 @@
+"""
+Troca do código OAuth e validação do ID token do Google sem bloquear o event loop
+
+A troca do código de autorização por tokens é feita com o cliente HTTP
+partilhado ("oauth"). O ID token devolvido é validado localmente com PyJWT,
+usando as chaves públicas do Google (JWKS) guardadas em memória pelo tempo
+indicado no Cache-Control da resposta (tipicamente várias horas); os logins
+seguintes não fazem nenhum pedido para obter certificados.
+
+Um `kid` desconhecido indica rotação de chaves: o JWKS é pedido de novo,
+no máximo uma vez a cada JWKS_MIN_REFRESH_INTERVAL segundos, para que
+tokens forjados não provoquem um pedido por login.
+
+Configuração (variáveis de ambiente):
+    GOOGLE_CLIENT_ID / GOOGLE_CLIENT_SECRET: Credenciais do cliente OAuth
+    JWKS_DEFAULT_TTL: Segundos em cache quando a resposta não traz max-age
+        (padrão: 3600)
+    JWKS_MIN_REFRESH_INTERVAL: Intervalo mínimo entre pedidos forçados por
+        `kid` desconhecido (padrão: 60)
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import httpx
+import jwt
+
+from app.services.retry_policy import oauth_retry, send_with_retry
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+GOOGLE_JWKS_URI = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+JWKS_DEFAULT_TTL = float(os.getenv("JWKS_DEFAULT_TTL", "3600"))
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "60"))
+
+#Tolerância de relógio na validação de exp/iat do ID token (segundos)
+ID_TOKEN_LEEWAY = 30
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleOAuthError(Exception):
+    """Falha na troca do código ou na validação do ID token"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def cache_ttl(response: httpx.Response, default: float = JWKS_DEFAULT_TTL) -> float:
+    """
+    Tempo de vida de uma resposta segundo Cache-Control (max-age menos Age)
+
+    Returns:
+        float: Segundos de validade (0 com no-store/no-cache)
+    """
+    cache_control = response.headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+    match = MAX_AGE.search(cache_control)
+    if match is None:
+        return default
+    try:
+        age = float(response.headers.get("age", "0"))
+    except ValueError:
+        age = 0.0
+    return max(0.0, float(match.group(1)) - age)
+
+
+class GoogleJWKSCache:
+    """
+    Chaves públicas do Google (JWKS) em memória, com o TTL do Cache-Control
+
+    Attributes:
+        keys: Chaves por `kid`
+        expires_at: Instante (time.monotonic) em que o JWKS expira
+        fetches: Número de pedidos feitos ao endpoint de certificados
+    """
+
+    def __init__(self, url: str = GOOGLE_JWKS_URI, min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL):
+        self.url = url
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: Dict[str, jwt.PyJWK] = {}
+        self.expires_at = 0.0
+        self.fetched_at: Optional[float] = None
+        self.fetches = 0
+        self.hits = 0
+        self.unknown_kids = 0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, client: httpx.AsyncClient) -> None:
+        """
+        Pede o JWKS ao Google e substitui as chaves em cache
+
+        Raises:
+            httpx.HTTPError: Se o endpoint não puder ser contactado
+            GoogleOAuthError: Se a resposta não for um JWKS válido (503)
+        """
+        self.fetches += 1
+        response = await send_with_retry(client, "GET", self.url, policy=oauth_retry)
+        if response.status_code != 200:
+            raise GoogleOAuthError(503, f"Erro ao obter certificados do Google: status={response.status_code}")
+
+        keys: Dict[str, jwt.PyJWK] = {}
+        for data in response.json().get("keys", []):
+            try:
+                key = jwt.PyJWK(data)
+            except jwt.PyJWTError:
+                logger.debug("Chave JWKS ignorada: %s", data.get("kid"))
+                continue
+            if key.key_id:
+                keys[key.key_id] = key
+        if not keys:
+            raise GoogleOAuthError(503, "JWKS do Google sem chaves utilizáveis")
+
+        self.keys = keys
+        self.fetched_at = time.monotonic()
+        self.expires_at = self.fetched_at + cache_ttl(response)
+
+    async def get_key(self, client: httpx.AsyncClient, kid: str) -> Optional[jwt.PyJWK]:
+        """
+        Chave pública com o `kid` indicado
+
+        O JWKS só é pedido se tiver expirado ou se o `kid` for desconhecido
+        (respeitando o intervalo mínimo); pedidos concorrentes partilham
+        o mesmo download. Se o pedido falhar, chaves já conhecidas continuam
+        a ser usadas.
+
+        Returns:
+            Optional[jwt.PyJWK]: A chave, ou None se o Google não a publicar
+        """
+        if time.monotonic() < self.expires_at and kid in self.keys:
+            self.hits += 1
+            return self.keys[kid]
+
+        async with self._lock:
+            now = time.monotonic()
+            expired = now >= self.expires_at
+            recently_fetched = self.fetched_at is not None and now - self.fetched_at < self.min_refresh_interval
+            if expired or (kid not in self.keys and not recently_fetched):
+                if not expired:
+                    self.unknown_kids += 1
+                try:
+                    await self.refresh(client)
+                except (httpx.HTTPError, GoogleOAuthError):
+                    # Chaves expiradas continuam a servir enquanto o Google não responde
+                    if kid not in self.keys:
+                        raise
+                    logger.warning("Falha ao atualizar o JWKS do Google; a usar chaves em cache", exc_info=True)
+        return self.keys.get(kid)
+
+    async def warm_up(self, client: httpx.AsyncClient) -> None:
+        """Obtém o JWKS no arranque (lifespan); falhas ficam para o primeiro login"""
+        try:
+            await self.refresh(client)
+        except Exception as e:
+            logger.warning("Não foi possível obter o JWKS do Google no arranque: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado do cache de chaves (para métricas)"""
+        now = time.monotonic()
+        return {
+            "keys": len(self.keys),
+            "ttl_remaining": round(max(0.0, self.expires_at - now), 1) if self.fetched_at is not None else None,
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "unknown_kids": self.unknown_kids,
+        }
+
+
+google_jwks = GoogleJWKSCache()
+
+
+class GoogleOAuthService:
+    """Serviço para o fluxo OAuth do Google (troca de código e ID token)"""
+
+    @staticmethod
+    async def exchange_code(client: httpx.AsyncClient, code: str, redirect_uri: str) -> Dict[str, Any]:
+        """
+        Troca o código de autorização por tokens
+
+        Args:
+            client: Cliente HTTP partilhado ("oauth")
+            code: Código recebido no callback
+            redirect_uri: redirect_uri usado no pedido de autorização
+
+        Returns:
+            dict: {"access_token", "refresh_token", "expiry" (ISO, UTC), "id_token"}
+
+        Raises:
+            GoogleOAuthError: Código inválido ou expirado (400) ou falha do Google (503)
+
+        Note:
+            Um código só pode ser usado uma vez, pelo que o pedido não é repetido
+            após erros de rede ou 5xx (apenas com 429/503, em que não foi processado).
+        """
+        try:
+            response = await send_with_retry(
+                client, "POST", GOOGLE_TOKEN_URI,
+                policy=oauth_retry,
+                idempotent=False,
+                data={
+                    "grant_type": "authorization_code",
+                    "code": code,
+                    "client_id": GOOGLE_CLIENT_ID,
+                    "client_secret": GOOGLE_CLIENT_SECRET,
+                    "redirect_uri": redirect_uri,
+                },
+            )
+        except httpx.HTTPError as e:
+            raise GoogleOAuthError(503, f"Google OAuth indisponível: {str(e)}")
+
+        if response.status_code != 200:
+            status_code = 400 if response.status_code in (400, 401) else 503
+            raise GoogleOAuthError(status_code, f"Erro ao trocar o código OAuth: {response.text[:300]}")
+
+        data = response.json()
+        expires_in = data.get("expires_in")
+        # Mesmo formato da google-auth (UTC sem fuso), lido por token_manager
+        expiry = (datetime.utcnow() + timedelta(seconds=int(expires_in))).isoformat() if expires_in else None
+        return {
+            "access_token": data.get("access_token"),
+            "refresh_token": data.get("refresh_token"),
+            "expiry": expiry,
+            "id_token": data.get("id_token"),
+        }
+
+    @staticmethod
+    async def verify_id_token(client: httpx.AsyncClient, token: str, audience: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Valida localmente um ID token do Google (assinatura, aud, iss, exp)
+
+        Args:
+            client: Cliente HTTP partilhado (só usado se o JWKS tiver de ser pedido)
+            token: ID token (JWT)
+            audience: Client ID esperado (padrão: GOOGLE_CLIENT_ID)
+
+        Returns:
+            dict: Claims do token (sub, email, name, ...)
+
+        Raises:
+            GoogleOAuthError: Token inválido (401) ou certificados indisponíveis (503)
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise GoogleOAuthError(401, f"ID token inválido: {str(e)}")
+
+        try:
+            key = await google_jwks.get_key(client, header.get("kid", ""))
+        except httpx.HTTPError as e:
+            raise GoogleOAuthError(503, f"Não foi possível obter os certificados do Google: {str(e)}")
+        if key is None:
+            raise GoogleOAuthError(401, "ID token assinado com uma chave desconhecida")
+
+        try:
+            return jwt.decode(
+                token,
+                key=key,
+                algorithms=["RS256"],
+                audience=audience or GOOGLE_CLIENT_ID,
+                issuer=GOOGLE_ISSUERS,
+                leeway=ID_TOKEN_LEEWAY,
+            )
+        except jwt.PyJWTError as e:
+            raise GoogleOAuthError(401, f"ID token inválido: {str(e)}")
@@ -0,0 +1,183 @@
+"""
+Clientes HTTP partilhados (connection pooling) para as APIs do Google
+
+Em vez de abrir um httpx.AsyncClient por requisição (pagando TCP + TLS a
+cada chamada), a aplicação mantém um cliente por serviço externo durante
+todo o seu ciclo de vida. Os clientes são criados no lifespan do FastAPI
+(ver main.py), usam HTTP/2 quando disponível e mantêm conexões keep-alive
+por host, já que cada cliente fala com um único host.
+
+Configuração (variáveis de ambiente):
+    HTTP2_ENABLED: "false" desativa HTTP/2 (padrão: "true")
+    HTTP_POOL_MAX_CONNECTIONS: Conexões simultâneas por cliente (padrão: 100)
+    HTTP_POOL_MAX_KEEPALIVE: Conexões ociosas mantidas abertas (padrão: 20)
+    HTTP_POOL_KEEPALIVE_EXPIRY: Segundos até fechar uma conexão ociosa (padrão: 30)
+"""
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() != "false"
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "30"))
+
+
+@dataclass
+class ClientConfig:
+    """
+    Configuração de um cliente HTTP partilhado
+
+    Attributes:
+        name: Nome do cliente (ex: "gemini", "calendar")
+        timeout: Timeout padrão das requisições em segundos
+        max_connections: Máximo de conexões simultâneas
+        max_keepalive_connections: Máximo de conexões ociosas mantidas abertas
+        keepalive_expiry: Segundos até fechar uma conexão ociosa
+        http2: Se deve negociar HTTP/2
+    """
+    name: str
+    timeout: float = 30.0
+    max_connections: int = HTTP_POOL_MAX_CONNECTIONS
+    max_keepalive_connections: int = HTTP_POOL_MAX_KEEPALIVE
+    keepalive_expiry: float = HTTP_POOL_KEEPALIVE_EXPIRY
+    http2: bool = HTTP2_ENABLED
+    requests_sent: int = field(default=0, init=False)
+    requests_failed: int = field(default=0, init=False)
+    requests_in_flight: int = field(default=0, init=False)
+    peak_in_flight: int = field(default=0, init=False)
+
+
+class _CountingTransport(httpx.AsyncHTTPTransport):
+    """
+    Transporte padrão do httpx que conta as requisições do cliente
+
+    Uma requisição está em curso desde o envio até à chegada dos cabeçalhos
+    da resposta (ou ao erro). Usa só a API pública de transportes do httpx,
+    sem depender dos internos do pool de conexões.
+    """
+
+    def __init__(self, config: ClientConfig, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._config = config
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        config = self._config
+        config.requests_sent += 1
+        config.requests_in_flight += 1
+        config.peak_in_flight = max(config.peak_in_flight, config.requests_in_flight)
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            config.requests_failed += 1
+            raise
+        finally:
+            config.requests_in_flight -= 1
+
+
+class HTTPClientPool:
+    """
+    Registro dos clientes HTTP partilhados da aplicação
+
+    Example:
+        >>> http_clients.register(ClientConfig(name="gemini", timeout=30.0))
+        >>> await http_clients.startup()
+        >>> client = http_clients.get("gemini")
+    """
+
+    def __init__(self):
+        self._configs: Dict[str, ClientConfig] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def register(self, config: ClientConfig) -> None:
+        """Regista a configuração de um cliente (criado no startup ou no primeiro uso)"""
+        self._configs[config.name] = config
+
+    def _create_client(self, config: ClientConfig) -> httpx.AsyncClient:
+        http2 = config.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("Pacote h2 não instalado; cliente %s usará HTTP/1.1", config.name)
+                http2 = False
+
+        transport = _CountingTransport(
+            config,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+        )
+        return httpx.AsyncClient(timeout=config.timeout, transport=transport)
+
+    async def startup(self) -> None:
+        """Cria todos os clientes registados (chamado no lifespan do FastAPI)"""
+        for name, config in self._configs.items():
+            if name not in self._clients:
+                self._clients[name] = self._create_client(config)
+
+    async def aclose(self) -> None:
+        """Fecha todos os clientes e as suas conexões (shutdown)"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """
+        Retorna o cliente partilhado com o nome indicado
+
+        Se o lifespan não tiver sido executado (ex: scripts), o cliente é
+        criado no primeiro uso.
+
+        Raises:
+            KeyError: Se nenhum cliente com esse nome estiver registado
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(self._configs[name])
+            self._clients[name] = client
+        return client
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Métricas de utilização dos clientes partilhados
+
+        Só usa dados públicos: os limites configurados e os contadores do
+        transporte de cada cliente (ver _CountingTransport).
+
+        Returns:
+            dict: Por cliente: limites configurados, requisições enviadas,
+                falhadas e em curso (atual e pico), e utilização face a
+                max_connections
+        """
+        stats: Dict[str, Any] = {}
+        for name, config in self._configs.items():
+            stats[name] = {
+                "http2": config.http2,
+                "max_connections": config.max_connections,
+                "max_keepalive_connections": config.max_keepalive_connections,
+                "keepalive_expiry": config.keepalive_expiry,
+                "open": name in self._clients,
+                "requests_sent": config.requests_sent,
+                "requests_failed": config.requests_failed,
+                "requests_in_flight": config.requests_in_flight,
+                "peak_in_flight": config.peak_in_flight,
+                "utilization": round(config.requests_in_flight / config.max_connections, 4)
+                if config.max_connections else 0.0,
+            }
+        return stats
+
+
+http_clients = HTTPClientPool()
+http_clients.register(ClientConfig(name="gemini", timeout=30.0))
+http_clients.register(ClientConfig(name="calendar", timeout=5.0))
+http_clients.register(ClientConfig(name="youtube", timeout=10.0))
+http_clients.register(ClientConfig(name="oauth", timeout=10.0))
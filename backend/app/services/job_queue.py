@@ -0,0 +1,404 @@
+"""
+Fila de jobs em segundo plano
+
+Define a interface JobQueue (enfileirar, reservar, confirmar, repetir e
+enviar para dead-letter) e duas implementações:
+
+    sqlite: fila durável num ficheiro SQLite local, partilhável por vários
+        processos de worker (`python -m app.worker`) na mesma máquina
+    memory: fila em memória, apenas para workers no processo da API
+
+Um job reservado recebe um lease: fica invisível para os outros workers
+até ser confirmado (ack), reagendado (retry) ou enviado para a dead-letter.
+Se o lease expirar (worker parou a meio), o job volta a ser entregue, ou
+seja, a entrega é at-least-once e os handlers devem ser idempotentes.
+
+Configuração (variáveis de ambiente):
+    JOB_QUEUE_BACKEND: "sqlite", "memory" ou caminho "modulo:Classe" de
+        uma implementação própria (padrão: "sqlite")
+    JOB_QUEUE_PATH: Ficheiro da fila SQLite (padrão: "data/jobs.sqlite3")
+    JOB_VISIBILITY_TIMEOUT: Duração do lease em segundos (padrão: 120)
+    JOB_POLL_INTERVAL: Intervalo entre consultas à fila SQLite (padrão: 1)
+"""
+import asyncio
+import heapq
+import importlib
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Protocol
+
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join("data", "jobs.sqlite3"))
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "120"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+
+@dataclass
+class Job:
+    """
+    Unidade de trabalho em segundo plano
+
+    Attributes:
+        kind: Tipo do job (escolhe o handler, ex: "ai_request")
+        payload: Dados do job (devem ser serializáveis em JSON)
+        job_id: Identificador único do job
+        attempts: Número de vezes que o job já foi entregue a um worker
+        last_error: Erro da última tentativa falhada
+        lease_id: Identificador do lease atual (preenchido por reserve)
+    """
+    kind: str
+    payload: Dict[str, Any]
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    last_error: Optional[str] = None
+    lease_id: Optional[str] = None
+
+
+class JobQueue(Protocol):
+    """Interface das filas de jobs"""
+
+    async def enqueue(self, job: Job, delay: float = 0.0) -> Job:
+        """Adiciona um job, disponível após `delay` segundos"""
+        ...
+
+    async def reserve(self, timeout: Optional[float] = None) -> Optional[Job]:
+        """Entrega o próximo job disponível (None se nenhum ficar disponível a tempo)"""
+        ...
+
+    async def ack(self, job: Job) -> None:
+        """Confirma que o job foi concluído"""
+        ...
+
+    async def extend_lease(self, job: Job) -> bool:
+        """Renova o lease de um job em processamento (False se o lease foi perdido)"""
+        ...
+
+    async def retry(self, job: Job, delay: float, error: str) -> None:
+        """Devolve o job à fila para nova tentativa após `delay` segundos"""
+        ...
+
+    async def dead_letter(self, job: Job, error: str) -> None:
+        """Retira o job da fila definitivamente (tentativas esgotadas)"""
+        ...
+
+    async def stats(self) -> Dict[str, Any]:
+        """Contadores da fila (para métricas)"""
+        ...
+
+
+class InMemoryJobQueue:
+    """
+    Fila de jobs em memória (perde-se ao reiniciar o processo)
+
+    Attributes:
+        dead_letters_max: Número máximo de jobs guardados na dead-letter
+    """
+
+    def __init__(self, dead_letters_max: int = 1000):
+        self._ready: List[tuple] = []
+        self._seq = itertools.count()
+        self._available = asyncio.Condition()
+        self._in_flight: Dict[str, Job] = {}
+        self.dead_letters: List[Job] = []
+        self.dead_letters_max = dead_letters_max
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    async def _push(self, job: Job, delay: float) -> None:
+        async with self._available:
+            heapq.heappush(self._ready, (time.monotonic() + delay, next(self._seq), job))
+            self._available.notify()
+
+    async def enqueue(self, job: Job, delay: float = 0.0) -> Job:
+        self.enqueued += 1
+        await self._push(job, delay)
+        return job
+
+    async def reserve(self, timeout: Optional[float] = None) -> Optional[Job]:
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + timeout if timeout is not None else None
+        async with self._available:
+            while True:
+                wait: Optional[float] = None
+                if self._ready:
+                    available_at, _, job = self._ready[0]
+                    wait = available_at - time.monotonic()
+                    if wait <= 0:
+                        heapq.heappop(self._ready)
+                        job.attempts += 1
+                        self._in_flight[job.job_id] = job
+                        return job
+                if expires_at is not None:
+                    remaining = expires_at - loop.time()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                try:
+                    await asyncio.wait_for(self._available.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def ack(self, job: Job) -> None:
+        self._in_flight.pop(job.job_id, None)
+        self.completed += 1
+
+    async def extend_lease(self, job: Job) -> bool:
+        # Sem processos concorrentes: o job reservado não expira
+        return job.job_id in self._in_flight
+
+    async def retry(self, job: Job, delay: float, error: str) -> None:
+        self._in_flight.pop(job.job_id, None)
+        job.last_error = error
+        self.retried += 1
+        await self._push(job, delay)
+
+    async def dead_letter(self, job: Job, error: str) -> None:
+        self._in_flight.pop(job.job_id, None)
+        job.last_error = error
+        self.dead_lettered += 1
+        self.dead_letters.append(job)
+        del self.dead_letters[:-self.dead_letters_max]
+
+    async def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "backend": "memory",
+            "ready": sum(1 for available_at, _, _ in self._ready if available_at <= now),
+            "delayed": sum(1 for available_at, _, _ in self._ready if available_at > now),
+            "in_flight": len(self._in_flight),
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+class SQLiteJobQueue:
+    """
+    Fila de jobs durável em SQLite (modo WAL)
+
+    A reserva é feita numa transação `BEGIN IMMEDIATE`, pelo que vários
+    processos podem consumir a mesma fila sem entregar o mesmo job duas
+    vezes enquanto o lease for válido. As operações correm numa thread
+    (asyncio.to_thread) para não bloquear o event loop.
+
+    Attributes:
+        path: Caminho do ficheiro SQLite
+        visibility_timeout: Duração do lease em segundos
+        poll_interval: Intervalo entre consultas enquanto a fila está vazia
+    """
+
+    def __init__(
+        self,
+        path: str = JOB_QUEUE_PATH,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._initialized = False
+        #O diretório (ex: data/, ignorado pelo git) pode não existir num checkout novo
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_id TEXT,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs (status, available_at)")
+            self._initialized = True
+        return conn
+
+    def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._connect()
+        try:
+            return fn(conn)
+        finally:
+            conn.close()
+
+    async def enqueue(self, job: Job, delay: float = 0.0) -> Job:
+        now = time.time()
+
+        def _insert(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, payload, status, attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job.job_id, job.kind, json.dumps(job.payload), job.attempts, now + delay, now, now),
+            )
+
+        await asyncio.to_thread(self._run, _insert)
+        return job
+
+    def _reserve_once(self, conn: sqlite3.Connection) -> Optional[Job]:
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs "
+                "WHERE (status = 'queued' AND available_at <= ?) "
+                "   OR (status = 'leased' AND lease_expires_at <= ?) "
+                "ORDER BY available_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            lease_id = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_id = ?, "
+                "lease_owner = ?, lease_expires_at = ?, updated_at = ? WHERE job_id = ?",
+                (lease_id, self.owner, now + self.visibility_timeout, now, row["job_id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return Job(
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            job_id=row["job_id"],
+            attempts=row["attempts"] + 1,
+            last_error=row["last_error"],
+            lease_id=lease_id,
+        )
+
+    async def reserve(self, timeout: Optional[float] = None) -> Optional[Job]:
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            job = await asyncio.to_thread(self._run, self._reserve_once)
+            if job is not None:
+                return job
+            if expires_at is not None and time.monotonic() >= expires_at:
+                return None
+            wait = self.poll_interval
+            if expires_at is not None:
+                wait = min(wait, max(expires_at - time.monotonic(), 0.0))
+            await asyncio.sleep(wait)
+
+    async def _update_leased(self, job: Job, sql: str, params: tuple) -> bool:
+        # Só altera o job se o lease ainda for nosso (outro worker pode tê-lo reservado)
+        def _update(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(sql + " WHERE job_id = ? AND lease_id = ?", params + (job.job_id, job.lease_id))
+            return cursor.rowcount > 0
+
+        return await asyncio.to_thread(self._run, _update)
+
+    async def ack(self, job: Job) -> None:
+        def _delete(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM jobs WHERE job_id = ? AND lease_id = ?", (job.job_id, job.lease_id))
+
+        await asyncio.to_thread(self._run, _delete)
+
+    async def extend_lease(self, job: Job) -> bool:
+        now = time.time()
+        return await self._update_leased(
+            job, "UPDATE jobs SET lease_expires_at = ?, updated_at = ?", (now + self.visibility_timeout, now)
+        )
+
+    async def retry(self, job: Job, delay: float, error: str) -> None:
+        now = time.time()
+        job.last_error = error
+        await self._update_leased(
+            job,
+            "UPDATE jobs SET status = 'queued', available_at = ?, lease_id = NULL, lease_owner = NULL, "
+            "lease_expires_at = NULL, last_error = ?, updated_at = ?",
+            (now + delay, error, now),
+        )
+
+    async def dead_letter(self, job: Job, error: str) -> None:
+        now = time.time()
+        job.last_error = error
+        await self._update_leased(
+            job,
+            "UPDATE jobs SET status = 'dead', lease_id = NULL, lease_owner = NULL, "
+            "lease_expires_at = NULL, last_error = ?, updated_at = ?",
+            (error, now),
+        )
+
+    async def stats(self) -> Dict[str, Any]:
+        def _count(conn: sqlite3.Connection) -> Dict[str, Any]:
+            now = time.time()
+            row = conn.execute(
+                "SELECT "
+                "  SUM(status = 'queued' AND available_at <= ?) AS ready, "
+                "  SUM(status = 'queued' AND available_at > ?) AS delayed, "
+                "  SUM(status = 'leased' AND lease_expires_at > ?) AS in_flight, "
+                "  SUM(status = 'leased' AND lease_expires_at <= ?) AS expired_leases, "
+                "  SUM(status = 'dead') AS dead_lettered, "
+                "  MIN(CASE WHEN status = 'queued' AND available_at <= ? THEN available_at END) AS oldest_ready "
+                "FROM jobs",
+                (now, now, now, now, now),
+            ).fetchone()
+            oldest = row["oldest_ready"]
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "ready": row["ready"] or 0,
+                "delayed": row["delayed"] or 0,
+                "in_flight": row["in_flight"] or 0,
+                "expired_leases": row["expired_leases"] or 0,
+                "dead_lettered": row["dead_lettered"] or 0,
+                "oldest_ready_age": round(now - oldest, 1) if oldest is not None else None,
+                "visibility_timeout": self.visibility_timeout,
+            }
+
+        return await asyncio.to_thread(self._run, _count)
+
+
+JOB_QUEUE_BACKENDS: Dict[str, Callable[[], JobQueue]] = {
+    "memory": InMemoryJobQueue,
+    "sqlite": SQLiteJobQueue,
+}
+
+
+def create_job_queue(backend: str = JOB_QUEUE_BACKEND) -> JobQueue:
+    """
+    Cria a fila de jobs configurada
+
+    Args:
+        backend: Nome registado em JOB_QUEUE_BACKENDS ou "modulo:Classe"
+
+    Raises:
+        ValueError: Se o backend não existir
+    """
+    factory = JOB_QUEUE_BACKENDS.get(backend)
+    if factory is None:
+        if ":" not in backend:
+            raise ValueError(f"Backend de fila desconhecido: {backend}")
+        module_name, class_name = backend.split(":", 1)
+        factory = getattr(importlib.import_module(module_name), class_name)
+    return factory()
+
+
+#Fila partilhada pela API (enfileirar) e pelos workers (consumir)
+job_queue = create_job_queue()
@@ -1,10 +1,13 @@
 """
 Serviço para operações CRUD de Notes no Firestore
 """
-from app.services.firebase_service import db
-from app.models.note import Note, NoteCreate, NoteUpdate
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, count_documents, DEFAULT_PAGE_SIZE
+from app.models.note import Note, NoteCreate, NoteSource, NoteUpdate
+from app.models.page import Page
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 from google.cloud.firestore_v1 import FieldFilter
 
 
@@ -17,11 +20,25 @@ class NoteService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("notes")
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
+
+    Note:
+        Notes de IA ainda vazias (à espera do worker, que pode correr noutro
+        processo) não entram no CACHE, para que o polling veja o conteúdo
+        assim que for escrito.
     """
     COLLECTION = "notes"
+    CACHE = DocumentCache(COLLECTION)
+
+    @staticmethod
+    def _cache(note: Note, version) -> None:
+        if note.source == NoteSource.AI_GENERATED and not note.content:
+            NoteService.CACHE.invalidate(note.noteId)
+        else:
+            NoteService.CACHE.set(note.noteId, note, version=version)
 
     @staticmethod
-    def create_note(note_data: NoteCreate) -> Note:
+    async def create_note(note_data: NoteCreate) -> Note:
         """
         Cria uma nova note no Firestore
         
@@ -37,12 +54,14 @@ class NoteService:
         note_dict = note_data.model_dump()
         note_dict["createdAt"] = datetime.utcnow()
         
-        doc_ref = db.collection(NoteService.COLLECTION).add(note_dict)
+        doc_ref = await async_db.collection(NoteService.COLLECTION).add(note_dict)
         note_dict["noteId"] = doc_ref[1].id
-        return Note(**note_dict)
+        created = Note(**note_dict)
+        NoteService._cache(created, doc_ref[0])
+        return created
 
     @staticmethod
-    def get_note(note_id: str) -> Optional[Note]:
+    async def get_note(note_id: str) -> Optional[Note]:
         """
         Busca uma note por ID no Firestore
         
@@ -51,15 +70,24 @@ class NoteService:
         
         Returns:
             Optional[Note]: Dados da note se encontrada, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(NoteService.COLLECTION).document(note_id).get()
+        cached = NoteService.CACHE.get(note_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(NoteService.COLLECTION).document(note_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return Note(noteId=doc.id, **data)
+            note = Note(noteId=doc.id, **data)
+            NoteService._cache(note, doc.update_time)
+            return note
         return None
 
     @staticmethod
-    def update_note(note_id: str, note_data: NoteUpdate) -> Optional[Note]:
+    async def update_note(note_id: str, note_data: NoteUpdate) -> Optional[Note]:
         """
         Atualiza uma note existente no Firestore
         
@@ -69,17 +97,30 @@ class NoteService:
         
         Returns:
             Optional[Note]: Note atualizada se encontrada, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = note_data.model_dump(exclude_unset=True)
         if not update_data:
-            return NoteService.get_note(note_id)
+            return await NoteService.get_note(note_id)
         
-        doc_ref = db.collection(NoteService.COLLECTION).document(note_id)
-        doc_ref.update(update_data)
-        return NoteService.get_note(note_id)
+        cached = NoteService.CACHE.get_entry(note_id)
+        snapshot = (cached.value.model_dump(exclude={"noteId"}), cached.version) if cached else None
+        result = await update_document(NoteService.COLLECTION, note_id, update_data, snapshot)
+        if result is None:
+            NoteService.CACHE.invalidate(note_id)
+            return None
+
+        data, version = result
+        note = Note(noteId=note_id, **data)
+        NoteService._cache(note, version)
+        return note
 
     @staticmethod
-    def delete_note(note_id: str) -> bool:
+    async def delete_note(note_id: str) -> bool:
         """
         Deleta uma note do Firestore
         
@@ -89,22 +130,45 @@ class NoteService:
         Returns:
             bool: True se a operação foi bem-sucedida
         """
-        db.collection(NoteService.COLLECTION).document(note_id).delete()
+        await async_db.collection(NoteService.COLLECTION).document(note_id).delete()
+        NoteService.CACHE.invalidate(note_id)
         return True
 
     @staticmethod
-    def list_notes_by_topic(topic_id: str) -> List[Note]:
+    async def list_notes_by_topic(topic_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[Note]:
         """
-        Lista todas as notes relacionadas a um topic
+        Lista as notes relacionadas a um topic
         
         Args:
             topic_id: ID único do topic
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[Note]: Lista de todas as notes do topic especificado
+            Page[Note]: Página das notes do topic especificado, ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(NoteService.COLLECTION).where(
+        query = async_db.collection(NoteService.COLLECTION).where(
             filter=FieldFilter("topicId", "==", topic_id)
-        ).stream()
-        return [Note(noteId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[Note](
+            items=[Note(noteId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
+    @staticmethod
+    async def count_notes_by_topic(topic_id: str) -> int:
+        """
+        Conta as notes do topic sem transferir os documentos
+        
+        Args:
+            topic_id: ID único do topic
+        
+        Returns:
+            int: Número total de documentos (aggregation query no servidor)
+        """
+        query = async_db.collection(NoteService.COLLECTION).where(
+            filter=FieldFilter("topicId", "==", topic_id)
+        )
+        return await count_documents(query)
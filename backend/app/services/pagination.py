@@ -0,0 +1,48 @@
+"""
+Paginação por cursor das listagens (sem dependência do Firestore)
+
+O cursor é o ID do último documento devolvido, codificado em base64 para
+ser opaco para o cliente; firestore_utils.paginate usa-o com start_after.
+"""
+import base64
+import binascii
+import json
+
+#Tamanho de página padrão e máximo das listagens
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado ou adulterado"""
+
+
+def encode_cursor(doc_id: str) -> str:
+    """
+    Gera um cursor opaco a partir do ID do último documento de uma página
+
+    Args:
+        doc_id: ID do último documento devolvido
+
+    Returns:
+        str: Cursor em base64 (URL-safe, sem padding)
+    """
+    raw = json.dumps({"id": doc_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Recupera o ID do documento a partir de um cursor gerado por encode_cursor
+
+    Raises:
+        InvalidCursorError: Se o cursor não puder ser decodificado
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["id"]
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Cursor de paginação inválido") from e
+    if not isinstance(doc_id, str) or not doc_id:
+        raise InvalidCursorError("Cursor de paginação inválido")
+    return doc_id
@@ -0,0 +1,216 @@
+"""
+Controlo de admissão para chamadas a APIs externas (concorrência + rate limit)
+
+Cada chamada tem de ser admitida antes de sair: precisa de um lugar livre
+entre as chamadas em curso (semáforo) e de saldo nos token buckets de
+pedidos por minuto e de tokens por minuto. Quem não pode ser admitido fica
+numa fila de prioridade, para que pedidos interativos passem à frente de
+trabalho em segundo plano; dentro da mesma prioridade a ordem é FIFO.
+
+A prioridade é lida de uma ContextVar (ver use_priority), pelo que tarefas
+criadas a partir de um contexto em segundo plano herdam a prioridade.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from app.services.circuit_breaker import LatencyWindow
+
+
+class Priority(IntEnum):
+    """Prioridade de admissão (valores menores são admitidos primeiro)"""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+current_priority: ContextVar[Priority] = ContextVar("current_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def use_priority(priority: Priority) -> Iterator[None]:
+    """
+    Define a prioridade das chamadas feitas dentro do bloco
+
+    Example:
+        >>> with use_priority(Priority.BACKGROUND):
+        ...     await generate_with_gemini(request, client)
+    """
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket com reposição contínua
+
+    Attributes:
+        capacity: Saldo máximo (rajada permitida)
+        rate: Unidades repostas por segundo
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Segundos até haver saldo para `amount` (0 se já houver)"""
+        self._refill()
+        # Pedidos maiores do que a capacidade só exigem o bucket cheio
+        needed = min(amount, self.capacity) - self._level
+        return max(0.0, needed / self.rate) if self.rate > 0 else (0.0 if needed <= 0 else float("inf"))
+
+    def consume(self, amount: float) -> None:
+        """Retira `amount` do saldo (pode ficar negativo, atrasando os seguintes)"""
+        self._refill()
+        self._level -= amount
+
+    @property
+    def level(self) -> float:
+        self._refill()
+        return self._level
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "future", "enqueued_at")
+
+    def __init__(self, priority: Priority, seq: int, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+    """
+    Fila de admissão partilhada para chamadas a uma API externa
+
+    Attributes:
+        name: Nome do controlador (para métricas)
+        max_concurrency: Máximo de chamadas em curso
+        requests: Token bucket de pedidos (capacidade = pedidos por minuto)
+        tokens: Token bucket de tokens (capacidade = tokens por minuto), ou None
+
+    Example:
+        >>> async with gemini_admission.slot(tokens=estimate_tokens(prompt)):
+        ...     response = await client.post(...)
+    """
+
+    def __init__(self, name: str, max_concurrency: int, requests_per_minute: float, tokens_per_minute: Optional[float] = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute else None
+        self.in_flight = 0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.admitted: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._wait_times: Dict[Priority, LatencyWindow] = {p: LatencyWindow(500) for p in Priority}
+
+    def _delay_for(self, waiter: _Waiter) -> float:
+        delay = self.requests.delay_for(1)
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.delay_for(waiter.tokens))
+        return delay
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        while self._queue and self.in_flight < self.max_concurrency:
+            waiter = self._queue[0]
+            if waiter.future.done():
+                # Cancelado enquanto esperava
+                heapq.heappop(self._queue)
+                continue
+            delay = self._delay_for(waiter)
+            if delay > 0:
+                loop = asyncio.get_running_loop()
+                self._timer = loop.call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            self._admit(waiter)
+
+    def _admit(self, waiter: _Waiter) -> None:
+        self.requests.consume(1)
+        if self.tokens is not None:
+            self.tokens.consume(waiter.tokens)
+        self.in_flight += 1
+        self.admitted[waiter.priority] += 1
+        self._wait_times[waiter.priority].add(time.monotonic() - waiter.enqueued_at)
+        waiter.future.set_result(None)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        if self._timer is None:
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0, priority: Optional[Priority] = None) -> AsyncIterator[None]:
+        """
+        Espera pela admissão e ocupa um lugar durante o bloco
+
+        Args:
+            tokens: Tokens estimados da chamada (para o limite de tokens por minuto)
+            priority: Prioridade (padrão: a de current_priority)
+        """
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            priority if priority is not None else current_priority.get(),
+            next(self._seq),
+            tokens,
+            loop.create_future(),
+        )
+        heapq.heappush(self._queue, waiter)
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitido no mesmo instante em que foi cancelado: devolver o lugar
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade da fila, chamadas em curso e tempos de espera (para métricas)"""
+        pending = [w for w in self._queue if not w.future.done()]
+        by_priority: Dict[str, Any] = {}
+        for priority in Priority:
+            window = self._wait_times[priority]
+            by_priority[priority.name.lower()] = {
+                "queued": sum(1 for w in pending if w.priority == priority),
+                "admitted": self.admitted[priority],
+                "wait_p50": round(window.percentile(0.5), 3) if len(window) else None,
+                "wait_p95": round(window.percentile(0.95), 3) if len(window) else None,
+            }
+        return {
+            "name": self.name,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": len(pending),
+            "requests_available": round(self.requests.level, 2),
+            "tokens_available": round(self.tokens.level, 1) if self.tokens is not None else None,
+            "priorities": by_priority,
+        }
@@ -0,0 +1,279 @@
+"""
+Política de retry partilhada para as APIs do Google (Gemini, YouTube, Calendar, OAuth)
+
+Erros transitórios (429, 5xx, falhas de rede) são repetidos com backoff
+exponencial e jitter ("full jitter"), respeitando o header Retry-After
+quando o servidor o envia. Só são repetidas chamadas seguras:
+
+    - erros de conexão (o pedido não chegou a sair) são sempre repetidos
+    - 429 e 503 indicam que o pedido não foi processado: sempre repetidos
+    - 500, 502, 504 e timeouts de leitura só se a chamada for idempotente
+
+Cada chamada tem um prazo (deadline): o timeout de cada tentativa e as
+esperas entre tentativas nunca ultrapassam o tempo restante. Se a espera
+pedida pelo servidor não couber no prazo, a última resposta é devolvida.
+
+Configuração (variáveis de ambiente):
+    RETRY_MAX_ATTEMPTS: Tentativas por chamada, incluindo a primeira (padrão: 3)
+    RETRY_BASE_DELAY: Espera base do backoff em segundos (padrão: 0.5)
+    RETRY_MAX_DELAY: Espera máxima entre tentativas em segundos (padrão: 8)
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncContextManager, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+
+#Status que indicam que o pedido não foi processado (seguro repetir sempre)
+NOT_PROCESSED_STATUSES = frozenset({429, 503})
+#Status transitórios que só são repetidos em chamadas idempotentes
+TRANSIENT_STATUSES = frozenset({500, 502, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+T = TypeVar("T")
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Parâmetros de retry de um serviço externo
+
+    Attributes:
+        name: Nome do serviço (para métricas)
+        max_attempts: Tentativas por chamada, incluindo a primeira
+        base_delay: Espera base do backoff (segundos)
+        max_delay: Espera máxima entre tentativas (segundos)
+        deadline: Prazo padrão de cada chamada (segundos), se o chamador não indicar outro
+    """
+    name: str
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+    deadline: Optional[float] = None
+    calls: int = field(default=0, init=False)
+    retries: int = field(default=0, init=False)
+    gave_up: int = field(default=0, init=False)
+
+    def backoff(self, attempt: int) -> float:
+        """Espera antes da tentativa `attempt + 1` (full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de retry (para métricas)"""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "max_attempts": self.max_attempts,
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Converte o header Retry-After em segundos
+
+    Aceita os dois formatos da RFC 9110: número de segundos ou data HTTP.
+
+    Returns:
+        Optional[float]: Segundos a esperar (>= 0), ou None se ausente/inválido
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_retryable_status(status_code: int, idempotent: bool) -> bool:
+    """Indica se uma resposta com este status pode ser repetida"""
+    if status_code in NOT_PROCESSED_STATUSES:
+        return True
+    return idempotent and status_code in TRANSIENT_STATUSES
+
+
+def _is_retryable_error(exc: Exception, idempotent: bool) -> bool:
+    # Erros de conexão: o pedido não chegou ao servidor
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return idempotent and isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+
+@asynccontextmanager
+async def _no_context():
+    yield
+
+
+async def send_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    policy: RetryPolicy,
+    idempotent: Optional[bool] = None,
+    deadline: Optional[float] = None,
+    timeout: Optional[float] = None,
+    stream: bool = False,
+    attempt_context: Optional[Callable[[], AsyncContextManager[Any]]] = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    Envia um pedido HTTP aplicando a política de retry
+
+    Args:
+        client: Cliente HTTP partilhado
+        method: Método HTTP
+        url: URL do pedido
+        policy: Política de retry do serviço
+        idempotent: Se a chamada pode ser repetida sem efeitos duplicados
+            (padrão: deduzido do método HTTP)
+        deadline: Prazo total em segundos, incluindo esperas (padrão: policy.deadline)
+        timeout: Timeout de cada tentativa (padrão: o do cliente), limitado ao prazo restante
+        stream: Se True, o corpo não é lido; o chamador deve fechar a resposta
+        attempt_context: Fábrica de um context manager assíncrono que envolve cada
+            tentativa (ex: admissão no rate limiter)
+        **kwargs: Argumentos de client.build_request (params, json, headers, ...)
+
+    Returns:
+        httpx.Response: Primeira resposta não repetível ou a última obtida
+
+    Raises:
+        httpx.HTTPError: Erro de rede da última tentativa, se nenhuma resposta foi obtida
+    """
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    if deadline is None:
+        deadline = policy.deadline
+    if timeout is None:
+        timeout = client.timeout.read
+    expires_at = time.monotonic() + deadline if deadline is not None else None
+    attempt_context = attempt_context or _no_context
+    policy.calls += 1
+
+    attempt = 0
+    while True:
+        attempt_timeout = timeout
+        if expires_at is not None:
+            remaining = max(expires_at - time.monotonic(), 0.001)
+            attempt_timeout = min(attempt_timeout, remaining) if attempt_timeout is not None else remaining
+        request = client.build_request(method, url, timeout=attempt_timeout, **kwargs)
+
+        error: Optional[Exception] = None
+        response: Optional[httpx.Response] = None
+        async with attempt_context():
+            try:
+                response = await client.send(request, stream=stream)
+            except httpx.HTTPError as e:
+                error = e
+
+        attempt += 1
+        if error is not None:
+            retryable = _is_retryable_error(error, idempotent)
+            delay = policy.backoff(attempt - 1)
+        else:
+            retryable = is_retryable_status(response.status_code, idempotent)
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            delay = retry_after if retry_after is not None else policy.backoff(attempt - 1)
+
+        if not retryable:
+            if error is not None:
+                raise error
+            return response
+
+        remaining = expires_at - time.monotonic() if expires_at is not None else None
+        if attempt >= policy.max_attempts or (remaining is not None and delay >= remaining):
+            policy.gave_up += 1
+            if error is not None:
+                raise error
+            return response
+
+        policy.retries += 1
+        logger.info(
+            "Retry %s %s (tentativa %d/%d) em %.2fs: %s",
+            policy.name, method, attempt + 1, policy.max_attempts, delay,
+            error if error is not None else f"status={response.status_code}",
+        )
+        if response is not None and stream:
+            await response.aclose()
+        await asyncio.sleep(delay)
+
+
+def call_with_retry(fn: Callable[[], T], *, policy: RetryPolicy, idempotent: bool = True, deadline: Optional[float] = None) -> T:
+    """
+    Versão síncrona para clientes que não usam httpx (ex: googleapiclient)
+
+    O status HTTP e o Retry-After são lidos de `exc.resp` (formato das
+    exceções HttpError do googleapiclient); outras exceções de E/S
+    (OSError, incluindo timeouts de socket) contam como erros de rede.
+
+    Args:
+        fn: Função sem argumentos que executa a chamada
+        policy: Política de retry do serviço
+        idempotent: Se a chamada pode ser repetida sem efeitos duplicados
+        deadline: Prazo total em segundos (padrão: policy.deadline)
+
+    Returns:
+        O valor devolvido por fn
+    """
+    deadline = deadline if deadline is not None else policy.deadline
+    expires_at = time.monotonic() + deadline if deadline is not None else None
+    policy.calls += 1
+
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            attempt += 1
+            resp = getattr(e, "resp", None)
+            status_code = getattr(resp, "status", None)
+            if status_code is not None:
+                retryable = is_retryable_status(int(status_code), idempotent)
+                retry_after = parse_retry_after(resp.get("retry-after")) if hasattr(resp, "get") else None
+            else:
+                retryable = idempotent and isinstance(e, OSError)
+                retry_after = None
+            if not retryable:
+                raise
+
+            delay = retry_after if retry_after is not None else policy.backoff(attempt - 1)
+            remaining = expires_at - time.monotonic() if expires_at is not None else None
+            if attempt >= policy.max_attempts or (remaining is not None and delay >= remaining):
+                policy.gave_up += 1
+                raise
+
+            policy.retries += 1
+            logger.info(
+                "Retry %s (tentativa %d/%d) em %.2fs: %s",
+                policy.name, attempt + 1, policy.max_attempts, delay, e,
+            )
+            time.sleep(delay)
+
+
+gemini_retry = RetryPolicy(name="gemini")
+youtube_retry = RetryPolicy(name="youtube", deadline=15.0)
+calendar_retry = RetryPolicy(name="calendar", deadline=10.0)
+oauth_retry = RetryPolicy(name="oauth", deadline=10.0)
+
+RETRY_POLICIES = {p.name: p for p in (gemini_retry, youtube_retry, calendar_retry, oauth_retry)}
@@ -1,10 +1,13 @@
 """
 Serviço para operações CRUD de Slide no Firestore
 """
-from app.services.firebase_service import db
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, count_documents, DEFAULT_PAGE_SIZE
 from app.models.slide import Slide, SlideCreate, SlideUpdate
+from app.models.page import Page
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 from google.cloud.firestore_v1 import FieldFilter
 
 
@@ -17,11 +20,13 @@ class SlideService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("slides")
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
     """
     COLLECTION = "slides"
+    CACHE = DocumentCache(COLLECTION)
 
     @staticmethod
-    def create_slide(slide_data: SlideCreate) -> Slide:
+    async def create_slide(slide_data: SlideCreate) -> Slide:
         """
         Cria um novo slide no Firestore
         
@@ -40,12 +45,14 @@ class SlideService:
         slide_dict["createdAt"] = now
         slide_dict["uploadedAt"] = now
         
-        doc_ref = db.collection(SlideService.COLLECTION).add(slide_dict)
+        doc_ref = await async_db.collection(SlideService.COLLECTION).add(slide_dict)
         slide_dict["slideId"] = doc_ref[1].id
-        return Slide(**slide_dict)
+        created = Slide(**slide_dict)
+        SlideService.CACHE.set(created.slideId, created, version=doc_ref[0])
+        return created
 
     @staticmethod
-    def get_slide(slide_id: str) -> Optional[Slide]:
+    async def get_slide(slide_id: str) -> Optional[Slide]:
         """
         Busca um slide por ID no Firestore
         
@@ -54,15 +61,24 @@ class SlideService:
         
         Returns:
             Optional[Slide]: Dados do slide se encontrado, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(SlideService.COLLECTION).document(slide_id).get()
+        cached = SlideService.CACHE.get(slide_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(SlideService.COLLECTION).document(slide_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return Slide(slideId=doc.id, **data)
+            slide = Slide(slideId=doc.id, **data)
+            SlideService.CACHE.set(slide_id, slide, version=doc.update_time)
+            return slide
         return None
 
     @staticmethod
-    def update_slide(slide_id: str, slide_data: SlideUpdate) -> Optional[Slide]:
+    async def update_slide(slide_id: str, slide_data: SlideUpdate) -> Optional[Slide]:
         """
         Atualiza um slide existente no Firestore
         
@@ -72,17 +88,30 @@ class SlideService:
         
         Returns:
             Optional[Slide]: Slide atualizado se encontrado, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = slide_data.model_dump(exclude_unset=True)
         if not update_data:
-            return SlideService.get_slide(slide_id)
+            return await SlideService.get_slide(slide_id)
         
-        doc_ref = db.collection(SlideService.COLLECTION).document(slide_id)
-        doc_ref.update(update_data)
-        return SlideService.get_slide(slide_id)
+        cached = SlideService.CACHE.get_entry(slide_id)
+        snapshot = (cached.value.model_dump(exclude={"slideId"}), cached.version) if cached else None
+        result = await update_document(SlideService.COLLECTION, slide_id, update_data, snapshot)
+        if result is None:
+            SlideService.CACHE.invalidate(slide_id)
+            return None
+
+        data, version = result
+        slide = Slide(slideId=slide_id, **data)
+        SlideService.CACHE.set(slide_id, slide, version=version)
+        return slide
 
     @staticmethod
-    def delete_slide(slide_id: str) -> bool:
+    async def delete_slide(slide_id: str) -> bool:
         """
         Deleta um slide do Firestore
         
@@ -96,22 +125,45 @@ class SlideService:
             Esta operação não deleta o arquivo físico se estiver armazenado
             em outro serviço (ex: Google Cloud Storage)
         """
-        db.collection(SlideService.COLLECTION).document(slide_id).delete()
+        await async_db.collection(SlideService.COLLECTION).document(slide_id).delete()
+        SlideService.CACHE.invalidate(slide_id)
         return True
 
     @staticmethod
-    def list_slides_by_topic(topic_id: str) -> List[Slide]:
+    async def list_slides_by_topic(topic_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[Slide]:
         """
-        Lista todos os slides relacionados a um topic
+        Lista os slides relacionados a um topic
         
         Args:
             topic_id: ID único do topic
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[Slide]: Lista de todos os slides do topic especificado
+            Page[Slide]: Página dos slides do topic especificado, ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(SlideService.COLLECTION).where(
+        query = async_db.collection(SlideService.COLLECTION).where(
             filter=FieldFilter("topicId", "==", topic_id)
-        ).stream()
-        return [Slide(slideId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[Slide](
+            items=[Slide(slideId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
+    @staticmethod
+    async def count_slides_by_topic(topic_id: str) -> int:
+        """
+        Conta os slides do topic sem transferir os documentos
+        
+        Args:
+            topic_id: ID único do topic
+        
+        Returns:
+            int: Número total de documentos (aggregation query no servidor)
+        """
+        query = async_db.collection(SlideService.COLLECTION).where(
+            filter=FieldFilter("topicId", "==", topic_id)
+        )
+        return await count_documents(query)
@@ -1,11 +1,18 @@
 """
 Serviço para operações CRUD de StudySession no Firestore
 """
-from app.services.firebase_service import db
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, count_documents, get_documents, DEFAULT_PAGE_SIZE
 from app.models.study_session import StudySession, StudySessionCreate, StudySessionUpdate, SessionState
-from typing import Optional, List
+from app.models.page import Page
+from typing import Any, Dict, List, Optional
+from google.api_core.exceptions import NotFound
 from google.cloud.firestore_v1 import FieldFilter
 
+#Escritas por batch do Firestore (limite: 500)
+SESSION_WRITE_BATCH = 500
+
 
 class StudySessionService:
     """
@@ -16,11 +23,13 @@ class StudySessionService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("study_sessions")
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
     """
     COLLECTION = "study_sessions"
+    CACHE = DocumentCache(COLLECTION)
 
     @staticmethod
-    def create_study_session(session_data: StudySessionCreate) -> StudySession:
+    async def create_study_session(session_data: StudySessionCreate) -> StudySession:
         """
         Cria uma nova study session no Firestore
         
@@ -41,12 +50,14 @@ class StudySessionService:
         if "numberSessions" not in session_dict or session_dict["numberSessions"] is None:
             session_dict["numberSessions"] = 1
         
-        doc_ref = db.collection(StudySessionService.COLLECTION).add(session_dict)
+        doc_ref = await async_db.collection(StudySessionService.COLLECTION).add(session_dict)
         session_dict["sessionId"] = doc_ref[1].id
-        return StudySession(**session_dict)
+        created = StudySession(**session_dict)
+        StudySessionService.CACHE.set(created.sessionId, created, version=doc_ref[0])
+        return created
 
     @staticmethod
-    def get_study_session(session_id: str) -> Optional[StudySession]:
+    async def get_study_session(session_id: str) -> Optional[StudySession]:
         """
         Busca uma study session por ID no Firestore
         
@@ -55,15 +66,24 @@ class StudySessionService:
         
         Returns:
             Optional[StudySession]: Dados da sessão se encontrada, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(StudySessionService.COLLECTION).document(session_id).get()
+        cached = StudySessionService.CACHE.get(session_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(StudySessionService.COLLECTION).document(session_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return StudySession(sessionId=doc.id, **data)
+            session = StudySession(sessionId=doc.id, **data)
+            StudySessionService.CACHE.set(session_id, session, version=doc.update_time)
+            return session
         return None
 
     @staticmethod
-    def update_study_session(session_id: str, session_data: StudySessionUpdate) -> Optional[StudySession]:
+    async def update_study_session(session_id: str, session_data: StudySessionUpdate) -> Optional[StudySession]:
         """
         Atualiza uma study session existente no Firestore
         
@@ -76,17 +96,89 @@ class StudySessionService:
         
         Returns:
             Optional[StudySession]: Sessão atualizada se encontrada, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = session_data.model_dump(exclude_unset=True)
         if not update_data:
-            return StudySessionService.get_study_session(session_id)
+            return await StudySessionService.get_study_session(session_id)
         
-        doc_ref = db.collection(StudySessionService.COLLECTION).document(session_id)
-        doc_ref.update(update_data)
-        return StudySessionService.get_study_session(session_id)
+        cached = StudySessionService.CACHE.get_entry(session_id)
+        snapshot = (cached.value.model_dump(exclude={"sessionId"}), cached.version) if cached else None
+        result = await update_document(StudySessionService.COLLECTION, session_id, update_data, snapshot)
+        if result is None:
+            StudySessionService.CACHE.invalidate(session_id)
+            return None
+
+        data, version = result
+        session = StudySession(sessionId=session_id, **data)
+        StudySessionService.CACHE.set(session_id, session, version=version)
+        return session
 
     @staticmethod
-    def delete_study_session(session_id: str) -> bool:
+    async def set_calendar_events(events: Dict[str, Optional[str]]) -> List[str]:
+        """
+        Grava o calendarEvent de várias sessões em batches do Firestore
+
+        Args:
+            events: ID do evento no Google Calendar por sessionId (None desvincula)
+
+        Returns:
+            List[str]: IDs das sessões efetivamente atualizadas (ver update_many)
+        """
+        return await StudySessionService.update_many(
+            {session_id: {"calendarEvent": event_id} for session_id, event_id in events.items()}
+        )
+
+    @staticmethod
+    async def update_many(updates: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Aplica atualizações parciais a várias sessões em batches de até 500 escritas
+
+        Args:
+            updates: Campos a alterar por sessionId
+
+        Returns:
+            List[str]: IDs das sessões atualizadas
+
+        Note:
+            Sessões apagadas entretanto são ignoradas: se um batch falhar com
+            NotFound, é repetido só com as sessões que ainda existem
+        """
+        collection = async_db.collection(StudySessionService.COLLECTION)
+        items = list(updates.items())
+        updated: List[str] = []
+        for start in range(0, len(items), SESSION_WRITE_BATCH):
+            chunk = dict(items[start:start + SESSION_WRITE_BATCH])
+            results = None
+            while chunk:
+                batch = async_db.batch()
+                for session_id, fields in chunk.items():
+                    batch.update(collection.document(session_id), fields)
+                try:
+                    results = await batch.commit()
+                    break
+                except NotFound:
+                    existing = await get_documents(collection, list(chunk), fields=[])
+                    for session_id in chunk.keys() - existing.keys():
+                        StudySessionService.CACHE.invalidate(session_id)
+                    chunk = {session_id: fields for session_id, fields in chunk.items() if session_id in existing}
+            if not chunk:
+                continue
+
+            for (session_id, fields), result in zip(chunk.items(), results):
+                cached = StudySessionService.CACHE.get_entry(session_id)
+                if cached is not None:
+                    session = cached.value.model_copy(update=fields)
+                    StudySessionService.CACHE.set(session_id, session, version=result.update_time)
+                updated.append(session_id)
+        return updated
+
+    @staticmethod
+    async def delete_study_session(session_id: str) -> bool:
         """
         Deleta uma study session do Firestore
         
@@ -100,38 +192,84 @@ class StudySessionService:
             Esta operação não deleta automaticamente o evento no Google Calendar
             se houver um calendarEvent vinculado
         """
-        db.collection(StudySessionService.COLLECTION).document(session_id).delete()
+        await async_db.collection(StudySessionService.COLLECTION).document(session_id).delete()
+        StudySessionService.CACHE.invalidate(session_id)
         return True
 
     @staticmethod
-    def list_study_sessions_by_user(user_id: str) -> List[StudySession]:
+    async def list_study_sessions_by_user(user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[StudySession]:
         """
-        Lista todas as study sessions de um usuário
+        Lista as study sessions de um usuário
         
         Args:
             user_id: ID único do usuário
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[StudySession]: Lista de todas as sessões do usuário (todas os estados)
+            Page[StudySession]: Página das sessões do usuário (todas os estados), ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(StudySessionService.COLLECTION).where(
+        query = async_db.collection(StudySessionService.COLLECTION).where(
             filter=FieldFilter("userId", "==", user_id)
-        ).stream()
-        return [StudySession(sessionId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[StudySession](
+            items=[StudySession(sessionId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
     @staticmethod
-    def list_study_sessions_by_topic(topic_id: str) -> List[StudySession]:
+    async def list_study_sessions_by_topic(topic_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[StudySession]:
         """
-        Lista todas as study sessions relacionadas a um topic
+        Lista as study sessions relacionadas a um topic
         
         Args:
             topic_id: ID único do topic
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[StudySession]: Lista de todas as sessões do topic especificado
+            Page[StudySession]: Página das sessões do topic especificado, ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(StudySessionService.COLLECTION).where(
+        query = async_db.collection(StudySessionService.COLLECTION).where(
             filter=FieldFilter("topicId", "==", topic_id)
-        ).stream()
-        return [StudySession(sessionId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[StudySession](
+            items=[StudySession(sessionId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    async def count_study_sessions_by_user(user_id: str) -> int:
+        """
+        Conta as study sessions do usuário sem transferir os documentos
+        
+        Args:
+            user_id: ID único do usuário
+        
+        Returns:
+            int: Número total de documentos (aggregation query no servidor)
+        """
+        query = async_db.collection(StudySessionService.COLLECTION).where(
+            filter=FieldFilter("userId", "==", user_id)
+        )
+        return await count_documents(query)
 
+    @staticmethod
+    async def count_study_sessions_by_topic(topic_id: str) -> int:
+        """
+        Conta as study sessions do topic sem transferir os documentos
+        
+        Args:
+            topic_id: ID único do topic
+        
+        Returns:
+            int: Número total de documentos (aggregation query no servidor)
+        """
+        query = async_db.collection(StudySessionService.COLLECTION).where(
+            filter=FieldFilter("topicId", "==", topic_id)
+        )
+        return await count_documents(query)
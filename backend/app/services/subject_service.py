@@ -1,10 +1,13 @@
 """
 Serviço para operações CRUD de Subject no Firestore
 """
-from app.services.firebase_service import db
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, DEFAULT_PAGE_SIZE
 from app.models.subject import Subject, SubjectCreate, SubjectUpdate
+from app.models.page import Page
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 from google.cloud.firestore_v1 import FieldFilter
 
 
@@ -17,11 +20,13 @@ class SubjectService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("subjects")
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
     """
     COLLECTION = "subjects"
+    CACHE = DocumentCache(COLLECTION)
 
     @staticmethod
-    def create_subject(subject_data: SubjectCreate) -> Subject:
+    async def create_subject(subject_data: SubjectCreate) -> Subject:
         """
         Cria um novo subject no Firestore
         
@@ -37,12 +42,14 @@ class SubjectService:
         subject_dict = subject_data.model_dump()
         subject_dict["createdAt"] = datetime.utcnow()
         
-        doc_ref = db.collection(SubjectService.COLLECTION).add(subject_dict)
+        doc_ref = await async_db.collection(SubjectService.COLLECTION).add(subject_dict)
         subject_dict["subjectId"] = doc_ref[1].id
-        return Subject(**subject_dict)
+        created = Subject(**subject_dict)
+        SubjectService.CACHE.set(created.subjectId, created, version=doc_ref[0])
+        return created
 
     @staticmethod
-    def get_subject(subject_id: str) -> Optional[Subject]:
+    async def get_subject(subject_id: str) -> Optional[Subject]:
         """
         Busca um subject por ID no Firestore
         
@@ -51,15 +58,24 @@ class SubjectService:
         
         Returns:
             Optional[Subject]: Dados do subject se encontrado, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(SubjectService.COLLECTION).document(subject_id).get()
+        cached = SubjectService.CACHE.get(subject_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(SubjectService.COLLECTION).document(subject_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return Subject(subjectId=doc.id, **data)
+            subject = Subject(subjectId=doc.id, **data)
+            SubjectService.CACHE.set(subject_id, subject, version=doc.update_time)
+            return subject
         return None
 
     @staticmethod
-    def update_subject(subject_id: str, subject_data: SubjectUpdate) -> Optional[Subject]:
+    async def update_subject(subject_id: str, subject_data: SubjectUpdate) -> Optional[Subject]:
         """
         Atualiza um subject existente no Firestore
         
@@ -69,17 +85,30 @@ class SubjectService:
         
         Returns:
             Optional[Subject]: Subject atualizado se encontrado, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = subject_data.model_dump(exclude_unset=True)
         if not update_data:
-            return SubjectService.get_subject(subject_id)
+            return await SubjectService.get_subject(subject_id)
         
-        doc_ref = db.collection(SubjectService.COLLECTION).document(subject_id)
-        doc_ref.update(update_data)
-        return SubjectService.get_subject(subject_id)
+        cached = SubjectService.CACHE.get_entry(subject_id)
+        snapshot = (cached.value.model_dump(exclude={"subjectId"}), cached.version) if cached else None
+        result = await update_document(SubjectService.COLLECTION, subject_id, update_data, snapshot)
+        if result is None:
+            SubjectService.CACHE.invalidate(subject_id)
+            return None
+
+        data, version = result
+        subject = Subject(subjectId=subject_id, **data)
+        SubjectService.CACHE.set(subject_id, subject, version=version)
+        return subject
 
     @staticmethod
-    def delete_subject(subject_id: str) -> bool:
+    async def delete_subject(subject_id: str) -> bool:
         """
         Deleta um subject do Firestore
         
@@ -90,25 +119,33 @@ class SubjectService:
             bool: True se a operação foi bem-sucedida
         
         Warning:
-            Esta operação não deleta automaticamente topics, notes ou
-            study sessions relacionados. Considere implementar cascade delete.
+            Apaga apenas o documento do subject; para apagar também os
+            topics e o que deles depende use CascadeDeleteService.
         """
-        db.collection(SubjectService.COLLECTION).document(subject_id).delete()
+        await async_db.collection(SubjectService.COLLECTION).document(subject_id).delete()
+        SubjectService.CACHE.invalidate(subject_id)
         return True
 
     @staticmethod
-    def list_subjects_by_user(user_id: str) -> List[Subject]:
+    async def list_subjects_by_user(user_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[Subject]:
         """
-        Lista todos os subjects de um usuário
+        Lista os subjects de um usuário
         
         Args:
             user_id: ID único do usuário
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[Subject]: Lista de todos os subjects do usuário especificado
+            Page[Subject]: Página dos subjects do usuário especificado, ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(SubjectService.COLLECTION).where(
+        query = async_db.collection(SubjectService.COLLECTION).where(
             filter=FieldFilter("userId", "==", user_id)
-        ).stream()
-        return [Subject(subjectId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[Subject](
+            items=[Subject(subjectId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
@@ -0,0 +1,152 @@
+"""
+Árvore de um subject (topics e os seus conteúdos) num único pedido
+
+Em vez de uma listagem por topic para cada tipo de conteúdo (1 + 3N
+pedidos), os topics do subject são lidos com uma query e os filhos de
+todos os topics com filtros "in" sobre `topicId` (blocos de 30, em
+paralelo, ver firestore_utils.query_in), todas as coleções ao mesmo tempo.
+
+A seleção de campos é feita no Firestore (projeção), pelo que campos
+pesados, como o conteúdo das notes, só são transferidos quando pedidos.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence
+
+from google.cloud.firestore_v1 import FieldFilter
+
+from app.services.firebase_service import async_db
+from app.services.firestore_utils import query_in
+from app.services.note_service import NoteService
+from app.services.slide_service import SlideService
+from app.services.subject_service import SubjectService
+from app.services.topic_service import TopicService
+from app.services.youtube_suggestion_service import YouTubeSuggestionService
+
+#Filhos de um topic na árvore: chave na resposta -> (coleção, campo do ID)
+TREE_CHILDREN = {
+    "notes": (NoteService.COLLECTION, "noteId"),
+    "slides": (SlideService.COLLECTION, "slideId"),
+    "youtubeSuggestions": (YouTubeSuggestionService.COLLECTION, "suggestionId"),
+}
+
+#Níveis aceites na seleção de campos ("nível.campo")
+TREE_LEVELS = ("subject", "topics", *TREE_CHILDREN)
+
+#Profundidade máxima: 0 = subject, 1 = topics, 2 = conteúdos dos topics
+TREE_MAX_DEPTH = 2
+
+
+class InvalidTreeQueryError(ValueError):
+    """Nível, campo ou filho desconhecido na consulta da árvore"""
+
+
+def parse_fields(fields: Optional[Sequence[str]]) -> Dict[str, List[str]]:
+    """
+    Agrupa a seleção de campos por nível
+
+    Example:
+        >>> parse_fields(["topics.title", "notes.source", "notes.createdAt"])
+        {'topics': ['title'], 'notes': ['source', 'createdAt']}
+
+    Raises:
+        InvalidTreeQueryError: Se um item não tiver o formato "nível.campo"
+            ou o nível for desconhecido
+    """
+    selected: Dict[str, List[str]] = {}
+    for item in fields or []:
+        level, _, field = item.partition(".")
+        if level not in TREE_LEVELS or not field:
+            raise InvalidTreeQueryError(
+                f"Campo inválido: {item!r} (use nível.campo, com nível em {', '.join(TREE_LEVELS)})"
+            )
+        selected.setdefault(level, []).append(field)
+    return selected
+
+
+def _document(id_field: str, doc, fields: Optional[List[str]]) -> Dict[str, Any]:
+    data = doc.to_dict() or {}
+    if fields is not None:
+        data = {field: data[field] for field in fields if field in data}
+    return {id_field: doc.id, **data}
+
+
+class SubjectTreeService:
+    """Leitura de um subject com os seus topics e conteúdos"""
+
+    @staticmethod
+    async def get_tree(
+        subject_id: str,
+        depth: int = TREE_MAX_DEPTH,
+        include: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Busca um subject como um documento aninhado
+
+        Args:
+            subject_id: ID único do subject
+            depth: 0 só o subject, 1 com os topics, 2 com os conteúdos dos topics
+            include: Conteúdos a incluir na profundidade 2 ("notes", "slides",
+                "youtubeSuggestions"); None inclui todos
+            fields: Campos a devolver por nível ("topics.title", "notes.source", ...);
+                níveis sem seleção devolvem os documentos completos e os IDs
+                vêm sempre incluídos
+
+        Returns:
+            Optional[dict]: {subjectId, ..., "topics": [{topicId, ..., "notes": [...],
+                "slides": [...], "youtubeSuggestions": [...]}]}, ou None se o
+                subject não existir. Topics e conteúdos vêm ordenados por ID.
+
+        Raises:
+            InvalidTreeQueryError: Se `include` ou `fields` forem inválidos
+        """
+        selected = parse_fields(fields)
+        children = list(TREE_CHILDREN) if include is None else list(dict.fromkeys(include))
+        unknown = [child for child in children if child not in TREE_CHILDREN]
+        if unknown:
+            raise InvalidTreeQueryError(
+                f"Conteúdo desconhecido: {', '.join(unknown)} (use {', '.join(TREE_CHILDREN)})"
+            )
+
+        subject = await SubjectService.get_subject(subject_id)
+        if subject is None:
+            return None
+        tree = subject.model_dump()
+        if "subject" in selected:
+            tree = {"subjectId": subject.subjectId, **{f: tree[f] for f in selected["subject"] if f in tree}}
+        if depth < 1:
+            return tree
+
+        topic_query = async_db.collection(TopicService.COLLECTION).where(
+            filter=FieldFilter("subjectId", "==", subject_id)
+        )
+        if "topics" in selected:
+            topic_query = topic_query.select(selected["topics"])
+        topic_docs = sorted([doc async for doc in topic_query.stream()], key=lambda doc: doc.id)
+        topics = [_document("topicId", doc, selected.get("topics")) for doc in topic_docs]
+        tree["topics"] = topics
+        if depth < 2:
+            return tree
+        for topic in topics:
+            topic.update({child: [] for child in children})
+        if not topics or not children:
+            return tree
+
+        topic_ids = [topic["topicId"] for topic in topics]
+
+        async def fetch(child: str) -> List[Any]:
+            collection, _ = TREE_CHILDREN[child]
+            projection = selected.get(child)
+            # topicId é sempre lido para agrupar os documentos pelo topic
+            projection = list(dict.fromkeys([*projection, "topicId"])) if projection is not None else None
+            return await query_in(async_db.collection(collection), "topicId", topic_ids, fields=projection)
+
+        results = await asyncio.gather(*(fetch(child) for child in children))
+        by_topic = {topic["topicId"]: topic for topic in topics}
+        for child, docs in zip(children, results):
+            _, id_field = TREE_CHILDREN[child]
+            for doc in sorted(docs, key=lambda doc: doc.id):
+                topic = by_topic.get((doc.to_dict() or {}).get("topicId"))
+                if topic is not None:
+                    topic[child].append(_document(id_field, doc, selected.get(child)))
+        return tree
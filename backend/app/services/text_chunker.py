@@ -0,0 +1,131 @@
+"""
+Divisão incremental de ficheiros de texto em partes com orçamento de tokens
+
+O upload é lido em blocos de tamanho fixo e decodificado com um decoder
+UTF-8 incremental (caracteres multibyte partidos entre blocos são tratados
+corretamente). O texto é cortado em fronteiras de parágrafo (linha em
+branco) e os parágrafos são agrupados em partes de até UPLOAD_CHUNK_TOKENS
+tokens estimados; parágrafos maiores do que isso são cortados em espaços.
+Em memória fica apenas o bloco atual e a parte em construção, qualquer que
+seja o tamanho do ficheiro.
+
+Configuração (variáveis de ambiente):
+    UPLOAD_CHUNK_TOKENS: Tokens estimados por parte (padrão: 3000)
+    UPLOAD_READ_SIZE: Bytes lidos do upload de cada vez (padrão: 65536)
+"""
+import codecs
+import os
+import re
+from typing import AsyncIterator, List, Protocol
+
+from app.services.gemini_service import estimate_tokens
+
+UPLOAD_CHUNK_TOKENS = int(os.getenv("UPLOAD_CHUNK_TOKENS", "3000"))
+UPLOAD_READ_SIZE = int(os.getenv("UPLOAD_READ_SIZE", str(64 * 1024)))
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+class AsyncReadable(Protocol):
+    """Fonte de bytes lida por blocos (ex: fastapi.UploadFile)"""
+
+    async def read(self, size: int = -1) -> bytes:
+        ...
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """Corta um parágrafo grande em pedaços de até max_chars, preferindo espaços"""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].lstrip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+class _ChunkBuilder:
+    """Agrupa parágrafos em partes sem ultrapassar o orçamento de tokens"""
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        # Inverso de estimate_tokens (~4 caracteres por token)
+        self.max_chars = max_tokens * 4
+        self._parts: List[str] = []
+        self._tokens = 0
+
+    def add(self, paragraph: str) -> List[str]:
+        """Acrescenta um parágrafo e devolve as partes que ficaram completas"""
+        paragraph = paragraph.strip()
+        if not paragraph:
+            return []
+        done = []
+        for piece in _split_long(paragraph, self.max_chars):
+            tokens = estimate_tokens(piece)
+            if self._parts and self._tokens + tokens > self.max_tokens:
+                done.append(self.flush())
+            self._parts.append(piece)
+            self._tokens += tokens
+        return done
+
+    def flush(self) -> str:
+        chunk = "\n\n".join(self._parts)
+        self._parts = []
+        self._tokens = 0
+        return chunk
+
+
+async def iter_text_chunks(
+    source: AsyncReadable,
+    max_tokens: int = UPLOAD_CHUNK_TOKENS,
+    read_size: int = UPLOAD_READ_SIZE,
+) -> AsyncIterator[str]:
+    """
+    Lê um ficheiro de texto por blocos e devolve as partes à medida que ficam prontas
+
+    Args:
+        source: Upload (ou outro objeto com `await read(size)`)
+        max_tokens: Tokens estimados máximos por parte
+        read_size: Bytes lidos de cada vez
+
+    Yields:
+        str: Partes do texto, pela ordem original
+
+    Raises:
+        UnicodeDecodeError: Se o ficheiro não estiver em UTF-8 (só é detetado
+            quando o bloco inválido é lido)
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    builder = _ChunkBuilder(max_tokens)
+    pending = ""
+
+    while True:
+        data = await source.read(read_size)
+        final = not data
+        pending += decoder.decode(data, final=final)
+
+        paragraphs = PARAGRAPH_BREAK.split(pending)
+        # O último parágrafo pode continuar no próximo bloco
+        pending = "" if final else paragraphs.pop()
+        for paragraph in paragraphs:
+            for chunk in builder.add(paragraph):
+                yield chunk
+
+        # Parágrafo sem fim à vista: não deixar o buffer crescer sem limite
+        while len(pending) > builder.max_chars:
+            cut = pending.rfind(" ", 0, builder.max_chars)
+            if cut <= 0:
+                cut = builder.max_chars
+            for chunk in builder.add(pending[:cut]):
+                yield chunk
+            pending = pending[cut:]
+
+        if final:
+            break
+
+    last = builder.flush()
+    if last:
+        yield last
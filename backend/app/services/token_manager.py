@@ -0,0 +1,309 @@
+"""
+Gestão dos tokens OAuth do Google no servidor
+
+Os tokens de cada utilizador (guardados em `users/{userId}.googleTokens`
+no login) ficam em memória depois da primeira leitura. Um access token a
+menos de TOKEN_REFRESH_MARGIN segundos de expirar é renovado antes de ser
+devolvido; pedidos concorrentes do mesmo utilizador partilham a mesma
+leitura/renovação (single-flight). O refresh da google-auth é síncrono e
+corre numa thread, fora do event loop.
+
+Uma tarefa em segundo plano renova antecipadamente os tokens dos
+utilizadores ativos que vão expirar antes da próxima verificação, pelo
+que os pedidos normalmente não esperam pelo Google. Utilizadores sem
+pedidos há mais de TOKEN_IDLE_TTL saem do cache.
+
+Configuração (variáveis de ambiente):
+    TOKEN_REFRESH_MARGIN: Segundos antes da expiração em que o token é
+        renovado (padrão: 300)
+    TOKEN_REFRESH_INTERVAL: Segundos entre verificações da renovação em
+        segundo plano (padrão: 60)
+    TOKEN_IDLE_TTL: Segundos sem uso até o utilizador sair do cache
+        (padrão: 3600)
+    TOKEN_CACHE_MAX_ENTRIES: Utilizadores mantidos em memória (padrão: 1000)
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from cachetools import LRUCache
+from google.auth.exceptions import RefreshError, TransportError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+from app.services.firebase_service import async_db
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+GOOGLE_TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", "300"))
+TOKEN_REFRESH_INTERVAL = float(os.getenv("TOKEN_REFRESH_INTERVAL", "60"))
+TOKEN_IDLE_TTL = float(os.getenv("TOKEN_IDLE_TTL", "3600"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "1000"))
+
+
+class TokenUnavailableError(Exception):
+    """Não há access token válido para o utilizador (ver status_code)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class _TokenEntry:
+    access_token: str
+    refresh_token: Optional[str]
+    expiry: Optional[datetime]
+    last_used: float
+
+    def expires_within(self, seconds: float) -> bool:
+        # Sem data de expiração conhecida o token é usado até o Google o recusar
+        if self.expiry is None:
+            return False
+        return self.expiry - datetime.now(timezone.utc) <= timedelta(seconds=seconds)
+
+
+def _parse_expiry(value: Any) -> Optional[datetime]:
+    # A google-auth usa datetimes UTC sem fuso (isoformat sem offset)
+    if isinstance(value, datetime):
+        expiry = value
+    elif isinstance(value, str) and value:
+        try:
+            expiry = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    return expiry if expiry.tzinfo else expiry.replace(tzinfo=timezone.utc)
+
+
+def _refresh_credentials(refresh_token: str) -> Credentials:
+    # Bloqueante (pedido HTTP síncrono da google-auth): corre numa thread
+    credentials = Credentials(
+        token=None,
+        refresh_token=refresh_token,
+        token_uri=GOOGLE_TOKEN_URI,
+        client_id=GOOGLE_CLIENT_ID,
+        client_secret=GOOGLE_CLIENT_SECRET,
+    )
+    credentials.refresh(Request())
+    return credentials
+
+
+class GoogleTokenManager:
+    """
+    Cache de tokens OAuth por utilizador com renovação single-flight
+
+    Attributes:
+        refresh_margin: Segundos antes da expiração em que o token é renovado
+        refresh_interval: Segundos entre verificações em segundo plano
+        idle_ttl: Segundos sem uso até o utilizador sair do cache
+    """
+
+    def __init__(
+        self,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+        refresh_interval: float = TOKEN_REFRESH_INTERVAL,
+        idle_ttl: float = TOKEN_IDLE_TTL,
+        max_entries: int = TOKEN_CACHE_MAX_ENTRIES,
+    ):
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = refresh_interval
+        self.idle_ttl = idle_ttl
+        self._entries: LRUCache = LRUCache(maxsize=max_entries)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._background_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.loads = 0
+        self.shared = 0
+        self.refreshes = 0
+        self.background_refreshes = 0
+        self.refresh_failures = 0
+
+    async def get_access_token(self, user_id: str) -> str:
+        """
+        Devolve um access token válido do utilizador
+
+        Args:
+            user_id: ID do utilizador
+
+        Returns:
+            str: Access token com pelo menos `refresh_margin` segundos de validade
+                (ou sem expiração conhecida)
+
+        Raises:
+            TokenUnavailableError: Utilizador ou token inexistente (404), token
+                expirado sem refresh token ou refresh recusado pelo Google (401),
+                ou Google inacessível durante o refresh (503)
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None and not entry.expires_within(self.refresh_margin):
+            self.hits += 1
+            entry.last_used = time.monotonic()
+            return entry.access_token
+        entry = await self._single_flight(user_id, self.refresh_margin)
+        entry.last_used = time.monotonic()
+        return entry.access_token
+
+    async def _single_flight(self, user_id: str, margin: float) -> _TokenEntry:
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._load(user_id, margin))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        else:
+            self.shared += 1
+        # shield: o cancelamento de um pedido não cancela o refresh partilhado
+        return await asyncio.shield(task)
+
+    async def _load(self, user_id: str, margin: float) -> _TokenEntry:
+        # Relê o documento: o login ou outro processo podem já ter renovado o token
+        self.loads += 1
+        user_ref = async_db.collection("users").document(user_id)
+        doc = await user_ref.get()
+        if not doc.exists:
+            self._entries.pop(user_id, None)
+            raise TokenUnavailableError(404, "Usuário não encontrado")
+
+        tokens = doc.to_dict().get("googleTokens") or {}
+        if not tokens.get("access_token"):
+            self._entries.pop(user_id, None)
+            raise TokenUnavailableError(
+                404, "Access token não encontrado. O usuário precisa fazer login novamente."
+            )
+
+        previous = self._entries.get(user_id)
+        entry = _TokenEntry(
+            access_token=tokens["access_token"],
+            refresh_token=tokens.get("refresh_token"),
+            expiry=_parse_expiry(tokens.get("expiry")),
+            last_used=previous.last_used if previous is not None else time.monotonic(),
+        )
+        if entry.expires_within(margin):
+            entry = await self._refresh(user_ref, entry)
+        self._entries[user_id] = entry
+        return entry
+
+    async def _refresh(self, user_ref, entry: _TokenEntry) -> _TokenEntry:
+        if not entry.refresh_token:
+            if not entry.expires_within(0):
+                # Ainda válido: serve até expirar
+                return entry
+            raise TokenUnavailableError(
+                401, "Access token expirado e refresh token não disponível. O usuário precisa fazer login novamente."
+            )
+
+        self.refreshes += 1
+        try:
+            credentials = await asyncio.to_thread(_refresh_credentials, entry.refresh_token)
+        except RefreshError as e:
+            self.refresh_failures += 1
+            raise TokenUnavailableError(
+                401, f"Erro ao fazer refresh do token: {str(e)}. O usuário precisa fazer login novamente."
+            )
+        except TransportError as e:
+            self.refresh_failures += 1
+            if not entry.expires_within(0):
+                return entry
+            raise TokenUnavailableError(503, f"Não foi possível contactar o Google para renovar o token: {str(e)}")
+
+        refreshed = _TokenEntry(
+            access_token=credentials.token,
+            refresh_token=credentials.refresh_token or entry.refresh_token,
+            expiry=_parse_expiry(credentials.expiry),
+            last_used=entry.last_used,
+        )
+        await user_ref.update({"googleTokens": {
+            "access_token": refreshed.access_token,
+            "refresh_token": refreshed.refresh_token,
+            "expiry": credentials.expiry.isoformat() if credentials.expiry else None,
+        }})
+        return refreshed
+
+    def invalidate(self, user_id: str) -> None:
+        """Descarta os tokens em memória do utilizador (ex: novo login)"""
+        self._entries.pop(user_id, None)
+
+    async def start(self) -> None:
+        """Inicia a renovação em segundo plano (lifespan)"""
+        if self._background_task is None or self._background_task.done():
+            self._background_task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """Cancela a renovação em segundo plano e os refreshes pendentes (shutdown)"""
+        tasks = [self._background_task, *self._inflight.values()]
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._background_task = None
+        self._inflight.clear()
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_expiring()
+            except Exception:
+                logger.debug("Falha na renovação de tokens em segundo plano", exc_info=True)
+
+    async def refresh_expiring(self) -> int:
+        """
+        Renova os tokens em cache que expiram antes da próxima verificação
+
+        Utilizadores inativos há mais de `idle_ttl` saem do cache em vez de
+        serem renovados.
+
+        Returns:
+            int: Número de utilizadores renovados
+        """
+        now = time.monotonic()
+        for user_id, entry in list(self._entries.items()):
+            if now - entry.last_used > self.idle_ttl:
+                self._entries.pop(user_id, None)
+
+        margin = self.refresh_margin + self.refresh_interval
+        due = [
+            user_id for user_id, entry in list(self._entries.items())
+            if entry.refresh_token and entry.expires_within(margin)
+        ]
+        results = await asyncio.gather(
+            *(self._single_flight(user_id, margin) for user_id in due), return_exceptions=True
+        )
+        refreshed = 0
+        for user_id, result in zip(due, results):
+            if isinstance(result, BaseException):
+                logger.debug("Falha ao renovar o token de %s: %s", user_id, result)
+            else:
+                refreshed += 1
+        self.background_refreshes += refreshed
+        return refreshed
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do cache de tokens (para métricas)"""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._entries.maxsize,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "loads": self.loads,
+            "shared": self.shared,
+            "refreshes": self.refreshes,
+            "background_refreshes": self.background_refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+token_manager = GoogleTokenManager()
@@ -1,9 +1,12 @@
 """
 Serviço para operações CRUD de Topic no Firestore
 """
-from app.services.firebase_service import db
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, DEFAULT_PAGE_SIZE
 from app.models.topic import Topic, TopicCreate, TopicUpdate
-from typing import Optional, List
+from app.models.page import Page
+from typing import Optional
 from google.cloud.firestore_v1 import FieldFilter
 
 
@@ -16,11 +19,13 @@ class TopicService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("topics")
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
     """
     COLLECTION = "topics"
+    CACHE = DocumentCache(COLLECTION)
 
     @staticmethod
-    def create_topic(topic_data: TopicCreate) -> Topic:
+    async def create_topic(topic_data: TopicCreate) -> Topic:
         """
         Cria um novo topic no Firestore
         
@@ -32,12 +37,14 @@ class TopicService:
         """
         topic_dict = topic_data.model_dump()
         
-        doc_ref = db.collection(TopicService.COLLECTION).add(topic_dict)
+        doc_ref = await async_db.collection(TopicService.COLLECTION).add(topic_dict)
         topic_dict["topicId"] = doc_ref[1].id
-        return Topic(**topic_dict)
+        created = Topic(**topic_dict)
+        TopicService.CACHE.set(created.topicId, created, version=doc_ref[0])
+        return created
 
     @staticmethod
-    def get_topic(topic_id: str) -> Optional[Topic]:
+    async def get_topic(topic_id: str) -> Optional[Topic]:
         """
         Busca um topic por ID no Firestore
         
@@ -46,15 +53,24 @@ class TopicService:
         
         Returns:
             Optional[Topic]: Dados do topic se encontrado, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(TopicService.COLLECTION).document(topic_id).get()
+        cached = TopicService.CACHE.get(topic_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(TopicService.COLLECTION).document(topic_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return Topic(topicId=doc.id, **data)
+            topic = Topic(topicId=doc.id, **data)
+            TopicService.CACHE.set(topic_id, topic, version=doc.update_time)
+            return topic
         return None
 
     @staticmethod
-    def update_topic(topic_id: str, topic_data: TopicUpdate) -> Optional[Topic]:
+    async def update_topic(topic_id: str, topic_data: TopicUpdate) -> Optional[Topic]:
         """
         Atualiza um topic existente no Firestore
         
@@ -66,17 +82,30 @@ class TopicService:
         
         Returns:
             Optional[Topic]: Topic atualizado se encontrado, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = topic_data.model_dump(exclude_unset=True)
         if not update_data:
-            return TopicService.get_topic(topic_id)
+            return await TopicService.get_topic(topic_id)
         
-        doc_ref = db.collection(TopicService.COLLECTION).document(topic_id)
-        doc_ref.update(update_data)
-        return TopicService.get_topic(topic_id)
+        cached = TopicService.CACHE.get_entry(topic_id)
+        snapshot = (cached.value.model_dump(exclude={"topicId"}), cached.version) if cached else None
+        result = await update_document(TopicService.COLLECTION, topic_id, update_data, snapshot)
+        if result is None:
+            TopicService.CACHE.invalidate(topic_id)
+            return None
+
+        data, version = result
+        topic = Topic(topicId=topic_id, **data)
+        TopicService.CACHE.set(topic_id, topic, version=version)
+        return topic
 
     @staticmethod
-    def delete_topic(topic_id: str) -> bool:
+    async def delete_topic(topic_id: str) -> bool:
         """
         Deleta um topic do Firestore
         
@@ -87,25 +116,34 @@ class TopicService:
             bool: True se a operação foi bem-sucedida
         
         Warning:
-            Esta operação não deleta automaticamente notes, slides ou
-            study sessions relacionados. Considere implementar cascade delete.
+            Apaga apenas o documento do topic; para apagar também notes,
+            slides, study sessions, AI requests e sugestões use
+            CascadeDeleteService.
         """
-        db.collection(TopicService.COLLECTION).document(topic_id).delete()
+        await async_db.collection(TopicService.COLLECTION).document(topic_id).delete()
+        TopicService.CACHE.invalidate(topic_id)
         return True
 
     @staticmethod
-    def list_topics_by_subject(subject_id: str) -> List[Topic]:
+    async def list_topics_by_subject(subject_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[Topic]:
         """
-        Lista todos os topics relacionados a um subject
+        Lista os topics relacionados a um subject
         
         Args:
             subject_id: ID único do subject
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[Topic]: Lista de todos os topics do subject especificado
+            Page[Topic]: Página dos topics do subject especificado, ordenada por ID,
+                com `next_cursor` para a página seguinte
         """
-        docs = db.collection(TopicService.COLLECTION).where(
+        query = async_db.collection(TopicService.COLLECTION).where(
             filter=FieldFilter("subjectId", "==", subject_id)
-        ).stream()
-        return [Topic(topicId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[Topic](
+            items=[Topic(topicId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
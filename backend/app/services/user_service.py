@@ -1,10 +1,13 @@
 """
 Serviço para operações CRUD de User no Firestore
 """
-from app.services.firebase_service import db
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, DEFAULT_PAGE_SIZE
 from app.models.user import User, UserCreate, UserUpdate
+from app.models.page import Page
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional
 from google.cloud.firestore_v1 import FieldFilter
 
 
@@ -17,11 +20,13 @@ class UserService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("users")
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
     """
     COLLECTION = "users"
+    CACHE = DocumentCache(COLLECTION)
 
     @staticmethod
-    def create_user(user_data: UserCreate) -> User:
+    async def create_user(user_data: UserCreate) -> User:
         """
         Cria um novo usuário no Firestore
         
@@ -41,7 +46,7 @@ class UserService:
         user_dict["createdAt"] = datetime.utcnow()
         
         # Verificar se já existe usuário com esse email
-        existing = db.collection(UserService.COLLECTION).where(
+        existing = await async_db.collection(UserService.COLLECTION).where(
             filter=FieldFilter("email", "==", user_data.email)
         ).limit(1).get()
         
@@ -51,12 +56,14 @@ class UserService:
             return User(userId=doc.id, **doc.to_dict())
         
         # Criar novo usuário
-        doc_ref = db.collection(UserService.COLLECTION).add(user_dict)
+        doc_ref = await async_db.collection(UserService.COLLECTION).add(user_dict)
         user_dict["userId"] = doc_ref[1].id
-        return User(**user_dict)
+        created = User(**user_dict)
+        UserService.CACHE.set(created.userId, created, version=doc_ref[0])
+        return created
 
     @staticmethod
-    def get_user(user_id: str) -> Optional[User]:
+    async def get_user(user_id: str) -> Optional[User]:
         """
         Busca um usuário por ID no Firestore
         
@@ -65,15 +72,24 @@ class UserService:
         
         Returns:
             Optional[User]: Dados do usuário se encontrado, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(UserService.COLLECTION).document(user_id).get()
+        cached = UserService.CACHE.get(user_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(UserService.COLLECTION).document(user_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return User(userId=doc.id, **data)
+            user = User(userId=doc.id, **data)
+            UserService.CACHE.set(user_id, user, version=doc.update_time)
+            return user
         return None
 
     @staticmethod
-    def get_user_by_email(email: str) -> Optional[User]:
+    async def get_user_by_email(email: str) -> Optional[User]:
         """
         Busca um usuário por email no Firestore
         
@@ -86,7 +102,7 @@ class UserService:
         Note:
             Retorna apenas o primeiro usuário encontrado com o email especificado
         """
-        docs = db.collection(UserService.COLLECTION).where(
+        docs = await async_db.collection(UserService.COLLECTION).where(
             filter=FieldFilter("email", "==", email)
         ).limit(1).get()
         
@@ -97,7 +113,7 @@ class UserService:
         return None
 
     @staticmethod
-    def update_user(user_id: str, user_data: UserUpdate) -> Optional[User]:
+    async def update_user(user_id: str, user_data: UserUpdate) -> Optional[User]:
         """
         Atualiza um usuário existente no Firestore
         
@@ -110,17 +126,30 @@ class UserService:
         
         Returns:
             Optional[User]: Usuário atualizado se encontrado, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = user_data.model_dump(exclude_unset=True)
         if not update_data:
-            return UserService.get_user(user_id)
-        
-        doc_ref = db.collection(UserService.COLLECTION).document(user_id)
-        doc_ref.update(update_data)
-        return UserService.get_user(user_id)
+            return await UserService.get_user(user_id)
+        
+        cached = UserService.CACHE.get_entry(user_id)
+        snapshot = (cached.value.model_dump(exclude={"userId"}), cached.version) if cached else None
+        result = await update_document(UserService.COLLECTION, user_id, update_data, snapshot)
+        if result is None:
+            UserService.CACHE.invalidate(user_id)
+            return None
+
+        data, version = result
+        user = User(userId=user_id, **data)
+        UserService.CACHE.set(user_id, user, version=version)
+        return user
 
     @staticmethod
-    def delete_user(user_id: str) -> bool:
+    async def delete_user(user_id: str) -> bool:
         """
         Deleta um usuário do Firestore
         
@@ -134,21 +163,27 @@ class UserService:
             Esta operação é irreversível. Certifique-se de que não há dados
             dependentes antes de deletar um usuário.
         """
-        db.collection(UserService.COLLECTION).document(user_id).delete()
+        await async_db.collection(UserService.COLLECTION).document(user_id).delete()
+        UserService.CACHE.invalidate(user_id)
         return True
 
     @staticmethod
-    def list_users() -> List[User]:
+    async def list_users(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[User]:
         """
-        Lista todos os usuários cadastrados no Firestore
+        Lista os usuários cadastrados no Firestore, uma página de cada vez
         
-        Returns:
-            List[User]: Lista de todos os usuários (pode ser grande - use com cuidado)
+        Args:
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
-        Warning:
-            Esta operação pode ser custosa se houver muitos usuários.
-            Considere implementar paginação para produção.
+        Returns:
+            Page[User]: Página de usuários ordenada por ID, com `next_cursor`
+                para a página seguinte
         """
-        docs = db.collection(UserService.COLLECTION).stream()
-        return [User(userId=doc.id, **doc.to_dict()) for doc in docs]
+        query = async_db.collection(UserService.COLLECTION)
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[User](
+            items=[User(userId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
@@ -0,0 +1,205 @@
+"""
+Cache de resultados de pesquisa do YouTube
+
+Cada search.list custa 100 unidades de quota, e os títulos dos topics
+repetem-se muito. As pesquisas são guardadas por consulta normalizada
+(minúsculas, sem acentos e com espaços colapsados), pelo que "Álgebra
+Linear" e "  algebra  linear" partilham a mesma entrada. Uma entrada serve
+pedidos com `max_results` até ao número de resultados que foi pedido à API.
+
+Cada entrada é fresca durante YOUTUBE_CACHE_TTL; depois disso fica ainda
+disponível como resultado expirado (stale) durante YOUTUBE_CACHE_STALE_TTL,
+para ser servida quando a quota está a acabar ou a API falha.
+
+O cache tem dois níveis:
+    memória: LRU limitado em número de entradas, com TTL por entrada
+    Firestore: coleção "youtube_search_cache", partilhada entre processos e
+        reinícios. Configure uma TTL policy do Firestore sobre `purgeAt`
+        para remover as entradas que já nem como stale servem
+
+Configuração (variáveis de ambiente):
+    YOUTUBE_CACHE_ENABLED: "false" desativa o cache (padrão: "true")
+    YOUTUBE_CACHE_PERSISTENT: "false" usa apenas o nível em memória (padrão: "true")
+    YOUTUBE_CACHE_TTL: Segundos em que um resultado é fresco (padrão: 1 dia)
+    YOUTUBE_CACHE_STALE_TTL: Segundos adicionais como stale (padrão: 30 dias)
+    YOUTUBE_CACHE_MAX_ENTRIES: Entradas no nível em memória (padrão: 2000)
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from cachetools import TLRUCache
+
+from app.services.firebase_service import async_db
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_CACHE_ENABLED = os.getenv("YOUTUBE_CACHE_ENABLED", "true").lower() != "false"
+YOUTUBE_CACHE_PERSISTENT = os.getenv("YOUTUBE_CACHE_PERSISTENT", "true").lower() != "false"
+YOUTUBE_CACHE_TTL = float(os.getenv("YOUTUBE_CACHE_TTL", str(24 * 3600)))
+YOUTUBE_CACHE_STALE_TTL = float(os.getenv("YOUTUBE_CACHE_STALE_TTL", str(30 * 24 * 3600)))
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "2000"))
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normaliza uma consulta para uso como chave de cache
+
+    Example:
+        >>> normalize_query("  Álgebra   LINEAR ")
+        'algebra linear'
+    """
+    decomposed = unicodedata.normalize("NFKD", query)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return WHITESPACE.sub(" ", without_accents.casefold()).strip()
+
+
+def _entry_purge(key: str, entry: Dict[str, Any], now: float) -> float:
+    return entry["purge_at"]
+
+
+class YouTubeSearchCache:
+    """
+    Cache de dois níveis (memória + Firestore) para pesquisas do YouTube
+
+    Attributes:
+        COLLECTION: Nome da coleção do nível persistente ("youtube_search_cache")
+    """
+    COLLECTION = "youtube_search_cache"
+
+    def __init__(
+        self,
+        max_entries: int = YOUTUBE_CACHE_MAX_ENTRIES,
+        ttl: float = YOUTUBE_CACHE_TTL,
+        stale_ttl: float = YOUTUBE_CACHE_STALE_TTL,
+        persistent: bool = YOUTUBE_CACHE_PERSISTENT,
+    ):
+        self.enabled = YOUTUBE_CACHE_ENABLED
+        self.persistent = persistent
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # O relógio é time.time para que os prazos coincidam com os guardados no Firestore
+        self._memory = TLRUCache(maxsize=max_entries, ttu=_entry_purge, timer=time.time)
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.stale_served = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        """Chave (SHA-256) da consulta normalizada"""
+        return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+    async def get(self, query: str, max_results: int) -> Optional[Dict[str, Any]]:
+        """
+        Busca os resultados de uma consulta (memória primeiro, depois Firestore)
+
+        Args:
+            query: Consulta tal como recebida
+            max_results: Número de resultados pretendido
+
+        Returns:
+            Optional[dict]: {"results": list, "stale": bool}, ou None se não
+                houver entrada que sirva (ausente, já purgável ou com menos
+                resultados pedidos do que `max_results`)
+        """
+        if not self.enabled:
+            return None
+
+        key = YouTubeSearchCache.make_key(query)
+        entry = self._memory.get(key)
+        if entry is not None and entry["max_results"] >= max_results:
+            self.memory_hits += 1
+            return self._serve(entry, max_results)
+
+        if self.persistent:
+            try:
+                doc = await async_db.collection(YouTubeSearchCache.COLLECTION).document(key).get()
+            except Exception:
+                logger.debug("Falha ao ler cache persistente do YouTube", exc_info=True)
+                doc = None
+            if doc is not None and doc.exists:
+                data = doc.to_dict()
+                purge_at = data.get("purgeAt")
+                if purge_at is not None and purge_at.timestamp() > time.time() and data.get("maxResults", 0) >= max_results:
+                    self.persistent_hits += 1
+                    entry = {
+                        "results": data.get("results", []),
+                        "max_results": data["maxResults"],
+                        "expires_at": data["expiresAt"].timestamp(),
+                        "purge_at": purge_at.timestamp(),
+                    }
+                    self._memory[key] = entry
+                    return self._serve(entry, max_results)
+
+        self.misses += 1
+        return None
+
+    def _serve(self, entry: Dict[str, Any], max_results: int) -> Dict[str, Any]:
+        stale = entry["expires_at"] <= time.time()
+        return {"results": entry["results"][:max_results], "stale": stale}
+
+    def record_stale_served(self) -> None:
+        """Conta um resultado stale efetivamente devolvido ao cliente"""
+        self.stale_served += 1
+
+    async def set(self, query: str, max_results: int, results: List[Dict[str, Any]]) -> None:
+        """
+        Guarda os resultados de uma pesquisa nos dois níveis
+
+        Args:
+            query: Consulta tal como recebida
+            max_results: Número de resultados pedido à API
+            results: Resultados devolvidos pela API
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        key = YouTubeSearchCache.make_key(query)
+        entry = {
+            "results": results,
+            "max_results": max_results,
+            "expires_at": now + self.ttl,
+            "purge_at": now + self.ttl + self.stale_ttl,
+        }
+        self.stores += 1
+        self._memory[key] = entry
+        if self.persistent:
+            try:
+                await async_db.collection(YouTubeSearchCache.COLLECTION).document(key).set({
+                    "query": normalize_query(query),
+                    "results": results,
+                    "maxResults": max_results,
+                    "createdAt": datetime.fromtimestamp(now, tz=timezone.utc),
+                    "expiresAt": datetime.fromtimestamp(entry["expires_at"], tz=timezone.utc),
+                    "purgeAt": datetime.fromtimestamp(entry["purge_at"], tz=timezone.utc),
+                })
+            except Exception:
+                logger.debug("Falha ao gravar cache persistente do YouTube", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do cache de pesquisas (para métricas)"""
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "persistent": self.persistent,
+            "memory_entries": len(self._memory),
+            "memory_max_entries": self._memory.maxsize,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "stale_served": self.stale_served,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+        }
+
+
+search_cache = YouTubeSearchCache()
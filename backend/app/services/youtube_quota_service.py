@@ -0,0 +1,138 @@
+"""
+Registo diário da quota da YouTube Data API
+
+Cada chamada conta unidades (search.list = 100) contra a quota diária do
+projeto, que reinicia à meia-noite do horário do Pacífico. O consumo é
+guardado no Firestore (coleção "youtube_quota", um documento por dia) com
+incrementos atómicos, pelo que é partilhado entre a API e os workers.
+
+Acima do limite suave (YOUTUBE_QUOTA_SOFT_LIMIT) as pesquisas devem servir
+resultados em cache, mesmo expirados, e só chamam a API quando não há
+nenhum; chamadas que ultrapassariam a quota diária são recusadas.
+
+Configuração (variáveis de ambiente):
+    YOUTUBE_DAILY_QUOTA: Unidades disponíveis por dia (padrão: 10000)
+    YOUTUBE_QUOTA_SOFT_LIMIT: Fração da quota a partir da qual se prefere
+        o cache expirado (padrão: 0.8)
+    YOUTUBE_QUOTA_SYNC_INTERVAL: Segundos entre leituras do consumo
+        registado por outros processos (padrão: 30)
+"""
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from google.cloud.firestore_v1 import Increment
+
+from app.services.firebase_service import async_db
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_DAILY_QUOTA = int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000"))
+YOUTUBE_QUOTA_SOFT_LIMIT = float(os.getenv("YOUTUBE_QUOTA_SOFT_LIMIT", "0.8"))
+YOUTUBE_QUOTA_SYNC_INTERVAL = float(os.getenv("YOUTUBE_QUOTA_SYNC_INTERVAL", "30"))
+
+#Custo em unidades de quota de cada método usado
+SEARCH_COST = 100
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except Exception:
+    # Sem base de dados de fusos horários (ex: imagem mínima sem tzdata)
+    QUOTA_TIMEZONE = timezone.utc
+
+
+def quota_day() -> str:
+    """Dia de quota atual (AAAA-MM-DD no horário do Pacífico)"""
+    return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+
+class YouTubeQuotaLedger:
+    """
+    Consumo diário de quota do YouTube
+
+    Attributes:
+        COLLECTION: Nome da coleção no Firestore ("youtube_quota")
+        daily_quota: Unidades disponíveis por dia
+        soft_limit: Fração da quota a partir da qual se prefere o cache
+    """
+    COLLECTION = "youtube_quota"
+
+    def __init__(
+        self,
+        daily_quota: int = YOUTUBE_DAILY_QUOTA,
+        soft_limit: float = YOUTUBE_QUOTA_SOFT_LIMIT,
+        sync_interval: float = YOUTUBE_QUOTA_SYNC_INTERVAL,
+    ):
+        self.daily_quota = daily_quota
+        self.soft_limit = soft_limit
+        self.sync_interval = sync_interval
+        self._day = quota_day()
+        self._used = 0
+        self._synced_at = 0.0
+        self.denied = 0
+
+    def _roll_day(self) -> None:
+        day = quota_day()
+        if day != self._day:
+            self._day = day
+            self._used = 0
+            self._synced_at = 0.0
+
+    async def used(self) -> int:
+        """Unidades gastas hoje (relidas do Firestore a cada sync_interval)"""
+        self._roll_day()
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            try:
+                doc = await async_db.collection(YouTubeQuotaLedger.COLLECTION).document(self._day).get()
+                if doc.exists:
+                    self._used = max(self._used, int(doc.to_dict().get("units", 0)))
+            except Exception:
+                logger.debug("Falha ao ler a quota do YouTube", exc_info=True)
+            self._synced_at = time.monotonic()
+        return self._used
+
+    async def over_soft_limit(self) -> bool:
+        """Indica se o consumo já passou do limite suave (preferir cache expirado)"""
+        return await self.used() >= self.daily_quota * self.soft_limit
+
+    async def can_spend(self, units: int) -> bool:
+        """Indica se ainda há quota para uma chamada de `units` unidades"""
+        allowed = await self.used() + units <= self.daily_quota
+        if not allowed:
+            self.denied += 1
+        return allowed
+
+    async def charge(self, units: int) -> None:
+        """Regista o consumo de uma chamada feita à API"""
+        self._roll_day()
+        self._used += units
+        try:
+            await async_db.collection(YouTubeQuotaLedger.COLLECTION).document(self._day).set(
+                {"day": self._day, "units": Increment(units), "updatedAt": datetime.now(timezone.utc)},
+                merge=True,
+            )
+        except Exception:
+            logger.debug("Falha ao registar a quota do YouTube", exc_info=True)
+
+    def mark_exhausted(self) -> None:
+        """Marca a quota de hoje como esgotada (a API respondeu quotaExceeded)"""
+        self._roll_day()
+        self._used = max(self._used, self.daily_quota)
+
+    def stats(self) -> Dict[str, Any]:
+        """Consumo conhecido do dia atual (para métricas)"""
+        self._roll_day()
+        return {
+            "day": self._day,
+            "used": self._used,
+            "daily_quota": self.daily_quota,
+            "remaining": max(0, self.daily_quota - self._used),
+            "soft_limit": int(self.daily_quota * self.soft_limit),
+            "denied": self.denied,
+        }
+
+
+youtube_quota = YouTubeQuotaLedger()
@@ -1,9 +1,12 @@
 """
 Serviço para operações CRUD de YouTubeSuggestion no Firestore
 """
-from app.services.firebase_service import db
+from app.services.firebase_service import async_db
+from app.services.cache_service import DocumentCache
+from app.services.firestore_utils import update_document, paginate, count_documents, query_in, DEFAULT_PAGE_SIZE
 from app.models.youtube_suggestion import YouTubeSuggestion, YouTubeSuggestionCreate, YouTubeSuggestionUpdate
-from typing import Optional, List
+from app.models.page import Page
+from typing import Dict, List, Optional, Sequence, Set
 from google.cloud.firestore_v1 import FieldFilter
 
 
@@ -16,11 +19,15 @@ class YouTubeSuggestionService:
     
     Attributes:
         COLLECTION: Nome da coleção no Firestore ("youtube_suggestions")
+        MAX_SUGGESTIONS_PER_TOPIC: Número máximo de sugestões por topic (5)
+        CACHE: Cache read-through dos documentos da coleção (LRU + TTL)
     """
     COLLECTION = "youtube_suggestions"
+    CACHE = DocumentCache(COLLECTION)
+    MAX_SUGGESTIONS_PER_TOPIC = 5
 
     @staticmethod
-    def create_youtube_suggestion(suggestion_data: YouTubeSuggestionCreate) -> YouTubeSuggestion:
+    async def create_youtube_suggestion(suggestion_data: YouTubeSuggestionCreate) -> YouTubeSuggestion:
         """
         Cria uma nova sugestão do YouTube no Firestore
         
@@ -32,12 +39,41 @@ class YouTubeSuggestionService:
         """
         suggestion_dict = suggestion_data.model_dump()
         
-        doc_ref = db.collection(YouTubeSuggestionService.COLLECTION).add(suggestion_dict)
+        doc_ref = await async_db.collection(YouTubeSuggestionService.COLLECTION).add(suggestion_dict)
         suggestion_dict["suggestionId"] = doc_ref[1].id
-        return YouTubeSuggestion(**suggestion_dict)
+        created = YouTubeSuggestion(**suggestion_dict)
+        YouTubeSuggestionService.CACHE.set(created.suggestionId, created, version=doc_ref[0])
+        return created
 
     @staticmethod
-    def get_youtube_suggestion(suggestion_id: str) -> Optional[YouTubeSuggestion]:
+    async def create_youtube_suggestions_batch(suggestions: List[YouTubeSuggestionCreate]) -> List[YouTubeSuggestion]:
+        """
+        Cria várias sugestões num único batch do Firestore (tudo ou nada)
+
+        Args:
+            suggestions: Sugestões a criar (no máximo 500, limite de um batch)
+
+        Returns:
+            List[YouTubeSuggestion]: Sugestões criadas, pela mesma ordem
+        """
+        if not suggestions:
+            return []
+        collection = async_db.collection(YouTubeSuggestionService.COLLECTION)
+        batch = async_db.batch()
+        created = []
+        for suggestion_data in suggestions:
+            doc_ref = collection.document()
+            suggestion_dict = suggestion_data.model_dump()
+            batch.set(doc_ref, suggestion_dict)
+            created.append(YouTubeSuggestion(suggestionId=doc_ref.id, **suggestion_dict))
+
+        results = await batch.commit()
+        for suggestion, result in zip(created, results):
+            YouTubeSuggestionService.CACHE.set(suggestion.suggestionId, suggestion, version=result.update_time)
+        return created
+
+    @staticmethod
+    async def get_youtube_suggestion(suggestion_id: str) -> Optional[YouTubeSuggestion]:
         """
         Busca uma sugestão do YouTube por ID no Firestore
         
@@ -46,15 +82,24 @@ class YouTubeSuggestionService:
         
         Returns:
             Optional[YouTubeSuggestion]: Dados da sugestão se encontrada, None caso contrário
+        
+        Note:
+            Consulta primeiro o CACHE; só acessa o Firestore em caso de miss
         """
-        doc = db.collection(YouTubeSuggestionService.COLLECTION).document(suggestion_id).get()
+        cached = YouTubeSuggestionService.CACHE.get(suggestion_id)
+        if cached is not None:
+            return cached
+
+        doc = await async_db.collection(YouTubeSuggestionService.COLLECTION).document(suggestion_id).get()
         if doc.exists:
             data = doc.to_dict()
-            return YouTubeSuggestion(suggestionId=doc.id, **data)
+            suggestion = YouTubeSuggestion(suggestionId=doc.id, **data)
+            YouTubeSuggestionService.CACHE.set(suggestion_id, suggestion, version=doc.update_time)
+            return suggestion
         return None
 
     @staticmethod
-    def update_youtube_suggestion(suggestion_id: str, suggestion_data: YouTubeSuggestionUpdate) -> Optional[YouTubeSuggestion]:
+    async def update_youtube_suggestion(suggestion_id: str, suggestion_data: YouTubeSuggestionUpdate) -> Optional[YouTubeSuggestion]:
         """
         Atualiza uma sugestão do YouTube existente no Firestore
         
@@ -64,17 +109,30 @@ class YouTubeSuggestionService:
         
         Returns:
             Optional[YouTubeSuggestion]: Sugestão atualizada se encontrada, None caso contrário
+        
+        Note:
+            A entidade devolvida é o snapshot (do CACHE ou lido uma vez) com o patch
+            aplicado, sem releitura após a escrita. Documentos inexistentes
+            retornam None em vez de propagar NotFound do Firestore
         """
         update_data = suggestion_data.model_dump(exclude_unset=True)
         if not update_data:
-            return YouTubeSuggestionService.get_youtube_suggestion(suggestion_id)
-        
-        doc_ref = db.collection(YouTubeSuggestionService.COLLECTION).document(suggestion_id)
-        doc_ref.update(update_data)
-        return YouTubeSuggestionService.get_youtube_suggestion(suggestion_id)
+            return await YouTubeSuggestionService.get_youtube_suggestion(suggestion_id)
+        
+        cached = YouTubeSuggestionService.CACHE.get_entry(suggestion_id)
+        snapshot = (cached.value.model_dump(exclude={"suggestionId"}), cached.version) if cached else None
+        result = await update_document(YouTubeSuggestionService.COLLECTION, suggestion_id, update_data, snapshot)
+        if result is None:
+            YouTubeSuggestionService.CACHE.invalidate(suggestion_id)
+            return None
+
+        data, version = result
+        suggestion = YouTubeSuggestion(suggestionId=suggestion_id, **data)
+        YouTubeSuggestionService.CACHE.set(suggestion_id, suggestion, version=version)
+        return suggestion
 
     @staticmethod
-    def delete_youtube_suggestion(suggestion_id: str) -> bool:
+    async def delete_youtube_suggestion(suggestion_id: str) -> bool:
         """
         Deleta uma sugestão do YouTube do Firestore
         
@@ -84,30 +142,39 @@ class YouTubeSuggestionService:
         Returns:
             bool: True se a operação foi bem-sucedida
         """
-        db.collection(YouTubeSuggestionService.COLLECTION).document(suggestion_id).delete()
+        await async_db.collection(YouTubeSuggestionService.COLLECTION).document(suggestion_id).delete()
+        YouTubeSuggestionService.CACHE.invalidate(suggestion_id)
         return True
 
     @staticmethod
-    def list_youtube_suggestions_by_topic(topic_id: str) -> List[YouTubeSuggestion]:
+    async def list_youtube_suggestions_by_topic(topic_id: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Page[YouTubeSuggestion]:
         """
-        Lista todas as sugestões do YouTube relacionadas a um topic (máximo de 5)
+        Lista as sugestões do YouTube relacionadas a um topic (máximo de 5)
         
         Args:
             topic_id: ID único do topic
+            limit: Número máximo de itens da página
+            cursor: Cursor opaco devolvido pela página anterior
         
         Returns:
-            List[YouTubeSuggestion]: Lista de até 5 sugestões do topic especificado
+            Page[YouTubeSuggestion]: Lista de até 5 sugestões do topic especificado, ordenada por ID,
+                com `next_cursor` para a página seguinte
         
         Note:
             O limite de 5 sugestões é aplicado para manter a interface limpa
         """
-        docs = db.collection(YouTubeSuggestionService.COLLECTION).where(
+        query = async_db.collection(YouTubeSuggestionService.COLLECTION).where(
             filter=FieldFilter("topicId", "==", topic_id)
-        ).limit(5).stream()
-        return [YouTubeSuggestion(suggestionId=doc.id, **doc.to_dict()) for doc in docs]
+        )
+        limit = min(limit, YouTubeSuggestionService.MAX_SUGGESTIONS_PER_TOPIC)
+        docs, next_cursor = await paginate(query, limit, cursor)
+        return Page[YouTubeSuggestion](
+            items=[YouTubeSuggestion(suggestionId=doc.id, **doc.to_dict()) for doc in docs],
+            next_cursor=next_cursor,
+        )
 
     @staticmethod
-    def count_suggestions_by_topic(topic_id: str) -> int:
+    async def count_suggestions_by_topic(topic_id: str) -> int:
         """
         Conta quantas sugestões existem para um topic
         
@@ -119,9 +186,36 @@ class YouTubeSuggestionService:
         
         Returns:
             int: Número total de sugestões para o topic
+        
+        Note:
+            Usa uma aggregation query (count) no servidor, sem transferir
+            os documentos das sugestões
         """
-        docs = db.collection(YouTubeSuggestionService.COLLECTION).where(
+        query = async_db.collection(YouTubeSuggestionService.COLLECTION).where(
             filter=FieldFilter("topicId", "==", topic_id)
-        ).stream()
-        return sum(1 for _ in docs)
+        )
+        return await count_documents(query)
+
+
+    @staticmethod
+    async def urls_by_topics(topic_ids: Sequence[str]) -> Dict[str, Set[str]]:
+        """
+        URLs das sugestões já guardadas para vários topics
+
+        Usa filtros "in" em blocos (ver firestore_utils.query_in) e projeta
+        apenas os campos necessários.
+
+        Args:
+            topic_ids: IDs dos topics
 
+        Returns:
+            Dict[str, Set[str]]: URLs por topic (topics sem sugestões têm um conjunto vazio)
+        """
+        urls: Dict[str, Set[str]] = {topic_id: set() for topic_id in topic_ids}
+        docs = await query_in(
+            async_db.collection(YouTubeSuggestionService.COLLECTION), "topicId", list(topic_ids), fields=["topicId", "url"]
+        )
+        for doc in docs:
+            data = doc.to_dict()
+            urls.setdefault(data["topicId"], set()).add(data["url"])
+        return urls
@@ -0,0 +1,262 @@
+"""
+Pool de workers que consome a fila de jobs em segundo plano
+
+Cada worker reserva um job, chama o handler registado para o seu tipo e
+confirma-o. Enquanto o handler corre, o lease do job é renovado a cada
+terço do visibility timeout. Se o handler falhar, o job é reagendado com
+backoff exponencial; após JOB_MAX_ATTEMPTS tentativas vai para a
+dead-letter (incluindo jobs cujo worker morreu a meio vezes demais).
+
+Os workers podem correr dentro do processo da API (WORKER_IN_PROCESS) ou
+num processo dedicado, escalável para vários processos sobre a mesma fila:
+
+    python -m app.worker
+
+Configuração (variáveis de ambiente):
+    WORKER_CONCURRENCY: Jobs processados em simultâneo (padrão: 2)
+    WORKER_IN_PROCESS: Se a API inicia workers no seu lifespan (padrão: true)
+    JOB_MAX_ATTEMPTS: Tentativas por job antes da dead-letter (padrão: 3)
+    JOB_RETRY_DELAY: Atraso base entre tentativas em segundos (padrão: 10)
+    WORKER_ERROR_BACKOFF: Pausa em segundos de um worker após um erro da
+        fila ou dos handlers de falha (padrão: 1)
+"""
+import asyncio
+import logging
+import os
+import signal
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+#Carregar variáveis de ambiente (processo dedicado: `python -m app.worker`)
+load_dotenv()
+
+from app.services.job_queue import Job, JobQueue, job_queue
+
+logger = logging.getLogger(__name__)
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+WORKER_IN_PROCESS = os.getenv("WORKER_IN_PROCESS", "true").lower() == "true"
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "10"))
+WORKER_ERROR_BACKOFF = float(os.getenv("WORKER_ERROR_BACKOFF", "1"))
+
+JobHandler = Callable[[Job], Awaitable[None]]
+FailureHandler = Callable[[Job, str], Awaitable[None]]
+
+
+@dataclass
+class HandlerConfig:
+    """
+    Handlers de um tipo de job
+
+    Attributes:
+        process: Processa o job (uma exceção provoca retry / dead-letter)
+        on_retry: Chamado quando o job é reagendado
+        on_dead_letter: Chamado quando o job vai para a dead-letter
+    """
+    process: JobHandler
+    on_retry: Optional[FailureHandler] = None
+    on_dead_letter: Optional[FailureHandler] = None
+
+
+class WorkerPool:
+    """
+    Pool de workers assíncronos sobre uma JobQueue
+
+    Example:
+        >>> pool = WorkerPool(job_queue, concurrency=4)
+        >>> pool.register("ai_request", HandlerConfig(process=AIJobService.process))
+        >>> await pool.start()
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = WORKER_CONCURRENCY,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_delay: float = JOB_RETRY_DELAY,
+        error_backoff: float = WORKER_ERROR_BACKOFF,
+    ):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.error_backoff = error_backoff
+        self._handlers: Dict[str, HandlerConfig] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.busy = 0
+        self.leases_lost = 0
+        self.errors = 0
+
+    def register(self, kind: str, config: HandlerConfig) -> None:
+        """Regista os handlers de um tipo de job"""
+        self._handlers[kind] = config
+
+    async def start(self) -> None:
+        """Inicia os workers (lifespan da API ou processo dedicado)"""
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._run(i), name=f"worker-{i}"))
+
+    async def stop(self) -> None:
+        """Cancela os workers (jobs em curso voltam a ser entregues mais tarde)"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, worker_id: int) -> None:
+        # Só o cancelamento (stop) termina o worker: um erro da fila (ex: SQLite
+        # bloqueado) ou de um handler de falha não pode reduzir o pool
+        while True:
+            job = None
+            try:
+                job = await self.queue.reserve(timeout=5.0)
+                if job is None:
+                    continue
+                self.busy += 1
+                try:
+                    await self.handle(job)
+                finally:
+                    self.busy -= 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors += 1
+                logger.exception("Erro no worker-%d (job %s); a continuar após %.1fs",
+                                 worker_id, job.job_id if job is not None else "-", self.error_backoff)
+                await asyncio.sleep(self.error_backoff)
+
+    async def handle(self, job: Job) -> None:
+        """Processa um job reservado e confirma, reagenda ou envia para a dead-letter"""
+        config = self._handlers.get(job.kind)
+        if config is None:
+            await self.queue.dead_letter(job, f"Tipo de job desconhecido: {job.kind}")
+            return
+
+        if job.attempts > self.max_attempts:
+            # Lease expirou vezes demais (worker morreu ou ficou sem resposta)
+            error = job.last_error or "Lease expirado sem conclusão"
+            logger.error("Job %s (%s) enviado para dead-letter após %d entregas: %s",
+                         job.job_id, job.kind, job.attempts, error)
+            await self.queue.dead_letter(job, error)
+            await self._notify(config.on_dead_letter, job, error)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await config.process(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if job.attempts >= self.max_attempts:
+                logger.error("Job %s (%s) enviado para dead-letter após %d tentativas: %s",
+                             job.job_id, job.kind, job.attempts, error)
+                await self.queue.dead_letter(job, error)
+                await self._notify(config.on_dead_letter, job, error)
+            else:
+                delay = self.retry_delay * (2 ** (job.attempts - 1))
+                logger.warning("Job %s (%s) falhou (tentativa %d/%d), nova tentativa em %.0fs: %s",
+                               job.job_id, job.kind, job.attempts, self.max_attempts, delay, error)
+                await self.queue.retry(job, delay, error)
+                await self._notify(config.on_retry, job, error)
+            return
+        finally:
+            heartbeat.cancel()
+
+        await self.queue.ack(job)
+
+    async def _heartbeat(self, job: Job) -> None:
+        interval = getattr(self.queue, "visibility_timeout", None)
+        if not interval:
+            return
+        while True:
+            await asyncio.sleep(interval / 3)
+            try:
+                if not await self.queue.extend_lease(job):
+                    # Outro worker reservou o job: o resultado será duplicado (at-least-once)
+                    self.leases_lost += 1
+                    logger.warning("Lease do job %s perdido durante o processamento", job.job_id)
+                    return
+            except Exception:
+                logger.exception("Erro ao renovar o lease do job %s", job.job_id)
+
+    @staticmethod
+    async def _notify(callback: Optional[FailureHandler], job: Job, error: str) -> None:
+        if callback is None:
+            return
+        try:
+            await callback(job, error)
+        except Exception:
+            logger.exception("Erro ao registar falha do job %s", job.job_id)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Estado dos workers e da fila (para métricas)"""
+        return {
+            "workers": len(self._tasks),
+            "busy": self.busy,
+            "leases_lost": self.leases_lost,
+            "errors": self.errors,
+            "max_attempts": self.max_attempts,
+            "queue": await self.queue.stats(),
+        }
+
+
+def build_worker_pool(queue: JobQueue = job_queue) -> WorkerPool:
+    """Cria o pool de workers com os handlers de todos os tipos de job"""
+    from app.services.ai_job_service import AIJobService
+    from app.services.cascade_delete_service import CascadeDeleteService
+
+    pool = WorkerPool(queue)
+    pool.register(AIJobService.KIND, HandlerConfig(
+        process=AIJobService.process,
+        on_retry=AIJobService.on_retry,
+        on_dead_letter=AIJobService.on_dead_letter,
+    ))
+    pool.register(CascadeDeleteService.KIND, HandlerConfig(
+        process=CascadeDeleteService.process,
+        on_retry=CascadeDeleteService.on_retry,
+        on_dead_letter=CascadeDeleteService.on_dead_letter,
+    ))
+    return pool
+
+
+worker_pool = build_worker_pool()
+
+
+async def run_worker() -> None:
+    """
+    Corre o pool de workers num processo dedicado até receber SIGINT/SIGTERM
+
+    Jobs em curso no encerramento ficam com o lease por confirmar e voltam a
+    ser entregues (a este ou a outro processo) quando o lease expirar.
+    """
+    from app.services.gemini_service import model_catalog
+    from app.services.http_client_service import http_clients
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    await http_clients.startup()
+    await model_catalog.start(http_clients.get("gemini"))
+    await worker_pool.start()
+    logger.info("Worker iniciado (%d workers, fila: %s)", worker_pool.concurrency, type(worker_pool.queue).__name__)
+    try:
+        await stop.wait()
+    finally:
+        await worker_pool.stop()
+        await model_catalog.stop()
+        await http_clients.aclose()
+        logger.info("Worker terminado")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run_worker())
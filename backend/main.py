@@ -1,6 +1,8 @@
 """
 Backend BrainBudy - FastAPI Application
 """
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -8,11 +10,56 @@ from dotenv import load_dotenv
 #Carregar variáveis de ambiente
 load_dotenv()
 
+from app.services.http_client_service import http_clients
+from app.services.gemini_service import model_catalog
+from app.services.google_oauth_service import google_jwks
+from app.services.token_manager import token_manager
+from app.worker import WORKER_IN_PROCESS, worker_pool
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida da aplicação
+
+    Cria os clientes HTTP partilhados (pools de conexões para as APIs do
+    Google), carrega a lista de modelos do Gemini e as chaves públicas do
+    OAuth do Google, e inicia a renovação dos tokens OAuth e o pool de
+    workers dos jobs em segundo plano (o pool exceto com
+    WORKER_IN_PROCESS=false, quando os jobs correm em `python -m app.worker`);
+    no encerramento (também se o arranque falhar a meio) para, por ordem
+    inversa, os componentes que chegaram a arrancar e fecha os clientes.
+    """
+    #Para o encerramento: só se param os componentes que chegaram a arrancar
+    started = []
+    try:
+        await http_clients.startup()
+        started.append(http_clients.aclose)
+        await model_catalog.start(http_clients.get("gemini"))
+        started.append(model_catalog.stop)
+        await google_jwks.warm_up(http_clients.get("oauth"))
+        await token_manager.start()
+        started.append(token_manager.stop)
+        if WORKER_IN_PROCESS:
+            await worker_pool.start()
+            started.append(worker_pool.stop)
+        yield
+    finally:
+        for stop in reversed(started):
+            try:
+                await stop()
+            except Exception:
+                logger.exception("Erro ao encerrar %s", stop.__qualname__)
+
+
 #Criar instância do FastAPI
 app = FastAPI(
     title="BrainBudy API",
     description="API para o sistema de gestão de estudos BrainBudy",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 #CORS
@@ -28,7 +75,7 @@ app.add_middleware(
 from app.api import (
     users, subjects, topics, slides, notes,
     ai_requests, study_sessions, youtube_suggestions,
-    youtube, calendar, gemini, oauth
+    youtube, calendar, gemini, oauth, metrics, delete_jobs
 )
 
 @app.get("/")
@@ -58,6 +105,7 @@ async def root():
 app.include_router(users.router, prefix="/api/users")
 app.include_router(subjects.router, prefix="/api/subjects")
 app.include_router(topics.router, prefix="/api/topics")
+app.include_router(delete_jobs.router, prefix="/api/delete-jobs")
 app.include_router(slides.router, prefix="/api/slides")
 app.include_router(notes.router, prefix="/api/notes")
 app.include_router(ai_requests.router, prefix="/api/ai-requests")
@@ -66,6 +114,7 @@ app.include_router(youtube_suggestions.router, prefix="/api/youtube-suggestions"
 app.include_router(youtube.router, prefix="/api/youtube")
 app.include_router(calendar.router, prefix="/api/calendar")
 app.include_router(gemini.router, prefix="/api/gemini")
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
 
 # Registar OAuth
 app.include_router(oauth.router, prefix="/oauth", tags=["OAuth"])
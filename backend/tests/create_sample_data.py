@@ -19,15 +19,16 @@ from app.models.ai_request import AIRequestCreate, AIStatus
 from app.models.study_session import StudySessionCreate, SessionState
 from app.models.youtube_suggestion import YouTubeSuggestionCreate
 from datetime import datetime, timedelta
+import asyncio
 
-def create_sample_data():
+async def create_sample_data():
     """Cria dados de exemplo no Firestore"""
     print("🚀 Iniciando criação de dados de exemplo...\n")
     
     try:
         # 1. Criar usuário
         print("1. Criando usuário...")
-        user = UserService.create_user(UserCreate(
+        user = await UserService.create_user(UserCreate(
             name="João Silva",
             email="joao.silva@example.com",
             googleCalendarConnected=False
@@ -36,7 +37,7 @@ def create_sample_data():
         
         # 2. Criar subject
         print("2. Criando subject...")
-        subject = SubjectService.create_subject(SubjectCreate(
+        subject = await SubjectService.create_subject(SubjectCreate(
             userId=user.userId,
             name="Matemática",
             description="Disciplina de matemática aplicada"
@@ -45,7 +46,7 @@ def create_sample_data():
         
         # 3. Criar topic
         print("3. Criando topic...")
-        topic = TopicService.create_topic(TopicCreate(
+        topic = await TopicService.create_topic(TopicCreate(
             subjectId=subject.subjectId,
             title="Álgebra Linear",
             description="Vetores, matrizes e transformações lineares"
@@ -54,7 +55,7 @@ def create_sample_data():
         
         # 4. Criar slide
         print("4. Criando slide...")
-        slide = SlideService.create_slide(SlideCreate(
+        slide = await SlideService.create_slide(SlideCreate(
             topicId=topic.topicId,
             fileName="algebra_linear_aula1.pdf",
             fileUrl="https://storage.googleapis.com/brainbudy/slides/algebra_linear_aula1.pdf"
@@ -63,7 +64,7 @@ def create_sample_data():
         
         # 5. Criar note
         print("5. Criando note...")
-        note = NoteService.create_note(NoteCreate(
+        note = await NoteService.create_note(NoteCreate(
             topicId=topic.topicId,
             content="Vetores são objetos matemáticos que possuem magnitude e direção.",
             source=NoteSource.MANUAL
@@ -72,7 +73,7 @@ def create_sample_data():
         
         # 6. Criar AI Request
         print("6. Criando AI request...")
-        ai_request = AIRequestService.create_ai_request(AIRequestCreate(
+        ai_request = await AIRequestService.create_ai_request(AIRequestCreate(
             userId=user.userId,
             topicId=topic.topicId,
             slideId=slide.slideId,
@@ -82,7 +83,7 @@ def create_sample_data():
         
         # Atualizar AI Request com resposta simulada
         from app.models.ai_request import AIRequestUpdate
-        AIRequestService.update_ai_request(ai_request.requestId, AIRequestUpdate(
+        await AIRequestService.update_ai_request(ai_request.requestId, AIRequestUpdate(
             response="Vetores são representações matemáticas que possuem tanto magnitude quanto direção. Eles são fundamentais em álgebra linear e podem ser representados graficamente como setas.",
             status=AIStatus.COMPLETED
         ))
@@ -92,7 +93,7 @@ def create_sample_data():
         print("7. Criando study session...")
         start_time = datetime.utcnow() + timedelta(days=1)
         end_time = start_time + timedelta(hours=2)
-        study_session = StudySessionService.create_study_session(StudySessionCreate(
+        study_session = await StudySessionService.create_study_session(StudySessionCreate(
             userId=user.userId,
             topicId=topic.topicId,
             requestId=ai_request.requestId,
@@ -104,7 +105,7 @@ def create_sample_data():
         
         # 8. Criar YouTube Suggestion
         print("8. Criando YouTube suggestion...")
-        youtube_suggestion = YouTubeSuggestionService.create_youtube_suggestion(
+        youtube_suggestion = await YouTubeSuggestionService.create_youtube_suggestion(
             YouTubeSuggestionCreate(
                 topicId=topic.topicId,
                 title="Álgebra Linear - Introdução aos Vetores",
@@ -135,5 +136,5 @@ def create_sample_data():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    create_sample_data()
+    asyncio.run(create_sample_data())
 
@@ -0,0 +1,81 @@
+import pytest
+
+from app.services.cache_service import CacheEntry, DocumentCache, TTLLRUBackend
+
+
+class DictBackend(dict):
+    """Backend mínimo (CacheBackend) sobre um dict"""
+
+    def set(self, key, value):
+        self[key] = value
+
+    def delete(self, key):
+        self.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    # Os caches de teste não devem aparecer nas métricas dos serviços reais
+    monkeypatch.setattr(DocumentCache, "_registry", {})
+    monkeypatch.setattr(DocumentCache, "_backend_factory", DocumentCache._backend_factory)
+
+
+def test_counts_hits_misses_and_invalidations():
+    cache = DocumentCache("topics")
+    assert cache.get("a") is None
+    cache.set("a", {"title": "A"}, version="v1")
+    assert cache.get("a") == {"title": "A"}
+    assert cache.get_entry("a") == CacheEntry({"title": "A"}, "v1")
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 2, 1)
+    assert stats["hit_ratio"] == 0.5
+    assert stats["size"] == 0
+
+
+def test_none_values_are_not_cached():
+    cache = DocumentCache("notes")
+    cache.set("a", None)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_disabled_cache_stores_and_counts_nothing():
+    cache = DocumentCache("subjects")
+    cache.enabled = False
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_clear_resets_entries_and_counters():
+    cache = DocumentCache("slides")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.invalidate("b")
+    cache.clear()
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["invalidations"]) == (0, 0, 0, 0)
+
+
+def test_lru_backend_counts_evictions():
+    cache = DocumentCache("users", backend=TTLLRUBackend(maxsize=2, ttl=60))
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert (stats["maxsize"], stats["ttl"], stats["evictions"]) == (2, 60, 1)
+    assert cache.get("a") is None
+
+
+def test_backend_factory_replaces_every_registered_backend():
+    first = DocumentCache("topics")
+    first.set("a", 1)
+    DocumentCache.set_backend_factory(lambda namespace: DictBackend())
+    second = DocumentCache("notes")
+    assert isinstance(first.backend, DictBackend) and isinstance(second.backend, DictBackend)
+    assert first.get("a") is None
+    assert "evictions" not in first.stats()
+    assert [s["namespace"] for s in DocumentCache.all_stats()] == ["topics", "notes"]
@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+import httpx
+
+from app.services import calendar_batch_service
+from app.services.calendar_batch_service import (
+    BatchRequest,
+    build_batch_body,
+    execute_batch,
+    parse_batch_response,
+)
+from app.services.retry_policy import calendar_retry
+
+BOUNDARY = "batch_test"
+
+
+def _response_part(index, status_code, body=None, newline="\r\n"):
+    lines = [
+        f"--{BOUNDARY}",
+        "Content-Type: application/http",
+        f"Content-ID: <response-item-{index}>",
+        "",
+        f"HTTP/1.1 {status_code} {'OK' if status_code == 200 else 'Error'}",
+        "Content-Type: application/json; charset=UTF-8",
+        "",
+        json.dumps(body) if body is not None else "",
+        "",
+    ]
+    return newline.join(lines)
+
+
+def _batch_response(parts, newline="\r\n"):
+    text = "".join(parts) + f"--{BOUNDARY}--{newline}"
+    return httpx.Response(200, headers={"Content-Type": f"multipart/mixed; boundary={BOUNDARY}"}, text=text)
+
+
+def _sent_requests(request: httpx.Request):
+    """(Content-ID, linha do pedido, corpo JSON) de cada parte de um batch enviado"""
+    boundary = request.headers["content-type"].split("boundary=")[1]
+    parts = []
+    for part in request.content.decode("utf-8").split(f"--{boundary}")[1:-1]:
+        outer, _, http = part.strip("\r\n").partition("\r\n\r\n")
+        content_id = outer.split("Content-ID: <")[1].split(">")[0]
+        head, _, body = http.partition("\r\n\r\n")
+        parts.append((content_id, head.split("\r\n")[0], json.loads(body) if body.strip() else None))
+    return parts
+
+
+def test_build_batch_body_encodes_each_request():
+    requests = [
+        BatchRequest("POST", "/calendars/primary/events", {"id": "ev1", "summary": "Sessão"}),
+        BatchRequest("DELETE", "/calendars/primary/events/ev2"),
+    ]
+    body = build_batch_body(requests, BOUNDARY)
+    sent = httpx.Request("POST", "https://example.test/", headers={"Content-Type": f"multipart/mixed; boundary={BOUNDARY}"}, content=body)
+    assert body.endswith(f"--{BOUNDARY}--".encode())
+    assert _sent_requests(sent) == [
+        ("item-0", "POST /calendar/v3/calendars/primary/events HTTP/1.1", {"id": "ev1", "summary": "Sessão"}),
+        ("item-1", "DELETE /calendar/v3/calendars/primary/events/ev2 HTTP/1.1", None),
+    ]
+
+
+def test_parse_batch_response_orders_parts_by_content_id():
+    response = _batch_response([
+        _response_part(1, 204),
+        _response_part(0, 200, {"id": "ev1"}),
+    ])
+    first, second = parse_batch_response(response, 2)
+    assert (first.status_code, first.body) == (200, {"id": "ev1"})
+    assert (second.status_code, second.body) == (204, None)
+
+
+def test_parse_batch_response_accepts_bare_newlines():
+    response = _batch_response([_response_part(0, 404, {"error": {"code": 404}}, newline="\n")], newline="\n")
+    [result] = parse_batch_response(response, 1)
+    assert result.status_code == 404
+    assert result.body == {"error": {"code": 404}}
+
+
+def test_parse_batch_response_marks_missing_parts():
+    response = _batch_response([_response_part(0, 200, {"id": "ev1"})])
+    results = parse_batch_response(response, 2)
+    assert results[0].status_code == 200
+    assert results[1].status_code == 502
+    assert [r.status_code for r in parse_batch_response(httpx.Response(200, text="x"), 2)] == [502, 502]
+
+
+def test_execute_batch_splits_and_retries_failed_parts(monkeypatch):
+    monkeypatch.setattr(calendar_retry, "base_delay", 0)
+    monkeypatch.setattr(calendar_batch_service, "CALENDAR_BATCH_MAX_REQUESTS", 2)
+    batches = []
+    failed_once = set()
+
+    def handler(request):
+        sent = _sent_requests(request)
+        batches.append([body["id"] for _, _, body in sent])
+        parts = []
+        for index, (_, _, body) in enumerate(sent):
+            if body["id"] == "ev1" and "ev1" not in failed_once:
+                failed_once.add("ev1")
+                parts.append(_response_part(index, 503, {"error": {"code": 503}}))
+            else:
+                parts.append(_response_part(index, 200, body))
+        return _batch_response(parts)
+
+    requests = [BatchRequest("POST", "/calendars/primary/events", {"id": f"ev{i}"}) for i in range(3)]
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await execute_batch(client, "token", requests)
+
+    results = asyncio.run(scenario())
+    assert batches == [["ev0", "ev1"], ["ev2"], ["ev1"]]
+    assert [r.body["id"] for r in results] == ["ev0", "ev1", "ev2"]
+    assert all(r.status_code == 200 for r in results)
+
+
+def test_failed_batch_request_applies_to_every_part():
+    def handler(request):
+        return httpx.Response(401, json={"error": "invalid_token"})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await execute_batch(client, "token", [BatchRequest("DELETE", "/x"), BatchRequest("DELETE", "/y")])
+
+    assert [r.status_code for r in asyncio.run(scenario())] == [401, 401]
@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+
+from app.services.calendar_events import (
+    event_wall_clock,
+    is_app_event,
+    session_changes,
+    session_event_body,
+)
+
+
+def _google_event(body, event_id, offset):
+    """Evento como o Google o devolve: dateTime com o offset do fuso e timeZone"""
+    return {
+        "id": event_id,
+        **body,
+        "start": {"dateTime": body["start"]["dateTime"] + offset, "timeZone": body["start"]["timeZone"]},
+        "end": {"dateTime": body["end"]["dateTime"] + offset, "timeZone": body["end"]["timeZone"]},
+    }
+
+
+def test_unchanged_non_utc_event_does_not_move_session():
+    # Sessão em hora de relógio, lida do Firestore (marcada como UTC)
+    session = {
+        "startTime": datetime(2026, 7, 1, 10, 0, tzinfo=timezone.utc),
+        "endTime": datetime(2026, 7, 1, 11, 0, tzinfo=timezone.utc),
+        "calendarEvent": "ev1",
+    }
+    body = session_event_body(session["startTime"], session["endTime"], "Sessão", "Europe/Lisbon", "s1")
+    assert body["start"] == {"dateTime": "2026-07-01T10:00:00", "timeZone": "Europe/Lisbon"}
+
+    event = _google_event(body, "ev1", "+01:00")
+    assert is_app_event(event)
+    assert session_changes(session, event) == {}
+
+
+def test_unchanged_event_with_naive_session_times():
+    session = {"startTime": datetime(2026, 1, 15, 9, 30), "endTime": datetime(2026, 1, 15, 10, 30), "calendarEvent": "ev1"}
+    body = session_event_body(session["startTime"], session["endTime"], "Sessão", "America/Sao_Paulo", "s1")
+    assert session_changes(session, _google_event(body, "ev1", "-03:00")) == {}
+
+
+def test_event_returned_in_utc_is_converted_to_its_time_zone():
+    value = {"dateTime": "2026-07-01T09:00:00Z", "timeZone": "Europe/Lisbon"}
+    assert event_wall_clock(value) == datetime(2026, 7, 1, 10, 0)
+
+
+def test_moved_event_updates_session_in_wall_clock():
+    session = {
+        "startTime": datetime(2026, 7, 1, 10, 0, tzinfo=timezone.utc),
+        "endTime": datetime(2026, 7, 1, 11, 0, tzinfo=timezone.utc),
+        "calendarEvent": "ev1",
+    }
+    event = {
+        "id": "ev1",
+        "start": {"dateTime": "2026-07-01T14:00:00+01:00", "timeZone": "Europe/Lisbon"},
+        "end": {"dateTime": "2026-07-01T15:00:00+01:00", "timeZone": "Europe/Lisbon"},
+    }
+    assert session_changes(session, event) == {
+        "startTime": datetime(2026, 7, 1, 14, 0),
+        "endTime": datetime(2026, 7, 1, 15, 0),
+    }
+
+
+def test_relinked_event_and_all_day_event():
+    session = {"startTime": datetime(2026, 7, 1, 10, 0), "endTime": datetime(2026, 7, 1, 11, 0), "calendarEvent": None}
+    event = {"id": "ev2", "start": {"date": "2026-07-01"}, "end": {"date": "2026-07-02"}}
+    assert session_changes(session, event) == {"calendarEvent": "ev2"}
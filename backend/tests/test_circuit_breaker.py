@@ -0,0 +1,94 @@
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker, LatencyWindow
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    return fake
+
+
+def _half_open(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+    breaker.record_failure(trip=True)
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allows_requests()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allows_requests()
+    assert breaker.stats()["open_seconds_remaining"] == 10
+
+
+def test_trip_uses_custom_open_time(clock):
+    breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=10)
+    breaker.record_failure(trip=True, open_for=30)
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 20
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = _half_open(clock)
+    assert breaker.allows_requests()
+    assert not breaker.allows_requests()
+    assert breaker.stats()["probe_in_flight"]
+
+
+def test_successful_probe_closes(clock):
+    breaker = _half_open(clock)
+    assert breaker.allows_requests()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allows_requests() and breaker.allows_requests()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = _half_open(clock)
+    assert breaker.allows_requests()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    clock.now += 10
+    assert breaker.allows_requests()
+
+
+def test_released_or_expired_probe_lets_another_caller_in(clock):
+    breaker = _half_open(clock)
+    assert breaker.allows_requests()
+    breaker.release_probe()
+    assert breaker.allows_requests()
+    assert not breaker.allows_requests()
+    clock.now += breaker.probe_timeout
+    assert breaker.allows_requests()
+
+
+def test_latency_window_percentile():
+    window = LatencyWindow(size=3)
+    assert window.percentile(0.95) is None
+    for seconds in (5.0, 1.0, 2.0, 3.0):
+        window.add(seconds)
+    assert len(window) == 3
+    assert window.percentile(0.5) == 2.0
+    assert window.percentile(0.95) == 3.0
@@ -0,0 +1,21 @@
+import asyncio
+import os
+
+from app.services.job_queue import Job, SQLiteJobQueue
+
+
+def test_sqlite_queue_creates_missing_directory(tmp_path):
+    path = os.path.join(tmp_path, "novo", "data", "jobs.sqlite3")
+    queue = SQLiteJobQueue(path=path, poll_interval=0.01)
+
+    async def scenario():
+        job = await queue.enqueue(Job(kind="test", payload={"n": 1}))
+        reserved = await queue.reserve(timeout=1.0)
+        assert reserved is not None
+        assert reserved.job_id == job.job_id
+        assert reserved.payload == {"n": 1}
+        await queue.ack(reserved)
+        assert await queue.reserve(timeout=0.05) is None
+
+    asyncio.run(scenario())
+    assert os.path.exists(path)
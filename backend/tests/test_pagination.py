@@ -0,0 +1,48 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import PageParams, pagination_params
+from app.services.pagination import MAX_PAGE_SIZE, InvalidCursorError, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("doc_id", ["abc", "A1b2C3d4E5f6G7h8I9j0", "ção-ü", "a/b?c=d&e", "x" * 300])
+def test_cursor_round_trip(doc_id):
+    cursor = encode_cursor(doc_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == doc_id
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm90LWpzb24", encode_cursor("x")[:-3], "eyJpZCI6IDF9", "eyJpZCI6ICIifQ"])
+def test_decode_cursor_rejects_invalid(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/items")
+    async def items(page: PageParams = Depends(pagination_params)):
+        return {"limit": page.limit, "cursor": page.cursor}
+
+    return TestClient(app)
+
+
+def test_pagination_params_accepts_valid_cursor(client):
+    cursor = encode_cursor("doc-1")
+    response = client.get("/items", params={"limit": 5, "cursor": cursor})
+    assert response.status_code == 200
+    assert response.json() == {"limit": 5, "cursor": cursor}
+
+
+def test_pagination_params_rejects_bad_cursor(client):
+    response = client.get("/items", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor de paginação inválido"
+
+
+def test_pagination_params_bounds_limit(client):
+    assert client.get("/items", params={"limit": 0}).status_code == 422
+    assert client.get("/items", params={"limit": MAX_PAGE_SIZE + 1}).status_code == 422
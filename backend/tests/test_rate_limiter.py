@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.services import rate_limiter
+from app.services.rate_limiter import AdmissionController, Priority, TokenBucket, use_priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+def test_token_bucket_refills_continuously(clock):
+    bucket = TokenBucket(capacity=10, rate=2)
+    assert bucket.delay_for(10) == 0
+    bucket.consume(10)
+    assert bucket.delay_for(4) == pytest.approx(2.0)
+    clock.now += 1
+    assert bucket.level == pytest.approx(2)
+    clock.now += 100
+    assert bucket.level == 10
+
+
+def test_token_bucket_oversized_request_waits_for_full_bucket(clock):
+    bucket = TokenBucket(capacity=10, rate=5)
+    bucket.consume(3)
+    assert bucket.delay_for(50) == pytest.approx(0.6)
+    bucket.consume(50)
+    assert bucket.level == -43
+
+
+async def _admission_order(controller, requests):
+    order = []
+    release = asyncio.Event()
+
+    async def call(name, priority=None):
+        async with controller.slot(priority=priority):
+            order.append(name)
+            await release.wait()
+
+    blocker = asyncio.create_task(call("blocker"))
+    await asyncio.sleep(0)
+    tasks = []
+    for name, priority in requests:
+        tasks.append(asyncio.create_task(call(name, priority)))
+        await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == len(requests)
+    release.set()
+    await asyncio.gather(blocker, *tasks)
+    return order
+
+
+def test_interactive_calls_pass_background_work():
+    controller = AdmissionController("test", max_concurrency=1, requests_per_minute=6000)
+    order = asyncio.run(_admission_order(controller, [
+        ("bg1", Priority.BACKGROUND),
+        ("bg2", Priority.BACKGROUND),
+        ("ui1", Priority.INTERACTIVE),
+        ("ui2", Priority.INTERACTIVE),
+    ]))
+    assert order == ["blocker", "ui1", "ui2", "bg1", "bg2"]
+    assert controller.in_flight == 0
+    assert controller.admitted[Priority.BACKGROUND] == 2
+
+
+def test_priority_comes_from_context():
+    controller = AdmissionController("test", max_concurrency=1, requests_per_minute=6000)
+
+    async def scenario():
+        with use_priority(Priority.BACKGROUND):
+            background = asyncio.create_task(_admission_order(controller, [("bg", None)]))
+        return await background
+
+    assert asyncio.run(scenario()) == ["blocker", "bg"]
+    assert controller.admitted[Priority.BACKGROUND] == 2
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    controller = AdmissionController("test", max_concurrency=1, requests_per_minute=6000)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await holder
+        async with controller.slot():
+            assert controller.in_flight == 1
+
+    asyncio.run(scenario())
+    assert controller.in_flight == 0
+    assert controller.stats()["queue_depth"] == 0
+
+
+def test_rate_limit_delays_admission():
+    controller = AdmissionController("test", max_concurrency=10, requests_per_minute=1200)
+    controller.requests.consume(controller.requests.capacity)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with controller.slot():
+            pass
+        return loop.time() - started
+
+    # 1200 pedidos/minuto = 20/s: um pedido novo a cada 50 ms
+    assert asyncio.run(scenario()) >= 0.04
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.services import retry_policy
+from app.services.retry_policy import RetryPolicy, is_retryable_status, parse_retry_after, send_with_retry
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", 120.0),
+    (" 1.5 ", 1.5),
+    ("-3", 0.0),
+    ("", None),
+    (None, None),
+    ("amanhã", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(when, usegmt=True)) == pytest.approx(30, abs=2)
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_backoff_is_capped_full_jitter(monkeypatch):
+    policy = RetryPolicy(name="test", base_delay=0.5, max_delay=4)
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: high)
+    assert [policy.backoff(attempt) for attempt in range(5)] == [0.5, 1.0, 2.0, 4.0, 4.0]
+    monkeypatch.setattr(retry_policy.random, "uniform", lambda low, high: low)
+    assert policy.backoff(3) == 0
+
+
+def test_retryable_statuses_depend_on_idempotency():
+    assert is_retryable_status(429, idempotent=False)
+    assert is_retryable_status(503, idempotent=False)
+    assert not is_retryable_status(500, idempotent=False)
+    assert is_retryable_status(500, idempotent=True)
+    assert not is_retryable_status(404, idempotent=True)
+
+
+def _send(handler, policy, **kwargs):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await send_with_retry(client, "GET", "https://example.test/", policy=policy, **kwargs)
+    return asyncio.run(scenario())
+
+
+def test_send_with_retry_honours_retry_after(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(retry_policy.asyncio, "sleep", fake_sleep)
+    responses = iter([httpx.Response(429, headers={"Retry-After": "2"}), httpx.Response(200)])
+    policy = RetryPolicy(name="test", max_attempts=3)
+    response = _send(lambda request: next(responses), policy)
+    assert response.status_code == 200
+    assert sleeps == [2.0]
+    assert policy.stats() == {"calls": 1, "retries": 1, "gave_up": 0, "max_attempts": 3}
+
+
+def test_send_with_retry_gives_up_after_max_attempts():
+    policy = RetryPolicy(name="test", max_attempts=2, base_delay=0)
+    response = _send(lambda request: httpx.Response(503), policy)
+    assert response.status_code == 503
+    assert policy.retries == 1 and policy.gave_up == 1
+
+
+def test_send_with_retry_does_not_repeat_non_idempotent_500():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    policy = RetryPolicy(name="test", max_attempts=3, base_delay=0)
+    assert _send(handler, policy, idempotent=False).status_code == 500
+    assert len(calls) == 1
+
+
+def test_send_with_retry_stops_when_retry_after_exceeds_deadline():
+    policy = RetryPolicy(name="test", max_attempts=5)
+    response = _send(lambda request: httpx.Response(429, headers={"Retry-After": "60"}), policy, deadline=1.0)
+    assert response.status_code == 429
+    assert policy.retries == 0 and policy.gave_up == 1
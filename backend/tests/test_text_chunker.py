@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.services.gemini_service import estimate_tokens
+from app.services.text_chunker import iter_text_chunks
+
+
+class FakeUpload:
+    """Upload em memória que devolve no máximo `size` bytes por leitura"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.reads = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        if size < 0:
+            size = len(self.data)
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+def _chunks(data: bytes, **kwargs):
+    async def collect():
+        return [chunk async for chunk in iter_text_chunks(FakeUpload(data), **kwargs)]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 5, 7])
+def test_multibyte_characters_split_across_reads(read_size):
+    text = "Ação e coração 😀 — ünïcödé\n\nSegundo parágrafo: 日本語のテキスト"
+    data = text.encode("utf-8")
+    assert len(data) > len(text)
+    assert _chunks(data, max_tokens=1000, read_size=read_size) == [text]
+
+
+def test_paragraph_break_split_across_reads():
+    text = "primeiro\n\nsegundo"
+    # O "\n\n" fica dividido entre duas leituras
+    assert _chunks(text.encode("utf-8"), max_tokens=1000, read_size=9) == [text]
+
+
+def test_paragraphs_are_grouped_within_the_token_budget():
+    paragraphs = [f"parágrafo {i} " + "palavra " * 20 for i in range(30)]
+    chunks = _chunks("\n\n".join(paragraphs).encode("utf-8"), max_tokens=100, read_size=64)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    rebuilt = [p for chunk in chunks for p in chunk.split("\n\n")]
+    assert rebuilt == [p.strip() for p in paragraphs]
+
+
+def test_long_paragraph_is_cut_at_spaces():
+    words = ["çç" + str(i) for i in range(500)]
+    chunks = _chunks(" ".join(words).encode("utf-8"), max_tokens=50, read_size=13)
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert " ".join(chunks).split() == words
+
+
+def test_invalid_utf8_raises():
+    with pytest.raises(UnicodeDecodeError):
+        _chunks(b"ok\n\n\xff\xfe", max_tokens=100, read_size=4)
+
+
+def test_empty_upload_yields_nothing():
+    assert _chunks(b"", max_tokens=100) == []
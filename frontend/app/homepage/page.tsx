@@ -6,6 +6,7 @@ import SubjectCard from "@/app/components/SubjectCard";
 import StudySessionCard from "@/app/components/StudySessionCard";
 import { Subject, StudySession, HistoryItem } from "@/app/types";
 import { useRouter, usePathname } from "next/navigation";
+import { readAllItems } from "@/lib/api";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -41,7 +42,7 @@ export default function Dashboard() {
       if (!response.ok) {
         throw new Error("Erro ao buscar subjects");
       }
-      const data = await response.json();
+      const data = await readAllItems(response, `${API_BASE_URL}/api/subjects/user/${userId}`);
       
       // Converter do formato do backend para o formato do frontend
       const formattedSubjects: Subject[] = data.map((subject: any) => ({
@@ -75,7 +76,7 @@ export default function Dashboard() {
       if (!subjectsResponse.ok) {
         throw new Error("Erro ao buscar subjects");
       }
-      const subjects = await subjectsResponse.json();
+      const subjects = await readAllItems(subjectsResponse, `${API_BASE_URL}/api/subjects/user/${userId}`);
 
       // Para cada subject, buscar os topics
       const historyItems: HistoryItem[] = [];
@@ -84,7 +85,7 @@ export default function Dashboard() {
           const subjectId = subject.subjectId || subject.id;
           const topicsResponse = await fetch(`${API_BASE_URL}/api/topics/subject/${subjectId}`);
           if (topicsResponse.ok) {
-            const topics = await topicsResponse.json();
+            const topics = await readAllItems(topicsResponse, `${API_BASE_URL}/api/topics/subject/${subjectId}`);
             topics.slice(0, 3).forEach((topic: any) => {
               historyItems.push({
                 id: topic.topicId || topic.id,
@@ -174,7 +175,7 @@ export default function Dashboard() {
       if (!response.ok) {
         throw new Error("Erro ao buscar study sessions");
       }
-      const sessions = await response.json();
+      const sessions = await readAllItems(response, `${API_BASE_URL}/api/study-sessions/user/${userId}`);
       
       // Tentar obter access token para criar eventos no calendar
       let accessToken: string | null = null;
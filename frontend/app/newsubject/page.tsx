@@ -9,6 +9,7 @@ import { Textarea } from "@/app/components/ui/textarea";
 import { HistoryItem } from "@/app/types";
 import { useRouter } from "next/navigation";
 import { useSidebarPadding } from "@/app/components/SidebarContext";
+import { readAllItems } from "@/lib/api";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -80,7 +81,7 @@ export default function NewSubject() {
       if (!subjectsResponse.ok) {
         throw new Error("Erro ao buscar subjects");
       }
-      const subjects = await subjectsResponse.json();
+      const subjects = await readAllItems(subjectsResponse, `${API_BASE_URL}/api/subjects/user/${userId}`);
 
       // Para cada subject, buscar os topics
       const historyItems: HistoryItem[] = [];
@@ -89,7 +90,7 @@ export default function NewSubject() {
           const subjectId = subject.subjectId || subject.id; // Suportar ambos os formatos
           const topicsResponse = await fetch(`${API_BASE_URL}/api/topics/subject/${subjectId}`);
           if (topicsResponse.ok) {
-            const topics = await topicsResponse.json();
+            const topics = await readAllItems(topicsResponse, `${API_BASE_URL}/api/topics/subject/${subjectId}`);
             topics.slice(0, 3).forEach((topic: any) => {
               historyItems.push({
                 id: topic.topicId || topic.id,
@@ -7,6 +7,7 @@ import Sidebar from "@/app/components/SideBar";
 import { Button } from "@/app/components/ui/button";
 import { Input } from "@/app/components/ui/input";
 import { HistoryItem, Subject } from "@/app/types";
+import { readAllItems } from "@/lib/api";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -45,7 +46,7 @@ function NewTopicContent() {
       if (!subjectsResponse.ok) {
         throw new Error("Erro ao buscar subjects");
       }
-      const subjects = await subjectsResponse.json();
+      const subjects = await readAllItems(subjectsResponse, `${API_BASE_URL}/api/subjects/user/${userId}`);
 
       const historyItems: HistoryItem[] = [];
       for (const subject of subjects.slice(0, 10)) {
@@ -53,7 +54,7 @@ function NewTopicContent() {
           const subjectId = subject.subjectId || subject.id;
           const topicsResponse = await fetch(`${API_BASE_URL}/api/topics/subject/${subjectId}`);
           if (topicsResponse.ok) {
-            const topics = await topicsResponse.json();
+            const topics = await readAllItems(topicsResponse, `${API_BASE_URL}/api/topics/subject/${subjectId}`);
             topics.slice(0, 3).forEach((topic: any) => {
               historyItems.push({
                 id: topic.topicId || topic.id,
@@ -7,6 +7,7 @@ import { Input } from "@/app/components/ui/input";
 import { Button } from "@/app/components/ui/button";
 import { useState, Suspense, useEffect, useCallback } from "react";
 import { HistoryItem, Topic } from "@/app/types";
+import { readAllItems } from "@/lib/api";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -77,7 +78,7 @@ function ScheduleContent() {
       if (!subjectsResponse.ok) {
         throw new Error("Erro ao buscar subjects");
       }
-      const subjects = await subjectsResponse.json();
+      const subjects = await readAllItems(subjectsResponse, `${API_BASE_URL}/api/subjects/user/${userId}`);
 
       const historyItems: HistoryItem[] = [];
       for (const subject of subjects.slice(0, 10)) {
@@ -85,7 +86,7 @@ function ScheduleContent() {
           const subjectId = subject.subjectId || subject.id;
           const topicsResponse = await fetch(`${API_BASE_URL}/api/topics/subject/${subjectId}`);
           if (topicsResponse.ok) {
-            const topics = await topicsResponse.json();
+            const topics = await readAllItems(topicsResponse, `${API_BASE_URL}/api/topics/subject/${subjectId}`);
             topics.slice(0, 3).forEach((topic: any) => {
               historyItems.push({
                 id: topic.topicId || topic.id,
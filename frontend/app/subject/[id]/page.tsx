@@ -15,6 +15,7 @@ import {
 import { Input } from "@/app/components/ui/input";
 import { Textarea } from "@/app/components/ui/textarea";
 import { HistoryItem, Subject, Topic } from "@/app/types";
+import { readAllItems } from "@/lib/api";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -55,7 +56,7 @@ export default function SubjectDetailPage() {
       if (!subjectsResponse.ok) {
         throw new Error("Erro ao buscar subjects");
       }
-      const subjects = await subjectsResponse.json();
+      const subjects = await readAllItems(subjectsResponse, `${API_BASE_URL}/api/subjects/user/${userId}`);
 
       const historyItems: HistoryItem[] = [];
       for (const subject of subjects.slice(0, 10)) {
@@ -63,7 +64,7 @@ export default function SubjectDetailPage() {
           const subjectId = subject.subjectId || subject.id;
           const topicsResponse = await fetch(`${API_BASE_URL}/api/topics/subject/${subjectId}`);
           if (topicsResponse.ok) {
-            const topics = await topicsResponse.json();
+            const topics = await readAllItems(topicsResponse, `${API_BASE_URL}/api/topics/subject/${subjectId}`);
             topics.slice(0, 3).forEach((topic: any) => {
               historyItems.push({
                 id: topic.topicId || topic.id,
@@ -123,7 +124,7 @@ export default function SubjectDetailPage() {
       if (!response.ok) {
         throw new Error("Erro ao buscar topics");
       }
-      const data = await response.json();
+      const data = await readAllItems(response, `${API_BASE_URL}/api/topics/subject/${subjectId}`);
       setTopics(data);
     } catch (error) {
       console.error("Erro ao carregar topics:", error);
@@ -7,6 +7,7 @@ import Sidebar from "@/app/components/SideBar";
 import { Button } from "@/app/components/ui/button";
 import { Textarea } from "@/app/components/ui/textarea";
 import { HistoryItem, Topic, Note, YouTubeSuggestion } from "@/app/types";
+import { readAllItems } from "@/lib/api";
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -48,7 +49,7 @@ function TopicDetailContent() {
       if (!subjectsResponse.ok) {
         throw new Error("Erro ao buscar subjects");
       }
-      const subjects = await subjectsResponse.json();
+      const subjects = await readAllItems(subjectsResponse, `${API_BASE_URL}/api/subjects/user/${userId}`);
 
       const historyItems: HistoryItem[] = [];
       for (const subject of subjects.slice(0, 10)) {
@@ -56,7 +57,7 @@ function TopicDetailContent() {
           const subjectId = subject.subjectId || subject.id;
           const topicsResponse = await fetch(`${API_BASE_URL}/api/topics/subject/${subjectId}`);
           if (topicsResponse.ok) {
-            const topics = await topicsResponse.json();
+            const topics = await readAllItems(topicsResponse, `${API_BASE_URL}/api/topics/subject/${subjectId}`);
             topics.slice(0, 3).forEach((topic: any) => {
               historyItems.push({
                 id: topic.topicId || topic.id,
@@ -103,6 +104,33 @@ function TopicDetailContent() {
     }
   }, []);
 
+  /**
+   * Aguarda que o backend preencha uma note gerada em segundo plano
+   * 
+   * Na criação de um topic com ficheiro, a note é criada vazia e preenchida
+   * por um worker quando o Gemini responder; consulta a note periodicamente.
+   * 
+   * @param noteId - ID da note a aguardar
+   */
+  const waitForGeneratedNote = useCallback(async (noteId: string) => {
+    setIsGenerating(true);
+    try {
+      for (let attempt = 0; attempt < 60; attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, 3000));
+        const response = await fetch(`${API_BASE_URL}/api/notes/${noteId}`);
+        if (!response.ok) continue;
+        const note: Note = await response.json();
+        if (note.content) {
+          setContent(note.content);
+          return;
+        }
+      }
+      setError("O conteúdo ainda está a ser gerado. Recarregue a página mais tarde.");
+    } finally {
+      setIsGenerating(false);
+    }
+  }, []);
+
   /**
    * Carrega as notes do topic e exibe o conteúdo
    * 
@@ -118,12 +146,15 @@ function TopicDetailContent() {
       if (!response.ok) {
         throw new Error("Erro ao buscar notes");
       }
-      const notes: Note[] = await response.json();
+      const notes: Note[] = await readAllItems(response, `${API_BASE_URL}/api/notes/topic/${topicId}`);
       
       // Buscar a primeira note com conteúdo gerado por IA, ou a primeira note disponível
       const aiNote = notes.find(note => note.source === "AI-generated") || notes[0];
       if (aiNote && aiNote.content) {
         setContent(aiNote.content);
+      } else if (aiNote && aiNote.source === "AI-generated") {
+        // Conteúdo a ser gerado em segundo plano (fila de jobs do backend)
+        await waitForGeneratedNote(aiNote.noteId);
       } else if (notes.length === 0 && currentTopic) {
         // Se não houver notes, gerar conteúdo automaticamente
         await generateContent(topicId, currentTopic);
@@ -190,7 +221,7 @@ function TopicDetailContent() {
       if (!response.ok) {
         throw new Error("Erro ao buscar sugestões do YouTube");
       }
-      const suggestions: YouTubeSuggestion[] = await response.json();
+      const suggestions: YouTubeSuggestion[] = await readAllItems(response, `${API_BASE_URL}/api/youtube-suggestions/topic/${topicId}`);
       
       // Limitar a 5 sugestões
       const limitedSuggestions = suggestions.slice(0, 5);
@@ -242,8 +273,8 @@ function TopicDetailContent() {
 
       const note = await noteResponse.json();
 
-      // Gerar conteúdo com Gemini
-      const geminiResponse = await fetch(`${API_BASE_URL}/api/gemini/generate`, {
+      // Gerar conteúdo com Gemini (stream SSE); o backend grava o texto final na note
+      const geminiResponse = await fetch(`${API_BASE_URL}/api/gemini/generate/stream`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -252,29 +283,55 @@ function TopicDetailContent() {
           prompt: `Explique de forma clara e didática sobre: ${currentTopic.title}`,
           topic_id: topicId,
           context: currentTopic.description || undefined,
+          note_id: note.noteId,
         }),
       });
 
-      if (!geminiResponse.ok) {
+      if (!geminiResponse.ok || !geminiResponse.body) {
         throw new Error("Erro ao gerar conteúdo com Gemini");
       }
 
-      const geminiData = await geminiResponse.json();
-      const generatedContent = geminiData.response;
-
-      // Atualizar a note com o conteúdo gerado
-      const updateResponse = await fetch(`${API_BASE_URL}/api/notes/${note.noteId}`, {
-        method: "PUT",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          content: generatedContent,
-        }),
-      });
+      const reader = geminiResponse.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let generatedContent = "";
+      let finished = false;
+
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Eventos SSE são separados por uma linha em branco
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+          const rawEvent = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          boundary = buffer.indexOf("\n\n");
+
+          let event = "message";
+          let data = "";
+          for (const line of rawEvent.split("\n")) {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) data += line.slice(5).trim();
+          }
+          if (!data) continue;
+          const payload = JSON.parse(data);
+
+          if (event === "chunk") {
+            generatedContent += payload.text;
+            setContent(generatedContent);
+          } else if (event === "done") {
+            generatedContent = payload.response;
+            finished = true;
+          } else if (event === "error") {
+            throw new Error(payload.detail || "Erro ao gerar conteúdo com Gemini");
+          }
+        }
+      }
 
-      if (!updateResponse.ok) {
-        throw new Error("Erro ao atualizar note");
+      if (!finished) {
+        throw new Error("Stream do Gemini terminou sem resposta completa");
       }
 
       setContent(generatedContent);
@@ -353,7 +410,7 @@ function TopicDetailContent() {
       // Buscar notes existentes
       const notesResponse = await fetch(`${API_BASE_URL}/api/notes/topic/${topicId}`);
       if (notesResponse.ok) {
-        const notes: Note[] = await notesResponse.json();
+        const notes: Note[] = await readAllItems(notesResponse, `${API_BASE_URL}/api/notes/topic/${topicId}`);
         const aiNote = notes.find(note => note.source === "AI-generated") || notes[0];
 
         if (aiNote) {
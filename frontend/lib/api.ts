@@ -0,0 +1,44 @@
+/**
+ * Página devolvida pelas listagens do backend
+ *
+ * @property items - Itens desta página
+ * @property next_cursor - Cursor da página seguinte (null na última página)
+ */
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+/**
+ * Lê todos os itens de uma listagem paginada
+ *
+ * Recebe a resposta da primeira página (já validada com `response.ok`) e
+ * segue `next_cursor` até à última página, para que listas com mais itens
+ * do que o tamanho de página do backend não fiquem incompletas.
+ *
+ * @param response - Resposta da primeira página
+ * @param url - URL da listagem (sem `cursor`), usado para pedir as páginas seguintes
+ * @returns Itens de todas as páginas, pela ordem do backend
+ * @throws {Error} Se o pedido de uma página seguinte falhar
+ *
+ * @example
+ * ```ts
+ * const response = await fetch(url);
+ * if (!response.ok) throw new Error("Erro ao buscar subjects");
+ * const subjects = await readAllItems<Subject>(response, url);
+ * ```
+ */
+export async function readAllItems<T = any>(response: Response, url: string): Promise<T[]> {
+  let page: Page<T> = await response.json();
+  const items = [...page.items];
+  while (page.next_cursor) {
+    const separator = url.includes("?") ? "&" : "?";
+    const next = await fetch(`${url}${separator}cursor=${encodeURIComponent(page.next_cursor)}`);
+    if (!next.ok) {
+      throw new Error(`Erro ao buscar a página seguinte de ${url}`);
+    }
+    page = await next.json();
+    items.push(...page.items);
+  }
+  return items;
+}